@@ -0,0 +1,132 @@
+"""
+Compares Cypher statement construction in the Neo4j memory tool before and after the
+statement template cache.
+
+Neo4j caches query plans by query text, so every distinct statement text costs one plan
+compilation. The workload mirrors the writes store_context_node makes. Property dicts
+arrive with their keys in varying order, as they do from different callers.
+
+Usage:
+    PYTHONPATH=src python benchmarks/neo4j_plan_cache.py [--writes 20000] [--live]
+
+--live also runs both workloads against NEO4J_URI with "Bench"-prefixed labels. It
+clears the plan cache before each run, reports the summed result_available_after
+(planning plus execution), and deletes the benchmark nodes afterwards.
+"""
+import argparse
+import os
+import random
+import time
+
+BENCH_LABELS = ["BenchTask", "BenchCommit", "BenchFile", "BenchGeneratedFile"]
+BENCH_RELATIONSHIPS = ["BENCH_AFFECTS_FILE", "BENCH_TRIGGERED_BY_COMMIT", "BENCH_GENERATED_CODE"]
+os.environ.setdefault("NEO4J_EXTRA_LABELS", ",".join(BENCH_LABELS))
+os.environ.setdefault("NEO4J_EXTRA_RELATIONSHIP_TYPES", ",".join(BENCH_RELATIONSHIPS))
+
+from mcp_server.tools import neo4j_memory  # noqa: E402
+
+
+def legacy_node_statement(label, properties):
+    """The statement builder as it was before the template cache."""
+    unique_properties = {k: v for k, v in properties.items() if k in ["id", "name", "path", "url", "sha"]}
+    if not unique_properties:
+        return f"CREATE (n:{label} $props) RETURN n"
+    merge_props_str = ", ".join([f'{k}: $props.{k}' for k in unique_properties])
+    return f"MERGE (n:{label} {{{merge_props_str}}}) ON CREATE SET n += $props ON MATCH SET n += $props RETURN n"
+
+
+def legacy_relationship_statement(start_label, start_props, end_label, end_props, rel_type):
+    start_merge_props_str = ", ".join([f'{k}: $start_props.{k}' for k in start_props if k in ["id", "name", "path", "url", "sha"]])
+    end_merge_props_str = ", ".join([f'{k}: $end_props.{k}' for k in end_props if k in ["id", "name", "path", "url", "sha"]])
+    return (
+        f"MERGE (a:{start_label} {{{start_merge_props_str}}}) ON CREATE SET a += $start_props ON MATCH SET a += $start_props "
+        f"MERGE (b:{end_label} {{{end_merge_props_str}}}) ON CREATE SET b += $end_props ON MATCH SET b += $end_props "
+        f"MERGE (a)-[r:{rel_type}]->(b) "
+        "RETURN type(r)"
+    )
+
+
+def _shuffled(properties, rng):
+    items = list(properties.items())
+    rng.shuffle(items)
+    return dict(items)
+
+
+def build_workload(writes, seed=7):
+    """Returns a list of ("node", args) / ("relationship", args) writes."""
+    rng = random.Random(seed)
+    workload = []
+    while len(workload) < writes:
+        task_id = rng.randint(1, writes)
+        path = f"src/module_{rng.randint(1, 500)}.py"
+        sha = f"{rng.getrandbits(160):040x}"
+        workload.append(("node", ("BenchTask", _shuffled({"id": task_id, "description": "task", "status": "done"}, rng))))
+        workload.append(("node", ("BenchCommit", _shuffled({"sha": sha, "repo_url": "https://example/r.git", "event_type": "push"}, rng))))
+        workload.append(("node", ("BenchFile", _shuffled({"path": path, "name": os.path.basename(path), "repo_url": "https://example/r.git"}, rng))))
+        workload.append(("relationship", ("BenchTask", {"id": task_id}, "BenchFile", _shuffled({"path": path, "name": os.path.basename(path)}, rng), "BENCH_AFFECTS_FILE")))
+        workload.append(("relationship", ("BenchTask", {"id": task_id}, "BenchCommit", {"sha": sha}, "BENCH_TRIGGERED_BY_COMMIT")))
+    return workload[:writes]
+
+
+def statements(workload, node_builder, relationship_builder):
+    result = []
+    for kind, args in workload:
+        result.append(node_builder(*args) if kind == "node" else relationship_builder(*args))
+    return result
+
+
+def report_offline(workload):
+    for name, node_builder, relationship_builder in [
+        ("legacy f-strings", legacy_node_statement, legacy_relationship_statement),
+        ("template cache", neo4j_memory._node_statement, neo4j_memory._relationship_statement),
+    ]:
+        start = time.perf_counter()
+        texts = statements(workload, node_builder, relationship_builder)
+        elapsed = time.perf_counter() - start
+        distinct = len(set(texts))
+        print(f"{name:>18}: {len(texts)} writes, {distinct} distinct statements, "
+              f"plan cache hit rate {1 - distinct / len(texts):.4%}, "
+              f"build time {elapsed / len(texts) * 1e6:.2f} us/statement")
+    print(f"template cache info: {neo4j_memory.statement_cache_info()}")
+
+
+def run_live(workload):
+    from neo4j import GraphDatabase
+
+    uri, auth, pool_config = neo4j_memory._connection_settings()
+    with GraphDatabase.driver(uri, auth=auth, **pool_config) as driver:
+        for name, node_builder, relationship_builder in [
+            ("legacy f-strings", legacy_node_statement, legacy_relationship_statement),
+            ("template cache", neo4j_memory._node_statement, neo4j_memory._relationship_statement),
+        ]:
+            with driver.session(**neo4j_memory._session_kwargs()) as session:
+                session.run("CALL db.clearQueryCaches()").consume()
+                available_after_ms = 0
+                start = time.perf_counter()
+                for (kind, args), statement in zip(workload, statements(workload, node_builder, relationship_builder)):
+                    if kind == "node":
+                        summary = session.run(statement, props=args[1]).consume()
+                    else:
+                        summary = session.run(statement, start_props=args[1], end_props=args[3]).consume()
+                    available_after_ms += summary.result_available_after or 0
+                elapsed = time.perf_counter() - start
+                session.run(
+                    "MATCH (n) WHERE any(l IN labels(n) WHERE l STARTS WITH 'Bench') DETACH DELETE n"
+                ).consume()
+            print(f"{name:>18} (live): {elapsed:.2f}s wall, {available_after_ms} ms summed result_available_after")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writes", type=int, default=20000)
+    parser.add_argument("--live", action="store_true", help="also run against NEO4J_URI")
+    args = parser.parse_args()
+
+    workload = build_workload(args.writes)
+    report_offline(workload)
+    if args.live:
+        run_live(workload)
+
+
+if __name__ == "__main__":
+    main()
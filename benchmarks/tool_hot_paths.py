@@ -0,0 +1,244 @@
+"""
+Benchmarks the MCP tool hot paths at growing input sizes and compares them against
+stored baselines, so O(n) scans and copies show up before production.
+
+Cases:
+    task_tracker.{create,get,update,list}  TaskTrackerTool with 10^3 .. 10^6 stored tasks
+    read_repo.list_files                   synthetic trees of 10^2 .. 10^4 files
+    read_repo.read_file                    files of 1 KB .. 10 MB
+    generate_code.update_file              replacing a line near the end of 1 MB .. 10 MB files
+    memory_graph.{add_node,write_batch}    MERGE writes into SqliteMemoryGraph (the Neo4j stand-in)
+                                           holding 10^3 .. 10^5 nodes
+    loom_helper.checklist                  generate_demo_checklist with 10^2 .. 10^4 changes
+
+Cases only call the tools' public methods. Each reports the best per-operation time over
+several rounds.
+
+Results are compared with baselines recorded on the same machine, in
+benchmarks/baselines.json (not committed: timings from one machine say nothing about
+another). Cases run for the first time are recorded. Later runs flag a case slower than its baseline by
+more than the threshold (default 2x) as a regression and exit with status 1. The
+threshold is loose enough for run-to-run noise while still catching a hot path turning
+O(n). Re-record with --save-baseline after an intended change in speed.
+
+Usage:
+    PYTHONPATH=src python benchmarks/tool_hot_paths.py [--quick] [--filter task_tracker]
+                                                       [--threshold 2] [--save-baseline]
+
+--quick skips sizes above 10^4 tasks/files/nodes and the 10 MB files.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("ORCHESTRATOR_TRACING", "0")
+
+from mcp_server.tools.task_tracker import TaskTrackerTool  # noqa: E402
+from mcp_server.tools.read_repo import RepoReadTool  # noqa: E402
+from mcp_server.tools.generate_code import CodeGenerationTool  # noqa: E402
+from mcp_server.tools.loom_helper import LoomHelperTool  # noqa: E402
+from mcp_server.tools.sqlite_memory import SqliteMemoryGraph  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+QUICK_MAX_SIZE = 10_000
+QUICK_MAX_BYTES = 1_000_000
+
+
+# Rounds shorter than this are dominated by timer and scheduling noise.
+MIN_ROUND_SECONDS = 0.05
+
+
+def measure(fn, number: int, repeat: int = 5) -> float:
+    """
+    Best seconds per call of fn over repeat rounds of number calls. number is raised until
+    a round takes at least MIN_ROUND_SECONDS.
+    """
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_ROUND_SECONDS:
+            break
+        number = max(number * 2, int(number * MIN_ROUND_SECONDS / max(elapsed, 1e-9)) + 1)
+    best = elapsed / number
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+# --- Cases ---
+# Each case yields (name, seconds per operation).
+
+def bench_task_tracker(root: str, sizes: list):
+    for size in sizes:
+        tool = TaskTrackerTool(os.path.join(root, f"tasks-{size}.sqlite"))
+        for i in range(size):
+            tool.create_task(f"task {i}")
+        rng = random.Random(size)
+        yield f"task_tracker.create[n={size}]", measure(lambda: tool.create_task("new task", {"k": "v"}), 200)
+        yield f"task_tracker.get[n={size}]", measure(lambda: tool.get_task(rng.randint(1, size)), 500)
+        yield f"task_tracker.update[n={size}]", measure(lambda: tool.update_task_status(rng.randint(1, size), "done"), 200)
+        if size <= 100_000:
+            yield f"task_tracker.list[n={size}]", measure(tool.list_tasks, 1, repeat=7)
+        tool.close()
+
+
+def bench_read_repo(root: str, file_counts: list, file_sizes: list):
+    tool = RepoReadTool()
+    for count in file_counts:
+        tree = os.path.join(root, f"tree-{count}")
+        for i in range(count):
+            directory = os.path.join(tree, f"pkg_{i % 20}", f"sub_{i % 7}")
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, f"module_{i}.py"), "w") as f:
+                f.write("x = 1\n")
+        yield f"read_repo.list_files[files={count}]", measure(lambda: tool.list_files(tree), 1, repeat=7)
+    for size in file_sizes:
+        path = os.path.join(root, f"read-{size}.txt")
+        with open(path, "w") as f:
+            f.write("a" * size)
+        yield f"read_repo.read_file[bytes={size}]", measure(lambda: tool.read_file(path), 5 if size > 1_000_000 else 50)
+
+
+def bench_update_file(root: str, file_sizes: list):
+    tool = CodeGenerationTool()
+    for size in file_sizes:
+        path = os.path.join(root, f"update-{size}.py")
+        with open(path, "w") as f:
+            f.write("# filler line\n" * (size // 14) + "VALUE = 'A'\n")
+        state = {"value": "A"}
+
+        def toggle():
+            new = "B" if state["value"] == "A" else "A"
+            tool.update_file(path, f"VALUE = '{new}'", f"VALUE = '{state['value']}'")
+            state["value"] = new
+
+        yield f"generate_code.update_file[bytes={size}]", measure(toggle, 3 if size > 1_000_000 else 20)
+
+
+def bench_memory_graph(root: str, sizes: list):
+    loop = asyncio.new_event_loop()
+    for size in sizes:
+        graph = SqliteMemoryGraph(os.path.join(root, f"graph-{size}.sqlite"))
+        for start in range(0, size, 1000):
+            nodes = [("File", {"path": f"src/module_{i}.py", "repo_url": "r"}) for i in range(start, min(size, start + 1000))]
+            loop.run_until_complete(graph.write_batch(nodes, []))
+        rng = random.Random(size)
+
+        def merge_existing():
+            loop.run_until_complete(graph.add_node("File", {"path": f"src/module_{rng.randrange(size)}.py", "size": 1}))
+
+        def merge_batch():
+            task_id = rng.randrange(size)
+            paths = [f"src/module_{rng.randrange(size)}.py" for _ in range(50)]
+            loop.run_until_complete(graph.write_batch(
+                [("Task", {"id": task_id, "status": "done"})] + [("File", {"path": p}) for p in paths],
+                [("Task", {"id": task_id}, "File", {"path": p}, "AFFECTS_FILE") for p in paths],
+            ))
+
+        yield f"memory_graph.add_node[nodes={size}]", measure(merge_existing, 200)
+        yield f"memory_graph.write_batch[nodes={size}]", measure(merge_batch, 10)
+        loop.run_until_complete(graph.close())
+    loop.close()
+
+
+def bench_loom_helper(sizes: list):
+    tool = LoomHelperTool()
+    for size in sizes:
+        changes = [f"src/package_{i % 50}/module_{i}.py" for i in range(size)]
+        yield f"loom_helper.checklist[changes={size}]", measure(lambda: tool.generate_demo_checklist("Ship it", changes), 5)
+
+
+def run_cases(root: str, quick: bool, name_filter: str = ""):
+    def upto(values, limit):
+        return [v for v in values if not quick or v <= limit]
+
+    groups = [
+        ("task_tracker", lambda: bench_task_tracker(root, upto([1_000, 10_000, 100_000, 1_000_000], QUICK_MAX_SIZE))),
+        ("read_repo", lambda: bench_read_repo(
+            root, upto([100, 1_000, 10_000], QUICK_MAX_SIZE), upto([1_000, 1_000_000, 10_000_000], QUICK_MAX_BYTES))),
+        ("generate_code", lambda: bench_update_file(root, upto([1_000_000, 10_000_000], QUICK_MAX_BYTES))),
+        ("memory_graph", lambda: bench_memory_graph(root, upto([1_000, 10_000, 100_000], QUICK_MAX_SIZE))),
+        ("loom_helper", lambda: bench_loom_helper([100, 1_000, 10_000])),
+    ]
+    for group, cases in groups:
+        # "task_tracker" runs the group, "task_tracker.get" only matching cases of it.
+        if name_filter and group not in name_filter and name_filter not in group:
+            continue
+        for name, seconds in cases():
+            if name_filter in name:
+                yield name, seconds
+
+
+# --- Baselines ---
+def _format_seconds(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} us"
+
+
+def compare(results: dict, baselines: dict, threshold: float) -> list:
+    """Prints each result against its baseline and returns the names of regressed cases."""
+    regressions = []
+    for name, seconds in results.items():
+        baseline = baselines.get(name)
+        if baseline is None:
+            verdict = "new"
+        else:
+            ratio = seconds / baseline
+            verdict = f"{ratio:.2f}x"
+            if ratio > threshold:
+                verdict += "  REGRESSION"
+                regressions.append(name)
+        print(f"{name:<45} {_format_seconds(seconds):>12}  {verdict}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="skip the largest sizes")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--threshold", type=float, default=2.0, help="slowdown ratio that counts as a regression")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baselines")
+    args = parser.parse_args()
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+
+    root = tempfile.mkdtemp(prefix="mcp-bench-")
+    try:
+        results = {}
+        for name, seconds in run_cases(root, args.quick, args.filter):
+            results[name] = seconds
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    regressions = compare(results, baselines, args.threshold)
+    # Cases without a baseline on this machine (e.g. on the first run) are recorded as one.
+    saved = results if args.save_baseline else {name: s for name, s in results.items() if name not in baselines}
+    if saved:
+        with open(args.baseline, "w") as f:
+            json.dump({**baselines, **saved}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Saved {len(saved)} baselines to {args.baseline}")
+    if regressions and not args.save_baseline:
+        print(f"{len(regressions)} case(s) regressed by more than {args.threshold}x")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -9,9 +9,28 @@ export PYTHONPATH=$PYTHONPATH:./src
 # Load environment variables from .env file
 export $(grep -v '^#' .env | xargs)
 
+# Number of server processes (optional, default 1). Workers share tasks, queued
+# orchestrator runs and cache invalidations through MCP_STATE_DB.
+MCP_WORKERS=${MCP_WORKERS:-1}
+export MCP_WORKERS
+
+# With several workers, each one writes its Prometheus samples to a shared directory
+# that /metrics aggregates. It must be emptied before the workers start.
+if [ "$MCP_WORKERS" -gt 1 ]; then
+    export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/mcp-prometheus}
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
+# /github-webhook refuses every delivery (503) unless GITHUB_WEBHOOK_SECRET is set in .env,
+# because an accepted event clones, commits and pushes. For local testing without a secret,
+# set GITHUB_WEBHOOK_ALLOW_UNSIGNED=1 to accept unsigned deliveries.
+GITHUB_WEBHOOK_ALLOW_UNSIGNED=${GITHUB_WEBHOOK_ALLOW_UNSIGNED:-0}
+export GITHUB_WEBHOOK_ALLOW_UNSIGNED
+
 # Start the MCP server in the background
-echo "Starting MCP Server (http://localhost:8000)..."
-python3 -m uvicorn mcp_server.main:app --host 0.0.0.0 --port 8000 >> src/mcp_server/mcp-server.log 2>&1 &
+echo "Starting MCP Server (http://localhost:8000) with $MCP_WORKERS worker(s)..."
+python3 -m uvicorn mcp_server.main:app --host 0.0.0.0 --port 8000 --workers "$MCP_WORKERS" >> src/mcp_server/mcp-server.log 2>&1 &
 MCP_SERVER_PID=$!
 echo "MCP Server PID: $MCP_SERVER_PID"
 
@@ -8,6 +8,9 @@ load_dotenv() # Load environment variables from .env file
 # Retrieve API key from environment
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+# Longer modules are truncated in section prompts.
+MAX_SECTION_SOURCE_CHARS = 20000
+
 class DocsAgent:
     """
     An agent that automatically generates professional, internship-ready documentation.
@@ -80,6 +83,56 @@ class DocsAgent:
         """
         return self._make_gemini_api_call(prompt)
 
+    def generate_module_section(self, module_path: str, source: str, task_description: str = "") -> str:
+        """
+        Generates the architecture document section for one source module.
+        """
+        prompt = f"""
+        **Task:** {task_description}
+
+        **Module:** {module_path}
+
+        **Source:**
+        ```
+        {source[:MAX_SECTION_SOURCE_CHARS]}
+        ```
+
+        **Instructions:**
+        1.  Describe what this module is responsible for and how the rest of the project uses it.
+        2.  List its main classes and functions with one line each.
+        3.  Start with a level-3 Markdown heading naming the module, and write nothing about other modules.
+        """
+        if not self.model:
+            # The canned response covers the whole project, so sections get their own.
+            print(f"--- Simulating section generation for {module_path} ---")
+            return f"### `{module_path}`\n\n(Documentation for {module_path} would go here.)\n"
+        return self._make_gemini_api_call(prompt)
+
+    def generate_module_docs(self, module_path: str, outline: str, task_description: str = "") -> str:
+        """
+        Generates the documentation page of one module from its outline (signatures and
+        docstrings), which keeps prompts small for large modules.
+        """
+        prompt = f"""
+        **Task:** {task_description}
+
+        **Module:** {module_path}
+
+        **Outline (signatures and docstrings):**
+        ```
+        {outline}
+        ```
+
+        **Instructions:**
+        1.  Explain the module's purpose and how its classes and functions fit together.
+        2.  Document each public class and function: what it does, its parameters and what it returns.
+        3.  Start with a level-1 Markdown heading naming the module. Use only what the outline shows.
+        """
+        if not self.model:
+            print(f"--- Simulating module docs generation for {module_path} ---")
+            return f"# `{module_path}`\n\n(Documentation for {module_path} would go here.)\n"
+        return self._make_gemini_api_call(prompt)
+
 
 # Example usage (for testing purposes)
 if __name__ == "__main__":
@@ -8,6 +8,9 @@ load_dotenv() # Load environment variables from .env file
 # Retrieve API key from environment
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+# Definitions listed per file in the prompt's history section.
+MAX_SYMBOLS_PER_FILE = 30
+
 class GeminiCodingAgent:
     """
     A coding agent powered by Gemini to implement features, fix bugs, and refactor code.
@@ -37,9 +40,36 @@ class GeminiCodingAgent:
             # This is a hardcoded response for demonstration purposes.
             return "\n# This code was generated by the Gemini Coding Agent\ndef new_feature():\n    print(\"This is a new feature!\")\n"
 
-    def generate_code(self, task_description: str, file_path: str, git_context: Optional[Dict[str, Any]] = None) -> str:
+    @staticmethod
+    def _format_history(history: Optional[Dict[str, Any]]) -> str:
+        """
+        Renders the file context from the MCP memory graph, and the definitions from the
+        symbol index, as a short prompt section.
+        """
+        if not history:
+            return ""
+        lines = []
+        for task in history.get("related_tasks", []):
+            lines.append(f"- Task {task['id']} ({task.get('status')}): {task.get('description')} [files: {', '.join(task.get('files', []))}]")
+        for path, commits in history.get("recent_commits", {}).items():
+            if commits:
+                lines.append(f"- Recent commits touching {path}: {', '.join(c['sha'][:7] for c in commits)}")
+        for path, files in history.get("co_changed_files", {}).items():
+            if files:
+                lines.append(f"- Usually changed together with {path}: {', '.join(f['path'] for f in files)}")
+        for path, symbols in history.get("symbols", {}).items():
+            definitions = ", ".join(s.get("signature") or s["qualname"] for s in symbols[:MAX_SYMBOLS_PER_FILE])
+            lines.append(f"- Defined in {path}: {definitions}")
+        if not lines:
+            return ""
+        return "**Relevant history:**\n" + "\n".join(lines) + "\n"
+
+    def generate_code(self, task_description: str, file_path: str, git_context: Optional[Dict[str, Any]] = None,
+                      history: Optional[Dict[str, Any]] = None) -> str:
         """
         Generates code to implement a new feature or fix a bug.
+        history is the file context from the MCP memory graph (related tasks, recent commits, co-changed files),
+        optionally with "symbols": the definitions in the affected files from the symbol index.
         """
         if git_context:
             print(f"GeminiCodingAgent received Git context: {git_context}")
@@ -49,6 +79,7 @@ class GeminiCodingAgent:
 
         **File to modify:** {file_path}
 
+        {self._format_history(history)}
         **Instructions:**
         1.  Analyze the existing code in the file (if any).
         2.  Generate the Python code to implement the requested feature.
@@ -0,0 +1,148 @@
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from urllib.parse import parse_qs
+
+from mcp_server.state_db import connect_state_db
+
+# Events that start an orchestrator run. Others (e.g. ping) are acknowledged and dropped.
+WEBHOOK_EVENTS = set(os.getenv("GITHUB_WEBHOOK_EVENTS", "push,pull_request,issues").split(","))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS webhook_deliveries (
+    delivery_id TEXT PRIMARY KEY,
+    event_type TEXT NOT NULL,
+    payload_id TEXT,
+    task_id INTEGER,
+    received_at REAL NOT NULL
+)
+"""
+
+# Deliveries are remembered this long; GitHub only redelivers recent ones.
+DELIVERY_RETENTION = 7 * 86400
+
+
+def unsigned_webhooks_allowed() -> bool:
+    """
+    Whether /github-webhook may accept deliveries without GITHUB_WEBHOOK_SECRET configured.
+    Off unless GITHUB_WEBHOOK_ALLOW_UNSIGNED=1: an accepted event clones, commits and pushes.
+    """
+    return os.getenv("GITHUB_WEBHOOK_ALLOW_UNSIGNED") == "1"
+
+
+def verify_signature(secret: str, body: bytes, signature_header: str) -> bool:
+    """Checks an X-Hub-Signature-256 header ("sha256=<hex>") against the raw body, in constant time."""
+    if not signature_header or not signature_header.startswith("sha256="):
+        return False
+    expected = "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature_header)
+
+
+def decode_payload(body: bytes, content_type: str) -> tuple:
+    """
+    Decodes a webhook body sent as application/json or as the form field "payload".
+    Returns the payload and its raw JSON bytes.
+    """
+    if content_type and content_type.startswith("application/x-www-form-urlencoded"):
+        fields = parse_qs(body.decode("utf-8"))
+        if "payload" not in fields:
+            raise ValueError("Form-encoded webhook without a payload field.")
+        body = fields["payload"][0].encode("utf-8")
+    try:
+        payload = json.loads(body)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Webhook body is not valid JSON: {e}")
+    if not isinstance(payload, dict):
+        raise ValueError("Webhook payload must be a JSON object.")
+    return payload, body
+
+
+def git_context_for_event(event_type: str, payload: dict, payload_id: str) -> dict:
+    """
+    The git_context an orchestrator run starts from. The payload itself stays in the
+    PayloadStore and is loaded by the graph, so queued jobs only carry its ID.
+    """
+    repository = payload.get("repository") or {}
+    return {
+        "event_type": event_type,
+        "repo_name": repository.get("full_name"),
+        "repo_url": repository.get("clone_url"),
+        "payload_id": payload_id,
+    }
+
+
+def extract_task_from_git_context(git_context: dict) -> str:
+    """The description of the task an event starts, from its git_context and payload."""
+    event_type = git_context.get("event_type")
+    payload = git_context.get("payload", {})
+    repo_name = git_context.get("repo_name", "unknown/unknown")
+
+    if event_type == "push":
+        head_commit = payload.get("head_commit") or {}
+        message = head_commit.get("message", f"New push to {repo_name}")
+        return f"Analyze recent push to {repo_name}: {message}"
+    elif event_type == "pull_request":
+        pr = payload.get("pull_request", {})
+        action = payload.get("action", "activity")
+        title = pr.get("title", f"Pull request activity in {repo_name}")
+        return f"Process pull request '{title}' ({action}) in {repo_name}"
+    elif event_type == "issues" and payload.get("action") == "opened":
+        issue = payload.get("issue", {})
+        title = issue.get("title", "New issue")
+        body = issue.get("body", "")
+        return f"Task from new issue '{title}': {body}"
+    else:
+        return f"Handle GitHub event '{event_type}' for {repo_name}"
+
+
+class WebhookDeliveries:
+    """
+    Delivery IDs (X-GitHub-Delivery) already accepted, kept in the shared state database
+    so a redelivered event is acknowledged without starting a second run, whichever
+    worker receives it.
+    """
+
+    def __init__(self, db_path: str = None):
+        self._conn = connect_state_db(db_path)
+        self._lock = threading.Lock()
+        self._conn.execute(SCHEMA)
+
+    def claim(self, delivery_id: str, event_type: str) -> bool:
+        """Records a delivery. Returns False if it was already recorded."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO webhook_deliveries (delivery_id, event_type, received_at) VALUES (?, ?, ?)",
+                (delivery_id, event_type, time.time()),
+            )
+            return cursor.rowcount > 0
+
+    def record(self, delivery_id: str, payload_id: str = None, task_id: int = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE webhook_deliveries SET payload_id = ?, task_id = ? WHERE delivery_id = ?",
+                (payload_id, task_id, delivery_id),
+            )
+
+    def get(self, delivery_id: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload_id, task_id FROM webhook_deliveries WHERE delivery_id = ?", (delivery_id,)
+            ).fetchone()
+        return {"payload_id": row[0], "task_id": row[1]} if row else None
+
+    def release(self, delivery_id: str) -> None:
+        """Forgets a delivery that could not be handed off, so GitHub's redelivery is processed."""
+        with self._lock:
+            self._conn.execute("DELETE FROM webhook_deliveries WHERE delivery_id = ?", (delivery_id,))
+
+    def prune(self) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM webhook_deliveries WHERE received_at < ?", (time.time() - DELIVERY_RETENTION,)
+            )
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,142 @@
+import json
+import sqlite3
+import threading
+import time
+
+from mcp_server.state_db import connect_state_db, worker_alive, worker_id
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS orchestrator_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        task_id INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'queued',
+        worker TEXT,
+        error TEXT,
+        created_at REAL NOT NULL,
+        claimed_at REAL,
+        finished_at REAL
+    )
+    """,
+    # At most one run per task is queued or running at a time.
+    "CREATE UNIQUE INDEX IF NOT EXISTS orchestrator_jobs_active ON orchestrator_jobs (task_id) WHERE status IN ('queued', 'running')",
+    "CREATE INDEX IF NOT EXISTS orchestrator_jobs_status ON orchestrator_jobs (status, id)",
+]
+
+# Finished jobs are kept this long for inspection, then pruned by recover().
+FINISHED_JOB_RETENTION = 7 * 86400
+
+JOB_KINDS = ("start", "resume", "retry")
+
+
+class OrchestratorJobQueue:
+    """
+    Orchestrator runs waiting for or holding a worker, kept in the shared state database.
+    Any server worker can claim a run queued by another, and runs claimed by a worker that
+    died are put back in the queue by recover().
+
+    Jobs are one of:
+    - start: payload {"initial_state": ...}, a new run,
+    - resume: continue a run from its last checkpoint,
+    - retry: payload {"node": ...}, re-run a task from that node onwards.
+    """
+
+    def __init__(self, db_path: str = None):
+        self._conn = connect_state_db(db_path)
+        self._lock = threading.Lock()
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+
+    def enqueue(self, task_id: int, kind: str, payload: dict = None) -> int:
+        """
+        Queues a run and returns the job ID. Raises ValueError if a run of the task is
+        already queued or running.
+        """
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown orchestrator job kind '{kind}'.")
+        try:
+            with self._lock:
+                cursor = self._conn.execute(
+                    "INSERT INTO orchestrator_jobs (task_id, kind, payload, created_at) VALUES (?, ?, ?, ?)",
+                    (task_id, kind, json.dumps(payload or {}, default=str), time.time()),
+                )
+        except sqlite3.IntegrityError:
+            raise ValueError(f"An orchestrator run for task {task_id} is already queued or running.")
+        return cursor.lastrowid
+
+    def claim(self, worker: str):
+        """Marks the oldest queued job as running on worker and returns it, or None if the queue is empty."""
+        with self._lock:
+            row = self._conn.execute(
+                """
+                UPDATE orchestrator_jobs SET status = 'running', worker = ?, claimed_at = ?
+                WHERE id = (SELECT id FROM orchestrator_jobs WHERE status = 'queued' ORDER BY id LIMIT 1)
+                RETURNING id, task_id, kind, payload
+                """,
+                (worker, time.time()),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"id": row[0], "task_id": row[1], "kind": row[2], "payload": json.loads(row[3])}
+
+    def finish(self, job_id: int, error: str = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE orchestrator_jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                ("failed" if error else "done", error, time.time(), job_id),
+            )
+
+    def recover(self) -> int:
+        """
+        Requeues jobs claimed by workers that are no longer running and prunes old finished
+        jobs. A requeued retry continues from its checkpoint rather than retrying again.
+        Returns the number of jobs requeued.
+
+        Called when a worker starts, before it claims jobs: jobs under its own worker ID
+        were claimed by an earlier process that had the same PID.
+        """
+        me = worker_id()
+        with self._lock:
+            running = self._conn.execute(
+                "SELECT id, worker FROM orchestrator_jobs WHERE status = 'running'"
+            ).fetchall()
+            orphaned = [job_id for job_id, worker in running if worker == me or not worker_alive(worker)]
+            for job_id in orphaned:
+                self._conn.execute(
+                    """
+                    UPDATE orchestrator_jobs
+                    SET status = 'queued', worker = NULL, claimed_at = NULL,
+                        kind = CASE kind WHEN 'retry' THEN 'resume' ELSE kind END
+                    WHERE id = ? AND status = 'running'
+                    """,
+                    (job_id,),
+                )
+            self._conn.execute(
+                "DELETE FROM orchestrator_jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                (time.time() - FINISHED_JOB_RETENTION,),
+            )
+        return len(orphaned)
+
+    def latest_job(self, task_id: int):
+        """The most recent job of a task, with its timestamps, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT id, kind, status, worker, error, created_at, claimed_at, finished_at
+                FROM orchestrator_jobs WHERE task_id = ? ORDER BY id DESC LIMIT 1
+                """,
+                (task_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("id", "kind", "status", "worker", "error", "queued_at", "started_at", "finished_at")
+        return dict(zip(keys, row))
+
+    def queued_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM orchestrator_jobs WHERE status = 'queued'").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
@@ -1,5 +1,14 @@
-from fastapi import FastAPI, HTTPException
-from typing import List, Dict, Any
+import os
+import json
+import time
+import asyncio
+import importlib
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST
+from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 from mcp_server.models import (
     Task,
@@ -11,34 +20,273 @@ from mcp_server.models import (
     Neo4jNode,
     Neo4jRelationship,
     Neo4jQuery,
+    Neo4jWriteBatch,
+    FileContextRequest,
+    FileContext,
     LoomChecklistRequest,
+    SymbolIndexRequest,
+    SymbolIndexStats,
+    SymbolDefinition,
+    SymbolCall,
+    FileSymbolsRequest,
+    FileSymbol,
 )
 from mcp_server.tools.task_tracker import TaskTrackerTool
 from mcp_server.tools.generate_code import CodeGenerationTool
 from mcp_server.tools.read_repo import RepoReadTool
 from mcp_server.tools.write_docs import DocsWriteTool
-from mcp_server.tools.neo4j_memory import Neo4jMemoryTool
+from mcp_server.tools.memory_backend import create_memory_backend
+from mcp_server.tools.neo4j_write_buffer import Neo4jWriteBuffer
+from mcp_server.tools.memory_compaction import MemoryCompactionJob
 from mcp_server.tools.loom_helper import LoomHelperTool
-from orchestrator.graph import app as orchestrator_app_graph
+from mcp_server.tools.symbol_index import SymbolIndexTool
+from mcp_server.job_queue import OrchestratorJobQueue
+from mcp_server.github_webhook import (
+    WEBHOOK_EVENTS,
+    WebhookDeliveries,
+    decode_payload,
+    extract_task_from_git_context,
+    git_context_for_event,
+    unsigned_webhooks_allowed,
+    verify_signature,
+)
+from orchestrator.payload_store import PayloadStore
+from orchestrator.artifact_store import ArtifactStore
+from mcp_server.state_db import Leases, worker_count, worker_id
+from mcp_server.metrics import (
+    MetricsMiddleware,
+    TASK_STORE_SIZE,
+    ORCHESTRATOR_QUEUE_DEPTH,
+    ORCHESTRATOR_RUNS_ACTIVE,
+    TOOL_IO_IN_PROGRESS,
+    TOOL_IO_WAIT_SECONDS,
+    WEBHOOK_DELIVERIES_TOTAL,
+    set_gauge_function,
+    sample_gauge_functions,
+    render_metrics,
+    mark_process_dead,
+    MULTIPROCESS,
+)
+
+# --- Shared State ---
+# Tasks, queued orchestrator runs and leases live in the SQLite file MCP_STATE_DB, shared by
+# every worker process (MCP_WORKERS in run.sh).
+job_queue = OrchestratorJobQueue()
+leases = Leases()
+webhook_deliveries = WebhookDeliveries()
+# Raw webhook payloads, shared with the orchestrator (same ORCHESTRATOR_PAYLOAD_DIR).
+payload_store = PayloadStore()
+# Outputs of orchestrator runs, written by the graph (same ORCHESTRATOR_ARTIFACT_DIR).
+artifact_store = ArtifactStore()
+
+# --- Initialize Tools ---
+task_tracker = TaskTrackerTool()
+code_generation = CodeGenerationTool()
+repo_read = RepoReadTool()
+docs_write = DocsWriteTool()
+loom_helper = LoomHelperTool()
+symbol_index = SymbolIndexTool()
+# The memory graph tools are built in lifespan(), when the server starts.
+neo4j_memory = None
+write_buffer = None
+compaction_job = None
+
+set_gauge_function(TASK_STORE_SIZE, task_tracker.count_tasks)
+set_gauge_function(ORCHESTRATOR_QUEUE_DEPTH, job_queue.queued_count)
+
+# What /readyz waits for. Both are brought up in the background after startup.
+readiness = {"orchestrator": False, "memory_graph": False}
+
+# --- Orchestrator Graph ---
+# Importing orchestrator.graph pulls in LangGraph, LangChain and the Gemini SDK and compiles
+# the workflow, so it is loaded in a worker thread after startup rather than on import.
+_orchestrator_graph_loading = None
+
+async def orchestrator_graph():
+    """Returns the orchestrator.graph module, loading it on first use."""
+    global _orchestrator_graph_loading
+    if _orchestrator_graph_loading is None:
+        _orchestrator_graph_loading = asyncio.ensure_future(asyncio.to_thread(importlib.import_module, "orchestrator.graph"))
+    try:
+        return await asyncio.shield(_orchestrator_graph_loading)
+    except Exception:
+        _orchestrator_graph_loading = None
+        raise
+
+# --- Orchestrator Run Queue ---
+# Runs are queued in the shared job queue and each worker claims up to
+# ORCHESTRATOR_MAX_CONCURRENT_RUNS of them at a time, whichever worker queued them.
+MAX_CONCURRENT_RUNS = int(os.getenv("ORCHESTRATOR_MAX_CONCURRENT_RUNS", "4"))
+JOB_POLL_INTERVAL = float(os.getenv("ORCHESTRATOR_JOB_POLL_INTERVAL", "0.5"))
+orchestrator_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_RUNS, thread_name_prefix="orchestrator-run")
+# Set when this worker queues a run, so it is picked up without waiting for the next poll.
+_jobs_queued = None
+
+async def enqueue_orchestrator_run(task_id: int, kind: str, payload: dict = None) -> int:
+    """
+    Queues an orchestrator run for any worker to pick up. Raises ValueError if the task
+    already has a run queued or running.
+    """
+    job_id = await asyncio.to_thread(job_queue.enqueue, task_id, kind, payload)
+    # Set on the event loop: asyncio.Event is not thread-safe.
+    if _jobs_queued:
+        _jobs_queued.set()
+    return job_id
+
+def run_orchestrator_job(graph, job: dict) -> None:
+    """Executes a claimed job in an orchestrator thread and records how it ended."""
+    task_id = job["task_id"]
+    error = None
+    with ORCHESTRATOR_RUNS_ACTIVE.track_inprogress():
+        try:
+            if job["kind"] == "start":
+                try:
+                    snapshot = graph.get_run_state(task_id)
+                except ValueError:
+                    graph.start_run(job["payload"]["initial_state"])
+                else:
+                    # The worker that started this run stopped; continue from its checkpoint.
+                    if snapshot.next:
+                        graph.resume_run(task_id)
+            elif job["kind"] == "resume":
+                graph.resume_run(task_id)
+            else:
+                graph.retry_run_from_node(task_id, job["payload"]["node"])
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            print(f"Orchestrator run failed: {e}")
+        finally:
+            # The job stays running until nodes abandoned after a timeout have stopped, so no
+            # worker can start a resume or retry of the task while they may still push.
+            graph.wait_for_abandoned_nodes(task_id)
+            job_queue.finish(job["id"], error)
+
+async def dispatch_orchestrator_jobs(graph):
+    """Claims queued runs from the shared job queue whenever this worker has a free run slot."""
+    global _jobs_queued
+    _jobs_queued = asyncio.Event()
+    slots = asyncio.Semaphore(MAX_CONCURRENT_RUNS)
+    loop = asyncio.get_running_loop()
+    me = worker_id()
+    while True:
+        await slots.acquire()
+        job = None
+        try:
+            job = await asyncio.to_thread(job_queue.claim, me)
+        except Exception as e:
+            print(f"Could not claim an orchestrator job: {e}")
+        if job is None:
+            slots.release()
+            try:
+                await asyncio.wait_for(_jobs_queued.wait(), timeout=JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            _jobs_queued.clear()
+            continue
+        future = loop.run_in_executor(orchestrator_executor, run_orchestrator_job, graph, job)
+        future.add_done_callback(lambda _: slots.release())
+
+# --- File Tool I/O ---
+# The file and repo tools block on disk I/O. They run on their own thread pool instead of
+# the threadpool shared with the sync endpoints, and each tool has a concurrency limit
+# (MCP_<TOOL>_CONCURRENCY) so e.g. walking a huge directory tree only ever occupies a few
+# threads. By default the pool (MCP_IO_THREADS) has a thread for every slot.
+TOOL_CONCURRENCY = {
+    tool: int(os.getenv(f"MCP_{tool.upper()}_CONCURRENCY", str(default)))
+    for tool, default in {"generate_code": 4, "read_repo": 4, "list_files": 2, "write_docs": 2, "symbol_index": 2, "artifacts": 4}.items()
+}
+tool_limits = {tool: asyncio.Semaphore(limit) for tool, limit in TOOL_CONCURRENCY.items()}
+io_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("MCP_IO_THREADS", str(sum(TOOL_CONCURRENCY.values())))),
+    thread_name_prefix="tool-io",
+)
+
+async def run_tool_io(tool: str, fn, *args):
+    """Runs a blocking tool call on the I/O pool once one of the tool's slots is free."""
+    start = time.perf_counter()
+    async with tool_limits[tool]:
+        TOOL_IO_WAIT_SECONDS.labels(tool).observe(time.perf_counter() - start)
+        with TOOL_IO_IN_PROGRESS.labels(tool).track_inprogress():
+            return await asyncio.get_running_loop().run_in_executor(io_executor, fn, *args)
+
+# --- Startup and Shutdown ---
+async def load_orchestrator():
+    """
+    Loads the orchestrator graph, requeues runs interrupted by a restart and starts
+    claiming queued runs.
+    """
+    try:
+        graph = await orchestrator_graph()
+    except Exception as e:
+        print(f"Could not load the orchestrator graph: {e}")
+        return
+    await asyncio.to_thread(webhook_deliveries.prune)
+    requeued = await asyncio.to_thread(job_queue.recover)
+    if requeued:
+        print(f"Requeued {requeued} orchestrator runs of stopped workers")
+    # Runs interrupted without a job (e.g. checkpointed before the job queue existed) are
+    # resumed by whichever worker starts first.
+    if await asyncio.to_thread(leases.acquire, "orchestrator_recovery", 60):
+        for task_id in await asyncio.to_thread(graph.incomplete_run_task_ids):
+            try:
+                await enqueue_orchestrator_run(task_id, "resume")
+            except ValueError:
+                pass
+    readiness["orchestrator"] = True
+    await dispatch_orchestrator_jobs(graph)
 
-# --- In-Memory Database ---
-tasks_db: List[Task] = []
-task_id_counter = 1
+async def sample_metrics():
+    """In Prometheus multiprocess mode, periodically writes this worker's callback gauges."""
+    while True:
+        sample_gauge_functions()
+        await asyncio.sleep(5)
+
+async def connect_memory_graph():
+    """Creates the memory graph indexes, retrying until the database is reachable."""
+    delay = 1
+    while True:
+        try:
+            await neo4j_memory.ensure_indexes()
+            readiness["memory_graph"] = True
+            return
+        except Exception as e:
+            print(f"Memory graph not reachable, retrying in {delay}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global neo4j_memory, write_buffer, compaction_job
+    # Neo4j by default; MEMORY_BACKEND=sqlite keeps the memory graph in a local file instead.
+    # Building the backend does not connect to the database.
+    neo4j_memory = create_memory_backend()
+    # Writes go through a write-behind buffer unless NEO4J_WRITE_BEHIND=0.
+    if os.getenv("NEO4J_WRITE_BEHIND", "1") != "0":
+        write_buffer = Neo4jWriteBuffer(neo4j_memory)
+        await write_buffer.start()
+    compaction_job = MemoryCompactionJob(neo4j_memory, leases=leases)
+    compaction_job.start()
+    # Slow dependencies come up in the background, so the server accepts requests at once.
+    background = [asyncio.create_task(load_orchestrator()), asyncio.create_task(connect_memory_graph())]
+    if MULTIPROCESS:
+        background.append(asyncio.create_task(sample_metrics()))
+    yield
+    for task in background:
+        task.cancel()
+    await compaction_job.stop()
+    if write_buffer:
+        await write_buffer.stop()
+    await neo4j_memory.close()
+    mark_process_dead()
 
 # --- FastAPI Application ---
 app = FastAPI(
     title="MCP Server (Mission Control Platform)",
     description="Acts as the central tool registry, context manager, and execution engine for the automated AI workspace.",
     version="0.1.0",
+    lifespan=lifespan,
 )
-
-# --- Initialize Tools ---
-task_tracker = TaskTrackerTool(tasks_db, task_id_counter)
-code_generation = CodeGenerationTool()
-repo_read = RepoReadTool()
-docs_write = DocsWriteTool()
-neo4j_memory = Neo4jMemoryTool()
-loom_helper = LoomHelperTool()
+app.add_middleware(MetricsMiddleware)
 
 # --- API Endpoints ---
 @app.get("/")
@@ -46,26 +294,159 @@ def read_root():
     """A simple endpoint to confirm the server is running."""
     return {"message": "MCP Server is running"}
 
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+def readyz(response: Response):
+    """Readiness: the orchestrator graph is loaded and the memory graph is reachable."""
+    ready = all(readiness.values())
+    if not ready:
+        response.status_code = 503
+    return {"ready": ready, "checks": readiness}
+
+@app.get("/metrics")
+def metrics():
+    """
+    Prometheus metrics: request counts and latency per route, tool counters and per-node orchestrator
+    latency. With several workers (PROMETHEUS_MULTIPROC_DIR set) every worker's samples are aggregated.
+    """
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
 class OrchestratorRequest(BaseModel):
     task_description: str
 
-@app.post("/trigger-orchestrator")
-async def trigger_orchestrator(request: OrchestratorRequest):
-    import threading
-    initial_state = {
-        "task_description": request.task_description,
-        "task_id": 0, # Task ID will be set by create_task_node
+def new_run_state(task_description: str, task_id: int, git_context: Dict[str, Any] = None) -> Dict[str, Any]:
+    """The initial graph state of a run for an already allocated task."""
+    return {
+        "task_description": task_description,
+        "task_id": task_id,
         "status_message": "Orchestrator initiated...",
         "agent_outcome": "",
         "file_path": "",
         "code_changes": [],
         "documentation": "",
         "loom_checklist": "",
-        "git_context": None
+        "git_event": None,
+        "git_context": git_context,
+        "timed_out_nodes": [],
+        "failed_nodes": [],
+        "artifacts": {},
+    }
+
+@app.post("/trigger-orchestrator")
+async def trigger_orchestrator(request: OrchestratorRequest):
+    await orchestrator_graph()
+    # The task is allocated up front so the run can be checkpointed under its ID.
+    task = await asyncio.to_thread(task_tracker.create_task, request.task_description)
+    await enqueue_orchestrator_run(task.id, "start", {"initial_state": new_run_state(request.task_description, task.id)})
+
+    return {"message": "Orchestrator triggered", "status": "processing", "task_id": task.id, "task_description": request.task_description}
+
+# --- GitHub Webhook ---
+@app.post("/github-webhook")
+async def github_webhook(request: Request, response: Response):
+    """
+    Receives GitHub events. An event is verified, stored and queued as an orchestrator run
+    before the response, which takes milliseconds; the run itself happens in the background.
+    Redeliveries (same X-GitHub-Delivery) are acknowledged without starting another run.
+    Without GITHUB_WEBHOOK_SECRET every delivery is refused (503), unless
+    GITHUB_WEBHOOK_ALLOW_UNSIGNED=1.
+    """
+    event_type = request.headers.get("X-GitHub-Event", "")
+    body = await request.body()
+    secret = os.getenv("GITHUB_WEBHOOK_SECRET")
+    if not secret and not unsigned_webhooks_allowed():
+        WEBHOOK_DELIVERIES_TOTAL.labels(event_type, "rejected").inc()
+        raise HTTPException(status_code=503, detail="GITHUB_WEBHOOK_SECRET is not configured.")
+    if secret and not verify_signature(secret, body, request.headers.get("X-Hub-Signature-256")):
+        WEBHOOK_DELIVERIES_TOTAL.labels(event_type, "rejected").inc()
+        raise HTTPException(status_code=401, detail="Invalid webhook signature.")
+    if event_type not in WEBHOOK_EVENTS:
+        WEBHOOK_DELIVERIES_TOTAL.labels(event_type, "ignored").inc()
+        return {"message": f"Event '{event_type}' ignored."}
+    delivery_id = request.headers.get("X-GitHub-Delivery")
+    try:
+        if not delivery_id:
+            raise ValueError("Missing X-GitHub-Delivery header.")
+        payload, raw_payload = decode_payload(body, request.headers.get("content-type"))
+    except ValueError as e:
+        WEBHOOK_DELIVERIES_TOTAL.labels(event_type, "invalid").inc()
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not await asyncio.to_thread(webhook_deliveries.claim, delivery_id, event_type):
+        WEBHOOK_DELIVERIES_TOTAL.labels(event_type, "duplicate").inc()
+        delivery = await asyncio.to_thread(webhook_deliveries.get, delivery_id)
+        return {"message": "Delivery already received.", "task_id": delivery and delivery["task_id"]}
+    try:
+        payload_id = await asyncio.to_thread(payload_store.put, raw_payload)
+        git_context = git_context_for_event(event_type, payload, payload_id)
+        description = extract_task_from_git_context({**git_context, "payload": payload})
+        task = await asyncio.to_thread(
+            task_tracker.create_task, description, context={**git_context, "delivery_id": delivery_id}
+        )
+        await enqueue_orchestrator_run(task.id, "start", {"initial_state": new_run_state(description, task.id, git_context)})
+        await asyncio.to_thread(webhook_deliveries.record, delivery_id, payload_id, task.id)
+    except Exception:
+        # Let GitHub's redelivery of this event go through.
+        await asyncio.to_thread(webhook_deliveries.release, delivery_id)
+        WEBHOOK_DELIVERIES_TOTAL.labels(event_type, "failed").inc()
+        raise
+    WEBHOOK_DELIVERIES_TOTAL.labels(event_type, "accepted").inc()
+    response.status_code = 202
+    return {"message": "Event queued", "task_id": task.id, "delivery_id": delivery_id}
+
+# --- Orchestrator Run Endpoints ---
+@app.get("/orchestrator/runs/{task_id}")
+async def get_orchestrator_run_api(task_id: int):
+    """The run's checkpointed progress and its latest job (status and queue/run timestamps)."""
+    graph = await orchestrator_graph()
+    job = await asyncio.to_thread(job_queue.latest_job, task_id)
+    try:
+        snapshot = await asyncio.to_thread(graph.get_run_state, task_id)
+    except ValueError as e:
+        if job is None:
+            raise HTTPException(status_code=404, detail=str(e))
+        # Queued but not started yet: nothing is checkpointed.
+        return {"task_id": task_id, "next_nodes": [], "status_message": None, "checkpoint_id": None, "job": job}
+    return {
+        "task_id": task_id,
+        "next_nodes": list(snapshot.next),
+        "status_message": snapshot.values.get("status_message"),
+        "checkpoint_id": snapshot.config["configurable"].get("checkpoint_id"),
+        "job": job,
     }
-    threading.Thread(target=orchestrator_app_graph.invoke, args=(initial_state,)).start()
 
-    return {"message": "Orchestrator triggered", "status": "processing", "task_description": request.task_description}
+@app.post("/orchestrator/runs/{task_id}/resume")
+async def resume_orchestrator_run_api(task_id: int):
+    graph = await orchestrator_graph()
+    try:
+        snapshot = await asyncio.to_thread(graph.get_run_state, task_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if not snapshot.next:
+        raise HTTPException(status_code=409, detail=f"Orchestrator run for task {task_id} has already finished.")
+    try:
+        await enqueue_orchestrator_run(task_id, "resume")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"message": "Orchestrator run resumed", "task_id": task_id, "next_nodes": list(snapshot.next)}
+
+@app.post("/orchestrator/runs/{task_id}/retry")
+async def retry_orchestrator_run_api(task_id: int, node: str):
+    graph = await orchestrator_graph()
+    try:
+        # Walks the run's checkpoint history, so it stays off the event loop.
+        await asyncio.to_thread(graph.find_node_checkpoint, task_id, node)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    try:
+        await enqueue_orchestrator_run(task_id, "retry", {"node": node})
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"message": f"Orchestrator run retrying from '{node}'", "task_id": task_id}
 
 # --- Task Management Endpoints ---
 @app.post("/tasks/", response_model=Task, status_code=201)
@@ -92,49 +473,199 @@ def update_task_status_api(task_id: int, status: str):
 
 # --- Code Generation Endpoints ---
 @app.post("/tools/generate_code/write_file", status_code=201)
-def write_file_api(file_content: FileContent):
-    return code_generation.write_file(file_content.file_path, file_content.content)
+async def write_file_api(file_content: FileContent):
+    return await run_tool_io("generate_code", code_generation.write_file, file_content.file_path, file_content.content)
 
 @app.put("/tools/generate_code/update_file")
-def update_file_api(file_update: FileUpdate):
-    return code_generation.update_file(file_update.file_path, file_update.new_content, file_update.old_content)
+async def update_file_api(file_update: FileUpdate):
+    return await run_tool_io(
+        "generate_code", code_generation.update_file, file_update.file_path, file_update.new_content, file_update.old_content)
 
 # --- Repo Read Endpoints ---
 @app.get("/tools/read_repo/list_files", response_model=List[str])
-def list_files_api(directory_path: DirectoryPath):
-    return repo_read.list_files(directory_path.directory)
+async def list_files_api(directory_path: DirectoryPath):
+    return await run_tool_io("list_files", repo_read.list_files, directory_path.directory)
 
 @app.get("/tools/read_repo/read_file", response_model=str)
-def read_file_api(file_path: str):
-    return repo_read.read_file(file_path)
+async def read_file_api(file_path: str):
+    return await run_tool_io("read_repo", repo_read.read_file, file_path)
 
 # --- Docs Write Endpoints ---
 @app.post("/tools/write_docs/generate_readme", status_code=201)
-def generate_readme_api(request: ReadmeRequest):
-    return docs_write.generate_readme(request.project_name, request.description, request.file_path)
+async def generate_readme_api(request: ReadmeRequest):
+    return await run_tool_io(
+        "write_docs", docs_write.generate_readme, request.project_name, request.description, request.file_path)
 
 @app.post("/tools/write_docs/generate_architecture_docs", status_code=201)
-def generate_architecture_docs_api(request: ArchDocsRequest):
-    return docs_write.generate_architecture_docs(request.architecture_overview, request.file_path)
+async def generate_architecture_docs_api(request: ArchDocsRequest):
+    return await run_tool_io(
+        "write_docs", docs_write.generate_architecture_docs, request.architecture_overview, request.file_path)
+
+# --- Symbol Index Endpoints ---
+@app.post("/tools/symbol_index/index", response_model=SymbolIndexStats)
+async def index_symbols_api(request: SymbolIndexRequest):
+    try:
+        return await run_tool_io(
+            "symbol_index", symbol_index.index_repository, request.repo, request.root_dir, request.changed_files, request.removed_files)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/tools/symbol_index/definitions", response_model=List[SymbolDefinition])
+async def find_definitions_api(name: str, repo: Optional[str] = None, limit: int = 50):
+    return await run_tool_io("symbol_index", symbol_index.find_definitions, name, repo, limit)
+
+@app.get("/tools/symbol_index/callers", response_model=List[SymbolCall])
+async def find_callers_api(name: str, repo: Optional[str] = None, limit: int = 100):
+    return await run_tool_io("symbol_index", symbol_index.find_callers, name, repo, limit)
+
+@app.post("/tools/symbol_index/file_symbols", response_model=Dict[str, List[FileSymbol]])
+async def file_symbols_api(request: FileSymbolsRequest):
+    return await run_tool_io("symbol_index", symbol_index.file_symbols, request.repo, request.paths)
+
+# --- Artifact Endpoints ---
+def parse_byte_range(header: str, size: int):
+    """
+    The (start, end) of a single "bytes=" range, end inclusive, or None to serve the whole
+    artifact (no header, or a form not supported here such as several ranges). Raises
+    ValueError for a range that lies outside the artifact.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            # "bytes=-N" is the last N bytes.
+            start, end = max(size - int(last), 0), size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise ValueError(f"Range {header} not satisfiable for {size} bytes.")
+    return start, end
+
+@app.get("/artifacts/{artifact_id}")
+async def download_artifact(artifact_id: str, request: Request):
+    """
+    Serves a stored output. Supports single byte ranges of the uncompressed content; whole
+    artifacts are sent gzip-encoded as stored when the client accepts it.
+    """
+    try:
+        size = await run_tool_io("artifacts", artifact_store.size, artifact_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    headers = {"Accept-Ranges": "bytes", "ETag": f'"{artifact_id}"', "Cache-Control": "public, max-age=31536000, immutable"}
+    try:
+        byte_range = parse_byte_range(request.headers.get("range"), size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range:
+        start, end = byte_range
+        data = await run_tool_io("artifacts", artifact_store.read, artifact_id, start, end)
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        return Response(data, status_code=206, headers=headers, media_type="application/octet-stream")
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        data = await run_tool_io("artifacts", artifact_store.read_compressed, artifact_id)
+        return Response(data, headers={**headers, "Content-Encoding": "gzip"}, media_type="application/octet-stream")
+    data = await run_tool_io("artifacts", artifact_store.read, artifact_id)
+    return Response(data, headers=headers, media_type="application/octet-stream")
 
 # --- Neo4j Memory Endpoints ---
 @app.post("/tools/neo4j_memory/add_node", status_code=201)
-def add_node_api(node: Neo4jNode):
-    return neo4j_memory.add_node(node.label, node.properties)
+async def add_node_api(node: Neo4jNode, response: Response):
+    try:
+        if write_buffer:
+            write_buffer.add_node(node.label, node.properties)
+            response.status_code = 202
+            return {"message": f"Queued write for {node.label} node."}
+        return await neo4j_memory.add_node(node.label, node.properties)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/tools/neo4j_memory/add_relationship", status_code=201)
-def add_relationship_api(relationship: Neo4jRelationship):
-    return neo4j_memory.add_relationship(
+async def add_relationship_api(relationship: Neo4jRelationship, response: Response):
+    args = (
         relationship.start_node_label,
         relationship.start_node_properties,
         relationship.end_node_label,
         relationship.end_node_properties,
         relationship.relationship_type,
     )
+    try:
+        if write_buffer:
+            write_buffer.add_relationship(*args)
+            response.status_code = 202
+            return {"message": f"Queued write for {relationship.relationship_type} relationship."}
+        return await neo4j_memory.add_relationship(*args)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/tools/neo4j_memory/write_batch", status_code=201)
+async def write_batch_api(batch: Neo4jWriteBatch, response: Response):
+    """Writes several nodes and relationships in one request, e.g. all the context of one task."""
+    nodes = [(node.label, node.properties) for node in batch.nodes]
+    relationships = [
+        (r.start_node_label, r.start_node_properties, r.end_node_label, r.end_node_properties, r.relationship_type)
+        for r in batch.relationships
+    ]
+    try:
+        if write_buffer:
+            write_buffer.add_batch(nodes, relationships)
+            response.status_code = 202
+            return {"message": f"Queued {len(nodes)} node and {len(relationships)} relationship writes."}
+        written = await neo4j_memory.write_batch(nodes, relationships)
+        return {"message": f"Wrote {written} nodes and relationships."}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/tools/neo4j_memory/flush")
+async def flush_neo4j_writes_api():
+    """Flushes the write-behind buffer, for callers that need their writes visible to queries."""
+    if not write_buffer:
+        return {"message": "Write-behind buffer is disabled.", "flushed": 0}
+    try:
+        flushed = await write_buffer.flush()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Flush failed, writes remain queued: {e}")
+    return {"message": "Flushed Neo4j writes.", "flushed": flushed}
 
 @app.post("/tools/neo4j_memory/query")
-def query_neo4j_api(query: Neo4jQuery):
-    return neo4j_memory.query(query.query)
+async def query_neo4j_api(query: Neo4jQuery):
+    try:
+        return await neo4j_memory.query(query.query, query.parameters, query.limit, query.cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/tools/neo4j_memory/query/stream")
+async def stream_neo4j_query_api(query: Neo4jQuery):
+    """Streams query results as NDJSON, one record per line, serialized as they arrive."""
+    async def ndjson_lines():
+        try:
+            async for record in neo4j_memory.stream(query.query, query.parameters, query.limit):
+                yield json.dumps(record) + "\n"
+        except Exception as e:
+            # The status line has already been sent, so report the failure in-band.
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+@app.post("/tools/neo4j_memory/context", response_model=FileContext)
+async def file_context_api(request: FileContextRequest):
+    """Related tasks, recent commits and co-changed files for the given file paths."""
+    try:
+        return await neo4j_memory.file_context(request.paths, request.limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/tools/neo4j_memory/compact")
+async def compact_neo4j_memory_api():
+    """Runs a memory graph compaction pass now and returns what each step did."""
+    try:
+        return await compaction_job.run()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Compaction failed: {e}")
 
 # --- Loom Helper Endpoints ---
 @app.post("/tools/loom_helper/generate_demo_checklist")
@@ -0,0 +1,227 @@
+import os
+import time
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# With several server workers, run.sh points PROMETHEUS_MULTIPROC_DIR at a directory where
+# each process writes its samples, and /metrics aggregates them. Gauges declare how their
+# per-process values combine (multiprocess_mode, ignored in a single process).
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+# --- HTTP ---
+HTTP_REQUESTS_TOTAL = Counter(
+    "mcp_http_requests_total",
+    "HTTP requests handled, by route template and status code.",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_DURATION_SECONDS = Histogram(
+    "mcp_http_request_duration_seconds",
+    "HTTP request latency, by route template.",
+    ["method", "route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "mcp_http_requests_in_flight",
+    "HTTP requests currently being handled.",
+    multiprocess_mode="livesum",
+)
+
+# --- Tools ---
+NEO4J_TRANSACTION_SECONDS = Histogram(
+    "mcp_neo4j_transaction_seconds",
+    "Time spent in Neo4j transactions, by tool operation.",
+    ["operation"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+NEO4J_SESSIONS_IN_USE = Gauge(
+    "mcp_neo4j_sessions_in_use",
+    "Neo4j sessions currently open, each holding a pooled connection while it runs.",
+    ["driver"],
+    multiprocess_mode="livesum",
+)
+NEO4J_POOL_MAX_SIZE = Gauge(
+    "mcp_neo4j_pool_max_size",
+    "Configured maximum size of the Neo4j connection pool.",
+    ["driver"],
+    multiprocess_mode="livesum",
+)
+NEO4J_WRITE_BUFFER_PENDING = Gauge(
+    "mcp_neo4j_write_buffer_pending",
+    "Writes accepted by the Neo4j write-behind buffer and not yet flushed.",
+    multiprocess_mode="livesum",
+)
+NEO4J_WRITE_BUFFER_OLDEST_AGE_SECONDS = Gauge(
+    "mcp_neo4j_write_buffer_oldest_age_seconds",
+    "Age of the oldest unflushed write, i.e. how far Neo4j lags behind accepted writes.",
+    multiprocess_mode="livemax",
+)
+NEO4J_WRITE_BUFFER_COALESCED_TOTAL = Counter(
+    "mcp_neo4j_write_buffer_coalesced_total",
+    "Writes merged into an already pending write for the same key.",
+)
+NEO4J_WRITE_BUFFER_FLUSHED_TOTAL = Counter(
+    "mcp_neo4j_write_buffer_flushed_total",
+    "Writes flushed to Neo4j by the write-behind buffer.",
+)
+NEO4J_WRITE_BUFFER_FLUSH_FAILURES_TOTAL = Counter(
+    "mcp_neo4j_write_buffer_flush_failures_total",
+    "Batches that failed to flush and were put back in the buffer.",
+)
+NEO4J_WRITE_BUFFER_FLUSH_SECONDS = Histogram(
+    "mcp_neo4j_write_buffer_flush_seconds",
+    "Time to write one batch from the write-behind buffer.",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+NEO4J_QUERY_CACHE_REQUESTS_TOTAL = Counter(
+    "mcp_neo4j_query_cache_requests_total",
+    "Read query cache lookups, by result (hit or miss).",
+    ["driver", "result"],
+)
+NEO4J_QUERY_CACHE_EVICTIONS_TOTAL = Counter(
+    "mcp_neo4j_query_cache_evictions_total",
+    "Entries dropped from the read query cache, by reason (expired, lru or invalidated).",
+    ["driver", "reason"],
+)
+NEO4J_QUERY_CACHE_ENTRIES = Gauge(
+    "mcp_neo4j_query_cache_entries",
+    "Entries currently held in the read query cache.",
+    ["driver"],
+    multiprocess_mode="livesum",
+)
+NEO4J_COMPACTION_SECONDS = Histogram(
+    "mcp_neo4j_compaction_seconds",
+    "Duration of memory graph compaction runs.",
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600),
+)
+NEO4J_COMPACTION_NODES_TOTAL = Counter(
+    "mcp_neo4j_compaction_nodes_total",
+    "Nodes merged, deleted or updated by memory graph compaction, by step.",
+    ["step"],
+)
+FILE_BYTES_READ_TOTAL = Counter(
+    "mcp_file_bytes_read_total",
+    "Bytes read from the workspace by file tools, as UTF-8 text.",
+    ["tool"],
+)
+FILE_BYTES_WRITTEN_TOTAL = Counter(
+    "mcp_file_bytes_written_total",
+    "Bytes written to the workspace by file tools, as UTF-8 text.",
+    ["tool"],
+)
+FILES_LISTED_TOTAL = Counter(
+    "mcp_files_listed_total",
+    "Files returned by directory listings.",
+)
+TOOL_IO_IN_PROGRESS = Gauge(
+    "mcp_tool_io_in_progress",
+    "Blocking file tool calls running on the I/O thread pool, by tool.",
+    ["tool"],
+    multiprocess_mode="livesum",
+)
+TOOL_IO_WAIT_SECONDS = Histogram(
+    "mcp_tool_io_wait_seconds",
+    "Time file tool calls waited for a free slot under the tool's concurrency limit.",
+    ["tool"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30),
+)
+WEBHOOK_DELIVERIES_TOTAL = Counter(
+    "mcp_webhook_deliveries_total",
+    "GitHub webhook deliveries, by event and outcome (accepted, duplicate, ignored, rejected, invalid or failed).",
+    ["event", "outcome"],
+)
+TASK_STORE_SIZE = Gauge(
+    "mcp_task_store_size",
+    "Number of tasks in the task store.",
+    multiprocess_mode="livemax",
+)
+ORCHESTRATOR_QUEUE_DEPTH = Gauge(
+    "mcp_orchestrator_queue_depth",
+    "Orchestrator runs waiting for a free worker.",
+    multiprocess_mode="livemax",
+)
+ORCHESTRATOR_RUNS_ACTIVE = Gauge(
+    "mcp_orchestrator_runs_active",
+    "Orchestrator runs currently executing.",
+    multiprocess_mode="livesum",
+)
+
+
+# Gauges whose value is read from a callback. Gauge.set_function does not work across
+# processes, so in multiprocess mode the callbacks are sampled into the gauge instead.
+_gauge_functions = []
+
+
+def set_gauge_function(gauge, fn) -> None:
+    """Like gauge.set_function(fn), also in multiprocess mode. gauge may be a labelled child."""
+    if MULTIPROCESS:
+        _gauge_functions.append((gauge, fn))
+    else:
+        gauge.set_function(fn)
+
+
+def sample_gauge_functions() -> None:
+    """Writes the current value of every callback gauge of this process (multiprocess mode only)."""
+    for gauge, fn in _gauge_functions:
+        try:
+            gauge.set(fn())
+        except Exception as e:
+            print(f"Could not sample gauge: {e}")
+
+
+def render_metrics() -> bytes:
+    """The /metrics payload: this process's registry, or every worker's samples in multiprocess mode."""
+    if not MULTIPROCESS:
+        return generate_latest()
+    sample_gauge_functions()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
+def mark_process_dead() -> None:
+    """Drops this process's live gauges from the aggregate when it shuts down."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request counts, latency and in-flight requests.
+    Requests are labelled with the matched route template (e.g. /tasks/{task_id}),
+    so path parameters do not create new label values.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            HTTP_REQUESTS_TOTAL.labels(scope["method"], route_path, str(status_code)).inc()
+            HTTP_REQUEST_DURATION_SECONDS.labels(scope["method"], route_path).observe(duration)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 class Task(BaseModel):
     id: int
@@ -39,9 +39,79 @@ class Neo4jRelationship(BaseModel):
     end_node_properties: dict
     relationship_type: str
 
+class Neo4jWriteBatch(BaseModel):
+    nodes: List[Neo4jNode] = []
+    relationships: List[Neo4jRelationship] = []
+
 class Neo4jQuery(BaseModel):
     query: str
+    parameters: Dict[str, Any] = {}
+    limit: Optional[int] = None
+    cursor: Optional[str] = None
+
+class FileContextRequest(BaseModel):
+    paths: List[str]
+    limit: int = 10
+
+class RelatedTask(BaseModel):
+    id: int
+    description: Optional[str] = None
+    status: Optional[str] = None
+    files: List[str] = []
+
+class CommitSummary(BaseModel):
+    sha: str
+    repo_url: Optional[str] = None
+    event_type: Optional[str] = None
+    task_id: Optional[int] = None
+
+class CoChangedFile(BaseModel):
+    path: str
+    co_changes: int
+
+class FileContext(BaseModel):
+    related_tasks: List[RelatedTask] = []
+    recent_commits: Dict[str, List[CommitSummary]] = {}
+    co_changed_files: Dict[str, List[CoChangedFile]] = {}
 
 class LoomChecklistRequest(BaseModel):
     task_description: str
     code_changes: List[str]
+
+class SymbolIndexRequest(BaseModel):
+    repo: str
+    root_dir: str
+    changed_files: Optional[List[str]] = None
+    removed_files: List[str] = []
+
+class SymbolIndexStats(BaseModel):
+    indexed: int
+    unchanged: int
+    removed: int
+
+class SymbolDefinition(BaseModel):
+    repo: str
+    path: str
+    name: str
+    qualname: str
+    kind: str
+    line: int
+    end_line: Optional[int] = None
+    signature: Optional[str] = None
+
+class SymbolCall(BaseModel):
+    repo: str
+    path: str
+    caller: str
+    expression: str
+    line: int
+
+class FileSymbolsRequest(BaseModel):
+    repo: str
+    paths: List[str]
+
+class FileSymbol(BaseModel):
+    qualname: str
+    kind: str
+    line: int
+    signature: Optional[str] = None
@@ -0,0 +1,89 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+# State shared by every worker process of the server: tasks, the orchestrator job queue,
+# query cache versions and leases for jobs that only one worker should run.
+STATE_DB_PATH = os.getenv("MCP_STATE_DB", "mcp_state.sqlite")
+
+LEASES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires_at REAL NOT NULL
+)
+"""
+
+
+def worker_count() -> int:
+    """The number of server processes, set by run.sh from MCP_WORKERS."""
+    return int(os.getenv("MCP_WORKERS", "1"))
+
+
+def worker_id() -> str:
+    """Identifies this server process across the workers sharing the state database."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def pid_alive(pid: int) -> bool:
+    """Whether a process with this ID is running on this host."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def worker_alive(worker: str) -> bool:
+    """Whether the worker_id() of another process still runs. Workers on other hosts are assumed alive."""
+    host, _, pid = worker.rpartition(":")
+    if host != socket.gethostname():
+        return True
+    return pid_alive(int(pid))
+
+
+def connect_state_db(path: str = None) -> sqlite3.Connection:
+    """
+    Opens the shared state database in autocommit mode. WAL lets readers in one process
+    run while another writes, and the busy timeout makes concurrent writers wait for
+    each other instead of failing.
+    """
+    path = path or STATE_DB_PATH
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+    if path != ":memory:":
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class Leases:
+    """
+    Named, expiring leases in the shared state database, so periodic jobs such as memory
+    graph compaction run in one worker at a time rather than in every worker.
+    """
+
+    def __init__(self, path: str = None):
+        self._conn = connect_state_db(path)
+        self._lock = threading.Lock()
+        self._conn.execute(LEASES_SCHEMA)
+
+    def acquire(self, name: str, ttl: float) -> bool:
+        """Takes or renews the lease for ttl seconds. Returns False while another worker holds it."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at
+                WHERE leases.expires_at < ? OR leases.holder = excluded.holder
+                """,
+                (name, worker_id(), now + ttl, now),
+            )
+            return cursor.rowcount > 0
+
+    def close(self) -> None:
+        self._conn.close()
@@ -1,4 +1,5 @@
 import os
+from mcp_server.metrics import FILE_BYTES_READ_TOTAL, FILE_BYTES_WRITTEN_TOTAL
 
 class CodeGenerationTool:
     """
@@ -13,6 +14,7 @@ class CodeGenerationTool:
             os.makedirs(os.path.dirname(file_path), exist_ok=True)
             with open(file_path, "w") as f:
                 f.write(content)
+            FILE_BYTES_WRITTEN_TOTAL.labels("generate_code").inc(len(content.encode("utf-8")))
             return f"Successfully wrote to {file_path}"
         except Exception as e:
             return f"Error writing to file: {e}"
@@ -26,9 +28,11 @@ class CodeGenerationTool:
             try:
                 with open(file_path, "r") as f:
                     content = f.read()
+                FILE_BYTES_READ_TOTAL.labels("generate_code").inc(len(content.encode("utf-8")))
                 content = content.replace(old_content, new_content)
                 with open(file_path, "w") as f:
                     f.write(content)
+                FILE_BYTES_WRITTEN_TOTAL.labels("generate_code").inc(len(content.encode("utf-8")))
                 return f"Successfully updated {file_path}"
             except FileNotFoundError:
                 return f"Error: {file_path} not found."
@@ -38,6 +42,7 @@ class CodeGenerationTool:
             try:
                 with open(file_path, "a") as f:
                     f.write(new_content)
+                FILE_BYTES_WRITTEN_TOTAL.labels("generate_code").inc(len(new_content.encode("utf-8")))
                 return f"Successfully appended to {file_path}"
             except Exception as e:
                 return f"Error appending to file: {e}"
@@ -0,0 +1,88 @@
+import os
+from abc import ABC, abstractmethod
+
+from mcp_server.models import FileContext
+
+
+class MemoryGraphBackend(ABC):
+    """
+    The memory graph operations the MCP server and its background jobs use. Nodes are
+    MERGEd on the keys in UNIQUE_PROPERTY_KEYS they carry (CREATEd if they carry none),
+    and relationships MERGE their end nodes the same way.
+
+    Backends are selected with MEMORY_BACKEND: "neo4j" (default) or "sqlite".
+    """
+
+    # --- Writes ---
+    @abstractmethod
+    async def add_node(self, label: str, properties: dict) -> str:
+        """Adds or updates a node."""
+
+    @abstractmethod
+    async def add_relationship(self, start_node_label: str, start_node_properties: dict,
+                               end_node_label: str, end_node_properties: dict,
+                               relationship_type: str) -> str:
+        """Adds a relationship between two nodes, creating the nodes if needed."""
+
+    @abstractmethod
+    async def write_batch(self, nodes: list, relationships: list) -> int:
+        """
+        Applies many writes in one transaction. nodes is a list of (label, properties),
+        relationships a list of (start_label, start_properties, end_label, end_properties, type).
+        """
+
+    # --- Reads ---
+    @abstractmethod
+    async def query(self, query: str, parameters: dict = None, limit: int = None, cursor: str = None) -> dict:
+        """Runs a read-only Cypher query, returning {"records": [...], "next_cursor": ...}."""
+
+    @abstractmethod
+    def stream(self, query: str, parameters: dict = None, limit: int = None):
+        """Runs a read-only Cypher query, yielding serialized records (an async generator)."""
+
+    @abstractmethod
+    async def related_tasks(self, paths: list, limit: int = 10) -> list:
+        """Tasks that affected any of the given files, those touching the most files first."""
+
+    @abstractmethod
+    async def recent_commits(self, paths: list, limit: int = 10) -> dict:
+        """The most recent commits that touched each of the given files, by path."""
+
+    @abstractmethod
+    async def co_changed_files(self, paths: list, limit: int = 10) -> dict:
+        """Files most often changed together with each of the given files, by path."""
+
+    async def file_context(self, paths: list, limit: int = 10) -> FileContext:
+        """Related tasks, recent commits and co-changed files for a set of files."""
+        return FileContext(
+            related_tasks=await self.related_tasks(paths, limit),
+            recent_commits=await self.recent_commits(paths, limit),
+            co_changed_files=await self.co_changed_files(paths, limit),
+        )
+
+    # --- Maintenance ---
+    @abstractmethod
+    async def compact(self, now: int, cutoff: int, batch_size: int) -> dict:
+        """
+        Runs one compaction pass (see MemoryCompactionJob), deleting tasks last updated
+        before cutoff. Returns the number of nodes handled by each step.
+        """
+
+    async def ensure_indexes(self) -> None:
+        """Creates the indexes MERGE keys and context lookups rely on, if the backend needs any."""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Releases connections and files."""
+
+
+def create_memory_backend() -> MemoryGraphBackend:
+    """Builds the memory graph backend configured by MEMORY_BACKEND."""
+    backend = os.getenv("MEMORY_BACKEND", "neo4j").lower()
+    if backend == "neo4j":
+        from mcp_server.tools.neo4j_memory import AsyncNeo4jMemoryTool
+        return AsyncNeo4jMemoryTool()
+    if backend == "sqlite":
+        from mcp_server.tools.sqlite_memory import SqliteMemoryGraph
+        return SqliteMemoryGraph(os.getenv("MEMORY_SQLITE_PATH", "memory_graph.sqlite"))
+    raise ValueError(f"Unknown MEMORY_BACKEND '{backend}'. Use 'neo4j' or 'sqlite'.")
@@ -0,0 +1,68 @@
+import asyncio
+import os
+import time
+
+from mcp_server.metrics import NEO4J_COMPACTION_SECONDS
+
+
+class MemoryCompactionJob:
+    """
+    Keeps the memory graph bounded by running the backend's compact() periodically. Each pass:
+
+    1. gives tasks stored before retention existed an updated_at of now,
+    2. merges duplicate GeneratedFile and DocumentationOutput nodes,
+    3. deletes tasks not updated for retention_days, rolling their counts into File stats,
+    4. deletes Commit, File, GeneratedFile, DocumentationOutput and Repository nodes left
+       without relationships,
+    5. refreshes per-file task_count and last_changed_at.
+
+    Every step runs in transactions of at most batch_size nodes, so a pass never holds
+    large locks or builds one huge transaction.
+
+    With leases (see state_db.Leases), periodic passes run in one server worker per
+    interval instead of in every worker.
+    """
+
+    def __init__(self, memory_tool, retention_days: float = None, batch_size: int = None, interval: float = None,
+                 leases=None):
+        self.memory_tool = memory_tool
+        self.leases = leases
+        self.retention_days = retention_days if retention_days is not None else float(os.getenv("NEO4J_TASK_RETENTION_DAYS", "90"))
+        self.batch_size = batch_size or int(os.getenv("NEO4J_COMPACTION_BATCH_SIZE", "1000"))
+        self.interval = interval if interval is not None else float(os.getenv("NEO4J_COMPACTION_INTERVAL", "3600"))
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    # --- Lifecycle ---
+    def start(self) -> None:
+        """Starts running compaction every interval seconds. An interval of 0 disables it."""
+        if self.interval > 0:
+            self._task = asyncio.create_task(self._run_periodically())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            if self.leases and not await asyncio.to_thread(self.leases.acquire, "memory_compaction", self.interval):
+                continue
+            try:
+                counts = await self.run()
+                print(f"Memory graph compaction finished: {counts}")
+            except Exception as e:
+                print(f"Memory graph compaction failed: {e}")
+
+    # --- Compaction ---
+    async def run(self) -> dict:
+        """Runs one compaction pass and returns the number of nodes handled by each step."""
+        async with self._lock:
+            with NEO4J_COMPACTION_SECONDS.time():
+                now = int(time.time())
+                cutoff = now - int(self.retention_days * 86400) if self.retention_days > 0 else None
+                return await self.memory_tool.compact(now, cutoff, self.batch_size)
@@ -0,0 +1,126 @@
+from mcp_server.metrics import NEO4J_COMPACTION_NODES_TOTAL
+
+# Tasks written before updated_at existed start aging from the first compaction.
+BACKFILL_TASK_UPDATED_AT = """
+MATCH (t:Task) WHERE t.updated_at IS NULL
+WITH t LIMIT $batch_size
+SET t.updated_at = $now
+RETURN count(t) AS count
+"""
+
+# Duplicates of a node share its key. The first node is kept, the others' incoming
+# relationships are moved to it and they are deleted.
+MERGE_DUPLICATE_GENERATED_FILES = """
+MATCH (n:GeneratedFile) WHERE n.path IS NOT NULL
+WITH n.path AS key, collect(n) AS nodes
+WHERE size(nodes) > 1
+WITH head(nodes) AS keep, tail(nodes) AS duplicates
+LIMIT $batch_size
+UNWIND duplicates AS duplicate
+CALL {
+    WITH keep, duplicate
+    MATCH (t:Task)-[:GENERATED_CODE]->(duplicate)
+    MERGE (t)-[:GENERATED_CODE]->(keep)
+}
+DETACH DELETE duplicate
+RETURN count(*) AS count
+"""
+
+# DocumentationOutput nodes used to be created without a key, one per store. They are
+# merged per task into the node with the id store_context_node now merges on.
+MERGE_DUPLICATE_DOCUMENTATION_OUTPUTS = """
+MATCH (n:DocumentationOutput) WHERE n.task_id IS NOT NULL AND n.id IS NULL
+WITH n.task_id AS task_id, collect(n) AS nodes
+LIMIT $batch_size
+OPTIONAL MATCH (existing:DocumentationOutput {id: 'task-' + toString(task_id)})
+WITH task_id, nodes, coalesce(head(collect(existing)), head(nodes)) AS target
+SET target.id = 'task-' + toString(task_id)
+WITH task_id, target, [n IN nodes WHERE n <> target] AS duplicates
+CALL {
+    WITH target, duplicates
+    UNWIND duplicates AS duplicate
+    CALL {
+        WITH target, duplicate
+        MATCH (t:Task)-[:GENERATED_DOCS]->(duplicate)
+        MERGE (t)-[:GENERATED_DOCS]->(target)
+    }
+    DETACH DELETE duplicate
+}
+RETURN count(task_id) AS count
+"""
+
+# Before a task is deleted its contribution is folded into the rolled-up stats of the
+# files it affected, so file history survives the task.
+AGE_OUT_TASKS = """
+MATCH (t:Task) WHERE t.updated_at < $cutoff
+WITH t LIMIT $batch_size
+OPTIONAL MATCH (t)-[:AFFECTS_FILE]->(f:File)
+WITH t, collect(f) AS files
+FOREACH (f IN files |
+    SET f.archived_task_count = coalesce(f.archived_task_count, 0) + 1,
+        f.last_changed_at = CASE WHEN coalesce(f.last_changed_at, 0) < t.updated_at THEN t.updated_at ELSE f.last_changed_at END
+)
+DETACH DELETE t
+RETURN count(t) AS count
+"""
+
+# Files keep their rolled-up stats, so only files without any are removed as orphans.
+DELETE_ORPHANS = {
+    label: f"""
+MATCH (n:{label}) WHERE NOT (n)--(){" AND n.archived_task_count IS NULL" if label == "File" else ""}
+WITH n LIMIT $batch_size
+DELETE n
+RETURN count(n) AS count
+"""
+    for label in ("Commit", "File", "GeneratedFile", "DocumentationOutput", "Repository")
+}
+
+ROLL_UP_FILE_STATS = """
+MATCH (f:File) WHERE f.stats_updated_at IS NULL OR f.stats_updated_at < $now
+WITH f LIMIT $batch_size
+OPTIONAL MATCH (f)<-[:AFFECTS_FILE]-(t:Task)
+WITH f, count(t) AS live_tasks, max(t.updated_at) AS last_live_change
+SET f.task_count = coalesce(f.archived_task_count, 0) + live_tasks,
+    f.last_changed_at = CASE WHEN last_live_change IS NOT NULL AND coalesce(f.last_changed_at, 0) < last_live_change
+                             THEN last_live_change ELSE f.last_changed_at END,
+    f.stats_updated_at = $now
+RETURN count(f) AS count
+"""
+
+
+async def compact_neo4j(memory_tool, now: int, cutoff: int, batch_size: int) -> dict:
+    """
+    Runs the compaction steps against Neo4j through memory_tool.run_write. Each step is a
+    batched statement repeated until it handles no nodes, so every transaction touches at
+    most batch_size nodes. A cutoff of None keeps all tasks.
+    """
+    counts = {
+        "backfilled_tasks": await _repeat(memory_tool, batch_size, "backfill", BACKFILL_TASK_UPDATED_AT, {"now": now}, ["Task"]),
+        "merged_generated_files": await _repeat(
+            memory_tool, batch_size, "merge_generated_files", MERGE_DUPLICATE_GENERATED_FILES, {}, ["GeneratedFile"]),
+        "merged_documentation_outputs": await _repeat(
+            memory_tool, batch_size, "merge_documentation_outputs", MERGE_DUPLICATE_DOCUMENTATION_OUTPUTS, {}, ["DocumentationOutput"]),
+        "aged_out_tasks": 0,
+        "deleted_orphans": 0,
+    }
+    if cutoff is not None:
+        counts["aged_out_tasks"] = await _repeat(
+            memory_tool, batch_size, "age_out_tasks", AGE_OUT_TASKS, {"cutoff": cutoff}, ["Task", "File"])
+    for label, statement in DELETE_ORPHANS.items():
+        counts["deleted_orphans"] += await _repeat(memory_tool, batch_size, "delete_orphans", statement, {}, [label])
+    counts["rolled_up_files"] = await _repeat(
+        memory_tool, batch_size, "roll_up_file_stats", ROLL_UP_FILE_STATS, {"now": now}, ["File"])
+    return counts
+
+
+async def _repeat(memory_tool, batch_size: int, step: str, statement: str, parameters: dict, labels: list) -> int:
+    """Runs a batched statement until a batch handles no nodes. Returns the total handled."""
+    total = 0
+    while True:
+        records = await memory_tool.run_write(
+            statement, {**parameters, "batch_size": batch_size}, labels, operation=f"compaction_{step}")
+        count = records[0]["count"] if records else 0
+        if not count:
+            return total
+        NEO4J_COMPACTION_NODES_TOTAL.labels(step).inc(count)
+        total += count
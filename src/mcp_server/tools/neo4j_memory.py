@@ -1,81 +1,540 @@
-from neo4j import GraphDatabase
+from neo4j import AsyncGraphDatabase, READ_ACCESS, WRITE_ACCESS
+from neo4j.graph import Node, Relationship, Path
+from contextlib import asynccontextmanager
+from functools import lru_cache
+import asyncio
+import base64
+import hashlib
+import json
 import os
+import re
 from dotenv import load_dotenv
+from mcp_server.metrics import NEO4J_TRANSACTION_SECONDS, NEO4J_SESSIONS_IN_USE, NEO4J_POOL_MAX_SIZE
+from mcp_server.tools.neo4j_query_cache import QueryCache, query_labels
+from mcp_server.models import RelatedTask, CommitSummary, CoChangedFile, FileContext
+from mcp_server.tools.memory_backend import MemoryGraphBackend
+from mcp_server.tools.neo4j_compaction import compact_neo4j
 
 load_dotenv() # Load environment variables from .env file
 
-class Neo4jMemoryTool:
+UNIQUE_PROPERTY_KEYS = ["id", "name", "path", "url", "sha"]
+
+# Labels and relationship types are interpolated into Cypher text, so only known
+# identifiers are accepted. Deployments can extend the lists with comma-separated env vars.
+ALLOWED_LABELS = {"Task", "Repository", "Commit", "File", "GeneratedFile", "DocumentationOutput"}
+ALLOWED_RELATIONSHIP_TYPES = {"RELATED_TO_REPO", "TRIGGERED_BY_COMMIT", "AFFECTS_FILE", "GENERATED_CODE", "GENERATED_DOCS"}
+ALLOWED_LABELS.update(filter(None, os.getenv("NEO4J_EXTRA_LABELS", "").split(",")))
+ALLOWED_RELATIONSHIP_TYPES.update(filter(None, os.getenv("NEO4J_EXTRA_RELATIONSHIP_TYPES", "").split(",")))
+
+_IDENTIFIER_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _connection_settings():
+    """
+    Returns the URI, auth and driver pool settings of the Neo4j driver, from the NEO4J_*
+    environment variables.
+    """
+    uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
+    user = os.getenv("NEO4J_USER", "neo4j")
+    password = os.getenv("NEO4J_PASSWORD", "password")
+    pool_config = {
+        "max_connection_pool_size": int(os.getenv("NEO4J_MAX_CONNECTION_POOL_SIZE", "50")),
+        "connection_acquisition_timeout": float(os.getenv("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", "30")),
+        "connection_timeout": float(os.getenv("NEO4J_CONNECTION_TIMEOUT", "15")),
+        "max_connection_lifetime": float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600")),
+    }
+    return uri, (user, password), pool_config
+
+
+def _session_kwargs():
+    # Naming the database avoids a home-database resolution round trip per session.
+    database = os.getenv("NEO4J_DATABASE", "neo4j")
+    return {"database": database} if database else {}
+
+
+def _validate_identifier(value: str, allowed: set, kind: str) -> None:
+    if value not in allowed or not _IDENTIFIER_PATTERN.match(value):
+        raise ValueError(f"{kind} '{value}' is not allowed. Allowed: {sorted(allowed)}")
+
+
+def _merge_keys(properties: dict) -> tuple:
+    """Returns the unique keys present in properties, in canonical order."""
+    return tuple(k for k in UNIQUE_PROPERTY_KEYS if k in properties)
+
+
+@lru_cache(maxsize=1024)
+def _node_template(label: str, merge_keys: tuple) -> str:
+    """
+    Builds the statement for one (label, merge keys) combination. The result is cached, so
+    each combination produces one stable query text and Neo4j compiles its plan once.
+    """
+    _validate_identifier(label, ALLOWED_LABELS, "Label")
+    if not merge_keys:
+        return f"CREATE (n:{label} $props) RETURN n"
+    merge_props_str = ", ".join([f'{k}: $props.{k}' for k in merge_keys])
+    return f"MERGE (n:{label} {{{merge_props_str}}}) ON CREATE SET n += $props ON MATCH SET n += $props RETURN n"
+
+
+@lru_cache(maxsize=1024)
+def _relationship_template(start_node_label: str, start_merge_keys: tuple,
+                           end_node_label: str, end_merge_keys: tuple,
+                           relationship_type: str) -> str:
+    """
+    Builds the statement for one (labels, merge keys, relationship type) combination. Cached like _node_template.
+    """
+    _validate_identifier(start_node_label, ALLOWED_LABELS, "Label")
+    _validate_identifier(end_node_label, ALLOWED_LABELS, "Label")
+    _validate_identifier(relationship_type, ALLOWED_RELATIONSHIP_TYPES, "Relationship type")
+    start_merge_props_str = ", ".join([f'{k}: $start_props.{k}' for k in start_merge_keys])
+    end_merge_props_str = ", ".join([f'{k}: $end_props.{k}' for k in end_merge_keys])
+    return (
+        f"MERGE (a:{start_node_label} {{{start_merge_props_str}}}) ON CREATE SET a += $start_props ON MATCH SET a += $start_props "
+        f"MERGE (b:{end_node_label} {{{end_merge_props_str}}}) ON CREATE SET b += $end_props ON MATCH SET b += $end_props "
+        f"MERGE (a)-[r:{relationship_type}]->(b) "
+        "RETURN type(r)"
+    )
+
+
+@lru_cache(maxsize=1024)
+def _node_batch_template(label: str, merge_keys: tuple) -> str:
+    """
+    UNWIND form of _node_template: one statement writes a whole batch of rows that share
+    a label and merge keys. Each row is the node's property map.
+    """
+    _validate_identifier(label, ALLOWED_LABELS, "Label")
+    if not merge_keys:
+        return f"UNWIND $rows AS row CREATE (n:{label}) SET n = row"
+    merge_props_str = ", ".join([f'{k}: row.{k}' for k in merge_keys])
+    return f"UNWIND $rows AS row MERGE (n:{label} {{{merge_props_str}}}) SET n += row"
+
+
+@lru_cache(maxsize=1024)
+def _relationship_batch_template(start_node_label: str, start_merge_keys: tuple,
+                                 end_node_label: str, end_merge_keys: tuple,
+                                 relationship_type: str) -> str:
+    """
+    UNWIND form of _relationship_template. Each row is {"start": {...}, "end": {...}}.
+    """
+    _validate_identifier(start_node_label, ALLOWED_LABELS, "Label")
+    _validate_identifier(end_node_label, ALLOWED_LABELS, "Label")
+    _validate_identifier(relationship_type, ALLOWED_RELATIONSHIP_TYPES, "Relationship type")
+    start_merge_props_str = ", ".join([f'{k}: row.start.{k}' for k in start_merge_keys])
+    end_merge_props_str = ", ".join([f'{k}: row.end.{k}' for k in end_merge_keys])
+    return (
+        f"UNWIND $rows AS row "
+        f"MERGE (a:{start_node_label} {{{start_merge_props_str}}}) SET a += row.start "
+        f"MERGE (b:{end_node_label} {{{end_merge_props_str}}}) SET b += row.end "
+        f"MERGE (a)-[r:{relationship_type}]->(b)"
+    )
+
+
+def _node_statement(label: str, properties: dict) -> str:
+    return _node_template(label, _merge_keys(properties))
+
+
+def _relationship_statement(start_node_label: str, start_node_properties: dict,
+                            end_node_label: str, end_node_properties: dict,
+                            relationship_type: str) -> str:
+    return _relationship_template(start_node_label, _merge_keys(start_node_properties),
+                                  end_node_label, _merge_keys(end_node_properties),
+                                  relationship_type)
+
+
+# Server-side bounds on read queries. Page sizes are clamped to QUERY_MAX_LIMIT;
+# streamed queries may return up to STREAM_MAX_LIMIT records.
+QUERY_DEFAULT_LIMIT = int(os.getenv("NEO4J_QUERY_DEFAULT_LIMIT", "100"))
+QUERY_MAX_LIMIT = int(os.getenv("NEO4J_QUERY_MAX_LIMIT", "1000"))
+STREAM_MAX_LIMIT = int(os.getenv("NEO4J_STREAM_MAX_LIMIT", "100000"))
+
+
+def _query_fingerprint(query: str, parameters: dict) -> str:
+    return hashlib.sha256(json.dumps([query, parameters], sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _encode_cursor(query: str, parameters: dict, offset: int) -> str:
+    raw = json.dumps({"offset": offset, "query": _query_fingerprint(query, parameters)})
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str, query: str, parameters: dict) -> int:
+    """Returns the offset stored in a cursor, checking that it belongs to this query."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        offset = int(data["offset"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor.")
+    if data.get("query") != _query_fingerprint(query, parameters) or offset < 0:
+        raise ValueError("Cursor does not belong to this query.")
+    return offset
+
+
+# String literals, escaped names and comments, blanked out before looking for clause keywords.
+_CYPHER_NOISE = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`|//[^\n]*|/\*.*?\*/", re.DOTALL)
+_CYPHER_TOKEN = re.compile(r"[A-Za-z_]+|[()\[\]{}]")
+
+
+def _bounded_statement(query: str):
     """
-    A tool for interacting with a Neo4j graph database to provide long-term memory.
+    The query with SKIP/LIMIT parameters appended, so the database applies them, when its
+    last clause is a RETURN projection without a SKIP or LIMIT of its own. Returns None for
+    other queries (no final RETURN, e.g. procedure calls without YIELD or SHOW commands, a
+    UNION, or their own SKIP/LIMIT): those are paged on the client instead.
+    """
+    statement = query.strip().rstrip(";").rstrip()
+    depth, returns, union, tail = 0, False, False, set()
+    for match in _CYPHER_TOKEN.finditer(_CYPHER_NOISE.sub(" ", statement)):
+        token = match.group().upper()
+        if token in "([{":
+            depth += 1
+        elif token in ")]}":
+            depth -= 1
+        elif depth == 0 and token == "RETURN":
+            returns, tail = True, set()
+        elif depth == 0:
+            union = union or token == "UNION"
+            tail.add(token)
+    if not returns or union or tail & {"SKIP", "OFFSET", "LIMIT", "MATCH", "WITH", "CALL", "SHOW", "USE"}:
+        return None
+    # On a new line, so a trailing // comment does not swallow it.
+    return f"{statement}\nSKIP $_mcp_skip LIMIT $_mcp_limit"
+
+
+def _page_parameters(query: str, parameters: dict, limit: int, cursor: str) -> tuple:
+    limit = max(1, min(limit or QUERY_DEFAULT_LIMIT, QUERY_MAX_LIMIT))
+    offset = _decode_cursor(cursor, query, parameters) if cursor else 0
+    # Fetch one extra record to learn whether there is a next page.
+    return limit, offset, {**parameters, "_mcp_skip": offset, "_mcp_limit": limit + 1}
+
+
+def _page(query: str, parameters: dict, records: list, limit: int, offset: int) -> dict:
+    next_cursor = _encode_cursor(query, parameters, offset + limit) if len(records) > limit else None
+    return {"records": records[:limit], "next_cursor": next_cursor}
+
+
+# Context retrieval. The statements are constants, so each is planned once, and every
+# traversal starts from an indexed File.path lookup, has a fixed depth and is capped.
+CONTEXT_MAX_LIMIT = int(os.getenv("NEO4J_CONTEXT_MAX_LIMIT", "50"))
+CONTEXT_MAX_PATHS = int(os.getenv("NEO4J_CONTEXT_MAX_PATHS", "100"))
+# Co-change counts only look at this many of the most recent tasks touching each file.
+CO_CHANGE_TASK_WINDOW = int(os.getenv("NEO4J_CO_CHANGE_TASK_WINDOW", "200"))
+CONTEXT_LABELS = frozenset(["Task", "File", "Commit"])
+
+INDEX_STATEMENTS = [
+    "CREATE INDEX task_id IF NOT EXISTS FOR (n:Task) ON (n.id)",
+    "CREATE INDEX file_path IF NOT EXISTS FOR (n:File) ON (n.path)",
+    "CREATE INDEX commit_sha IF NOT EXISTS FOR (n:Commit) ON (n.sha)",
+    "CREATE INDEX repository_url IF NOT EXISTS FOR (n:Repository) ON (n.url)",
+    "CREATE INDEX generated_file_path IF NOT EXISTS FOR (n:GeneratedFile) ON (n.path)",
+]
+
+RELATED_TASKS_QUERY = """
+UNWIND $paths AS file_path
+MATCH (f:File {path: file_path})<-[:AFFECTS_FILE]-(t:Task)
+WITH t, collect(DISTINCT f.path) AS files
+RETURN t.id AS id, t.description AS description, t.status AS status, files
+ORDER BY size(files) DESC, t.id DESC
+LIMIT $limit
+"""
+
+RECENT_COMMITS_QUERY = """
+UNWIND $paths AS file_path
+CALL {
+    WITH file_path
+    MATCH (:File {path: file_path})<-[:AFFECTS_FILE]-(t:Task)-[:TRIGGERED_BY_COMMIT]->(c:Commit)
+    WITH c, max(t.id) AS task_id
+    ORDER BY task_id DESC
+    LIMIT $limit
+    RETURN collect({sha: c.sha, repo_url: c.repo_url, event_type: c.event_type, task_id: task_id}) AS commits
+}
+RETURN file_path AS path, commits
+"""
+
+CO_CHANGED_FILES_QUERY = """
+UNWIND $paths AS file_path
+CALL {
+    WITH file_path
+    MATCH (:File {path: file_path})<-[:AFFECTS_FILE]-(t:Task)
+    WITH file_path, t ORDER BY t.id DESC LIMIT $task_window
+    MATCH (t)-[:AFFECTS_FILE]->(other:File)
+    WHERE other.path <> file_path
+    WITH other.path AS other_path, count(DISTINCT t) AS co_changes
+    ORDER BY co_changes DESC, other_path
+    LIMIT $limit
+    RETURN collect({path: other_path, co_changes: co_changes}) AS files
+}
+RETURN file_path AS path, files
+"""
+
+
+def _context_parameters(paths: list, limit: int) -> dict:
+    paths = list(dict.fromkeys(p for p in paths if p))
+    if not paths:
+        raise ValueError("At least one file path is required.")
+    if len(paths) > CONTEXT_MAX_PATHS:
+        raise ValueError(f"At most {CONTEXT_MAX_PATHS} file paths can be looked up at once.")
+    return {"paths": paths, "limit": max(1, min(limit or 10, CONTEXT_MAX_LIMIT)), "task_window": CO_CHANGE_TASK_WINDOW}
+
+
+def _related_tasks(records: list) -> list:
+    return [RelatedTask(**record) for record in records]
+
+
+def _recent_commits(records: list) -> dict:
+    return {record["path"]: [CommitSummary(**commit) for commit in record["commits"]] for record in records}
+
+
+def _co_changed_files(records: list) -> dict:
+    return {record["path"]: [CoChangedFile(**f) for f in record["files"]] for record in records}
+
+
+def serialize_value(value):
+    """Converts Neo4j values (nodes, relationships, paths, temporal types) to JSON-friendly data."""
+    if isinstance(value, Node):
+        return {"element_id": value.element_id, "labels": sorted(value.labels), "properties": {k: serialize_value(v) for k, v in value.items()}}
+    if isinstance(value, Relationship):
+        return {
+            "element_id": value.element_id,
+            "type": value.type,
+            "start": value.start_node.element_id if value.start_node else None,
+            "end": value.end_node.element_id if value.end_node else None,
+            "properties": {k: serialize_value(v) for k, v in value.items()},
+        }
+    if isinstance(value, Path):
+        return {"nodes": [serialize_value(n) for n in value.nodes], "relationships": [serialize_value(r) for r in value.relationships]}
+    if isinstance(value, (list, tuple)):
+        return [serialize_value(v) for v in value]
+    if isinstance(value, dict):
+        return {k: serialize_value(v) for k, v in value.items()}
+    if hasattr(value, "iso_format"):
+        return value.iso_format()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def serialize_record(record) -> dict:
+    return {key: serialize_value(value) for key, value in record.items()}
+
+
+def statement_cache_info() -> dict:
+    """Returns hit/miss counts of the statement template caches."""
+    return {
+        "node": _node_template.cache_info()._asdict(),
+        "relationship": _relationship_template.cache_info()._asdict(),
+        "node_batch": _node_batch_template.cache_info()._asdict(),
+        "relationship_batch": _relationship_batch_template.cache_info()._asdict(),
+    }
+
+
+class AsyncNeo4jMemoryTool(MemoryGraphBackend):
+    """
+    A tool for interacting with a Neo4j graph database to provide long-term memory, built
+    on the neo4j async driver so endpoints wait on the database without holding a
+    threadpool worker. This is the "neo4j" memory backend.
     """
 
     def __init__(self):
-        uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
-        user = os.getenv("NEO4J_USER", "neo4j")
-        password = os.getenv("NEO4J_PASSWORD", "password")
-        self._driver = GraphDatabase.driver(uri, auth=(user, password))
+        uri, auth, pool_config = _connection_settings()
+        self._driver = AsyncGraphDatabase.driver(uri, auth=auth, **pool_config)
+        NEO4J_POOL_MAX_SIZE.labels("async").set(pool_config["max_connection_pool_size"])
+        self.query_cache = QueryCache("async")
 
-    def close(self):
-        self._driver.close()
+    async def close(self):
+        self.query_cache.close()
+        await self._driver.close()
 
-    def add_node(self, label: str, properties: dict) -> str:
+    @asynccontextmanager
+    async def _session(self, access_mode: str = WRITE_ACCESS):
+        async with self._driver.session(default_access_mode=access_mode, **_session_kwargs()) as session:
+            with NEO4J_SESSIONS_IN_USE.labels("async").track_inprogress():
+                yield session
+
+    async def add_node(self, label: str, properties: dict) -> str:
         """
         Adds a node to the graph.
         """
-        with self._driver.session() as session:
-            result = session.execute_write(self._create_node, label, properties)
-            return f"Created node: {result}"
+        statement = _node_statement(label, properties)
+        async with self._session() as session:
+            with NEO4J_TRANSACTION_SECONDS.labels("add_node").time():
+                result = await session.execute_write(self._create_node, statement, properties)
+        self.query_cache.invalidate([label])
+        return f"Created node: {result}"
 
-    def add_relationship(self, start_node_label: str, start_node_properties: dict,
-                         end_node_label: str, end_node_properties: dict,
-                         relationship_type: str) -> str:
+    async def add_relationship(self, start_node_label: str, start_node_properties: dict,
+                               end_node_label: str, end_node_properties: dict,
+                               relationship_type: str) -> str:
         """
         Adds a relationship between two nodes.
         """
-        with self._driver.session() as session:
-            result = session.execute_write(self._create_relationship, start_node_label, start_node_properties,
-                                               end_node_label, end_node_properties, relationship_type)
-            return f"Created relationship: {result}"
+        statement = _relationship_statement(start_node_label, start_node_properties,
+                                            end_node_label, end_node_properties, relationship_type)
+        async with self._session() as session:
+            with NEO4J_TRANSACTION_SECONDS.labels("add_relationship").time():
+                result = await session.execute_write(self._create_relationship, statement, start_node_properties, end_node_properties)
+        self.query_cache.invalidate([start_node_label, end_node_label])
+        return f"Created relationship: {result}"
+
+    async def query(self, query: str, parameters: dict = None, limit: int = None, cursor: str = None) -> dict:
+        """
+        Executes a read-only Cypher query and returns one page of results as
+        {"records": [...], "next_cursor": ...}. Pass next_cursor back to get the next page.
+        Pages are served from query_cache until they expire or a write touches their labels.
+        """
+        parameters = parameters or {}
+        limit, offset, page_parameters = _page_parameters(query, parameters, limit, cursor)
+        cache_key = QueryCache.key(query, parameters, limit, offset)
+        cached = self.query_cache.get(cache_key) if self.query_cache.enabled else None
+        if cached is not None:
+            return cached
+        labels = query_labels(query, ALLOWED_LABELS)
+        versions = self.query_cache.label_versions(labels)
+        statement = _bounded_statement(query)
+        async with self._session(READ_ACCESS) as session:
+            with NEO4J_TRANSACTION_SECONDS.labels("query").time():
+                if statement:
+                    records = await session.execute_read(self._execute_query, statement, page_parameters)
+                else:
+                    records = await session.execute_read(self._execute_slice, query, parameters, offset, limit + 1)
+        page = _page(query, parameters, records, limit, offset)
+        if self.query_cache.enabled:
+            self.query_cache.set(cache_key, labels, page, versions)
+        return page
+
+    async def stream(self, query: str, parameters: dict = None, limit: int = None):
+        """
+        Executes a read-only Cypher query and yields serialized records as the server sends
+        them, without holding the whole result in memory. At most STREAM_MAX_LIMIT records.
+        """
+        limit = max(1, min(limit or STREAM_MAX_LIMIT, STREAM_MAX_LIMIT))
+        statement = _bounded_statement(query)
+        async with self._session(READ_ACCESS) as session:
+            with NEO4J_TRANSACTION_SECONDS.labels("stream").time():
+                if statement:
+                    result = await session.run(statement, {**(parameters or {}), "_mcp_skip": 0, "_mcp_limit": limit})
+                else:
+                    result = await session.run(query, parameters or {})
+                count = 0
+                async for record in result:
+                    if count == limit:
+                        break
+                    count += 1
+                    yield serialize_record(record)
+
+    async def write_batch(self, nodes: list, relationships: list) -> int:
+        """
+        Writes many nodes and relationships in a single transaction, one UNWIND statement per
+        (label, merge keys, relationship type) group. nodes is a list of (label, properties),
+        relationships a list of (start_label, start_properties, end_label, end_properties, type).
+        Returns the number of writes applied.
+        """
+        groups = {}
+        labels = set()
+        for label, properties in nodes:
+            labels.add(label)
+            statement = _node_batch_template(label, _merge_keys(properties))
+            groups.setdefault(statement, []).append(properties)
+        # Nodes first, so relationship MERGEs find them with their full property sets.
+        for start_label, start_properties, end_label, end_properties, relationship_type in relationships:
+            statement = _relationship_batch_template(start_label, _merge_keys(start_properties),
+                                                     end_label, _merge_keys(end_properties),
+                                                     relationship_type)
+            labels.update((start_label, end_label))
+            groups.setdefault(statement, []).append({"start": start_properties, "end": end_properties})
+        if not groups:
+            return 0
+        async with self._session() as session:
+            with NEO4J_TRANSACTION_SECONDS.labels("write_batch").time():
+                await session.execute_write(self._write_groups, list(groups.items()))
+        self.query_cache.invalidate(labels)
+        return len(nodes) + len(relationships)
 
-    def query(self, query: str) -> list:
+    async def run_write(self, statement: str, parameters: dict, labels, operation: str = "write") -> list:
         """
-        Executes a Cypher query and returns the results.
+        Runs a write statement built by the server itself (not user input) in its own
+        transaction and drops cached reads of the given labels. Returns the serialized records.
         """
-        with self._driver.session() as session:
-            result = session.execute_read(self._execute_query, query)
-            return result
+        async with self._session() as session:
+            with NEO4J_TRANSACTION_SECONDS.labels(operation).time():
+                records = await session.execute_write(self._execute_query, statement, parameters)
+        self.query_cache.invalidate(labels)
+        return records
+
+    async def compact(self, now: int, cutoff: int, batch_size: int) -> dict:
+        return await compact_neo4j(self, now, cutoff, batch_size)
+
+    async def ensure_indexes(self) -> None:
+        """Creates the indexes that MERGE keys and context lookups rely on, if missing."""
+        async with self._session() as session:
+            for statement in INDEX_STATEMENTS:
+                result = await session.run(statement)
+                await result.consume()
+
+    async def related_tasks(self, paths: list, limit: int = 10) -> list:
+        """Tasks that affected any of the given files, those touching the most files first."""
+        return _related_tasks(await self._read_context(RELATED_TASKS_QUERY, _context_parameters(paths, limit)))
+
+    async def recent_commits(self, paths: list, limit: int = 10) -> dict:
+        """The most recent commits that touched each of the given files, by path."""
+        return _recent_commits(await self._read_context(RECENT_COMMITS_QUERY, _context_parameters(paths, limit)))
+
+    async def co_changed_files(self, paths: list, limit: int = 10) -> dict:
+        """Files most often changed together with each of the given files, by path."""
+        return _co_changed_files(await self._read_context(CO_CHANGED_FILES_QUERY, _context_parameters(paths, limit)))
+
+    async def file_context(self, paths: list, limit: int = 10) -> FileContext:
+        """Related tasks, recent commits and co-changed files for a set of files, read concurrently."""
+        related_tasks, recent_commits, co_changed_files = await asyncio.gather(
+            self.related_tasks(paths, limit),
+            self.recent_commits(paths, limit),
+            self.co_changed_files(paths, limit),
+        )
+        return FileContext(related_tasks=related_tasks, recent_commits=recent_commits, co_changed_files=co_changed_files)
+
+    async def _read_context(self, statement: str, parameters: dict) -> list:
+        cache_key = QueryCache.key(statement, parameters, None, 0)
+        cached = self.query_cache.get(cache_key) if self.query_cache.enabled else None
+        if cached is not None:
+            return cached
+        versions = self.query_cache.label_versions(CONTEXT_LABELS)
+        async with self._session(READ_ACCESS) as session:
+            with NEO4J_TRANSACTION_SECONDS.labels("context").time():
+                records = await session.execute_read(self._execute_query, statement, parameters)
+        if self.query_cache.enabled:
+            self.query_cache.set(cache_key, CONTEXT_LABELS, records, versions)
+        return records
 
     @staticmethod
-    def _create_node(tx, label, properties):
-        unique_properties = {k: v for k, v in properties.items() if k in ["id", "name", "path", "url", "sha"]}
-        if not unique_properties:
-             query = f"CREATE (n:{label} $props) RETURN n"
-             result = tx.run(query, props=properties)
-        else:
-            merge_props_str = ", ".join([f'{k}: $props.{k}' for k in unique_properties])
-            query = f"MERGE (n:{label} {{{merge_props_str}}}) ON CREATE SET n += $props ON MATCH SET n += $props RETURN n"
-            result = tx.run(query, props=properties)
-        return result.single()[0]
+    async def _write_groups(tx, groups):
+        for statement, rows in groups:
+            result = await tx.run(statement, rows=rows)
+            await result.consume()
 
     @staticmethod
-    def _create_relationship(tx, start_node_label, start_node_properties,
-                             end_node_label, end_node_properties, relationship_type):
-        start_unique_properties = {k: v for k, v in start_node_properties.items() if k in ["id", "name", "path", "url", "sha"]}
-        end_unique_properties = {k: v for k, v in end_node_properties.items() if k in ["id", "name", "path", "url", "sha"]}
-
-        start_merge_props_str = ", ".join([f'{k}: $start_props.{k}' for k in start_unique_properties])
-        end_merge_props_str = ", ".join([f'{k}: $end_props.{k}' for k in end_unique_properties])
-        
-        query = (
-            f"MERGE (a:{start_node_label} {{{start_merge_props_str}}}) ON CREATE SET a += $start_props ON MATCH SET a += $start_props "
-            f"MERGE (b:{end_node_label} {{{end_merge_props_str}}}) ON CREATE SET b += $end_props ON MATCH SET b += $end_props "
-            f"MERGE (a)-[r:{relationship_type}]->(b) "
-            "RETURN type(r)"
-        )
-        result = tx.run(query, start_props=start_node_properties, end_props=end_node_properties)
-        return result.single()[0]
+    async def _create_node(tx, statement, properties):
+        result = await tx.run(statement, props=properties)
+        record = await result.single()
+        return record[0]
+
+    @staticmethod
+    async def _create_relationship(tx, statement, start_node_properties, end_node_properties):
+        result = await tx.run(statement, start_props=start_node_properties, end_props=end_node_properties)
+        record = await result.single()
+        return record[0]
+
+    @staticmethod
+    async def _execute_query(tx, statement, parameters):
+        result = await tx.run(statement, parameters)
+        return [serialize_record(record) async for record in result]
 
     @staticmethod
-    def _execute_query(tx, query):
-        result = tx.run(query)
-        return [record for record in result]
+    async def _execute_slice(tx, statement, parameters, skip, limit):
+        """Records skip..skip+limit of a query that cannot be bounded server-side; the rest is discarded."""
+        result = await tx.run(statement, parameters)
+        records, index = [], 0
+        async for record in result:
+            if index >= skip:
+                records.append(serialize_record(record))
+                if len(records) == limit:
+                    break
+            index += 1
+        return records
@@ -0,0 +1,219 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from mcp_server.metrics import (
+    NEO4J_QUERY_CACHE_REQUESTS_TOTAL,
+    NEO4J_QUERY_CACHE_EVICTIONS_TOTAL,
+    NEO4J_QUERY_CACHE_ENTRIES,
+    set_gauge_function,
+)
+from mcp_server.state_db import connect_state_db, worker_count
+
+# Any write invalidates entries tagged with this, used when a query's labels cannot be told.
+ALL_LABELS = "*"
+# Bumped when every entry is invalidated, whatever labels it read.
+_EVERYTHING = "!"
+
+_LABEL_PATTERN = re.compile(r":\s*`?([A-Za-z_][A-Za-z0-9_]*)`?")
+# A node pattern without a label, e.g. "(n)" or "(n {id: 1})". Function calls such as
+# count(n) are excluded by the lookbehind.
+_UNLABELED_NODE_PATTERN = re.compile(r"(?<![\w.])\(\s*[A-Za-z_]?\w*\s*(\)|\{)")
+
+
+def normalize_query(query: str) -> str:
+    """Collapses whitespace and drops a trailing semicolon, so formatting does not split cache entries."""
+    return " ".join(query.split()).rstrip(";").strip()
+
+
+def query_labels(query: str, known_labels: set) -> frozenset:
+    """
+    Returns the labels a query depends on. Queries that match nodes without a label, or
+    name no known label, depend on every label.
+    """
+    labels = {label for label in _LABEL_PATTERN.findall(query) if label in known_labels}
+    if not labels or _UNLABELED_NODE_PATTERN.search(query):
+        return frozenset([ALL_LABELS])
+    return frozenset(labels)
+
+
+class LabelVersions:
+    """
+    Per-label write counters. A cached result records the versions of the labels it read
+    and is stale once any of them has moved on.
+    """
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _names(labels) -> list:
+        # Entries that read every label are invalidated by any write.
+        return [ALL_LABELS] if ALL_LABELS in labels else sorted(labels) + [_EVERYTHING]
+
+    @staticmethod
+    def _bumped(labels) -> set:
+        return set(labels) | {ALL_LABELS} | ({_EVERYTHING} if ALL_LABELS in labels else set())
+
+    def snapshot(self, labels) -> tuple:
+        with self._lock:
+            return tuple(self._versions.get(name, 0) for name in self._names(labels))
+
+    def bump(self, labels) -> None:
+        with self._lock:
+            for name in self._bumped(labels):
+                self._versions[name] = self._versions.get(name, 0) + 1
+
+    def flush(self) -> None:
+        pass
+
+
+class SqliteLabelVersions(LabelVersions):
+    """
+    LabelVersions kept in the shared state database, so a write handled by one server
+    worker invalidates the entries other workers cached.
+
+    The versions are read from an in-process copy, and bumps are applied to it at once and
+    written in one batch, so cache lookups and writes do not touch SQLite. The copy is
+    synchronised (pending bumps written, the table read back) at most every
+    refresh_interval seconds, so another worker's write is seen within about twice that.
+    """
+
+    def __init__(self, db_path: str = None, refresh_interval: float = None):
+        super().__init__()
+        self.refresh_interval = refresh_interval if refresh_interval is not None else float(
+            os.getenv("NEO4J_QUERY_CACHE_VERSION_REFRESH", "1")
+        )
+        self._conn = connect_state_db(db_path)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS query_cache_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+        self._pending = {}
+        self._refreshed_at = None
+
+    def _refresh(self, force: bool = False) -> None:
+        """Writes pending bumps and reloads the versions, if due. Called with self._lock held."""
+        now = time.monotonic()
+        if not force and self._refreshed_at is not None and now - self._refreshed_at < self.refresh_interval:
+            return
+        if self._pending:
+            self._conn.executemany(
+                """
+                INSERT INTO query_cache_versions (name, version) VALUES (?, ?)
+                ON CONFLICT (name) DO UPDATE SET version = version + excluded.version
+                """,
+                sorted(self._pending.items()),
+            )
+            self._pending = {}
+        self._versions = dict(self._conn.execute("SELECT name, version FROM query_cache_versions").fetchall())
+        self._refreshed_at = now
+
+    def snapshot(self, labels) -> tuple:
+        with self._lock:
+            self._refresh()
+            return tuple(self._versions.get(name, 0) for name in self._names(labels))
+
+    def bump(self, labels) -> None:
+        with self._lock:
+            schedule = not self._pending
+            for name in self._bumped(labels):
+                self._versions[name] = self._versions.get(name, 0) + 1
+                self._pending[name] = self._pending.get(name, 0) + 1
+        if schedule:
+            # Written within refresh_interval even if this worker serves no further requests.
+            timer = threading.Timer(self.refresh_interval, self.flush)
+            timer.daemon = True
+            timer.start()
+
+    def flush(self) -> None:
+        """Writes pending bumps now, e.g. before the worker exits."""
+        with self._lock:
+            self._refresh(force=True)
+
+
+class QueryCache:
+    """
+    A size-bounded LRU cache of read query results with a TTL. Entries are tagged with the
+    labels their query reads and dropped when the tool writes to one of those labels.
+
+    With several server workers (MCP_WORKERS > 1) label versions are shared through the
+    state database, so writes made by other workers invalidate entries too, within
+    NEO4J_QUERY_CACHE_VERSION_REFRESH seconds or so. The TTL bounds staleness from writes
+    made outside the server.
+    """
+
+    def __init__(self, name: str, max_entries: int = None, ttl: float = None, versions: LabelVersions = None):
+        self.name = name
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("NEO4J_QUERY_CACHE_SIZE", "1024"))
+        self.ttl = ttl if ttl is not None else float(os.getenv("NEO4J_QUERY_CACHE_TTL", "30"))
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        if versions is None:
+            versions = SqliteLabelVersions() if self.enabled and worker_count() > 1 else LabelVersions()
+        self.versions = versions
+        set_gauge_function(NEO4J_QUERY_CACHE_ENTRIES.labels(name), lambda: len(self._entries))
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    @staticmethod
+    def key(query: str, parameters: dict, limit: int, offset: int) -> str:
+        return json.dumps([normalize_query(query), parameters, limit, offset], sort_keys=True, default=str)
+
+    def label_versions(self, labels: frozenset) -> tuple:
+        """The versions to pass to set() for a result about to be read from these labels."""
+        return self.versions.snapshot(labels)
+
+    def get(self, key: str):
+        """Returns the cached value, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                NEO4J_QUERY_CACHE_EVICTIONS_TOTAL.labels(self.name, "expired").inc()
+                entry = None
+            if entry is not None and self.versions.snapshot(entry[1]) != entry[3]:
+                del self._entries[key]
+                NEO4J_QUERY_CACHE_EVICTIONS_TOTAL.labels(self.name, "invalidated").inc()
+                entry = None
+            if entry is None:
+                NEO4J_QUERY_CACHE_REQUESTS_TOTAL.labels(self.name, "miss").inc()
+                return None
+            self._entries.move_to_end(key)
+            NEO4J_QUERY_CACHE_REQUESTS_TOTAL.labels(self.name, "hit").inc()
+            return entry[2]
+
+    def set(self, key: str, labels: frozenset, value, versions: tuple) -> None:
+        """Stores a value read at the given label versions, unless one of its labels was written since."""
+        with self._lock:
+            if self.versions.snapshot(labels) != versions:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, labels, value, versions)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                NEO4J_QUERY_CACHE_EVICTIONS_TOTAL.labels(self.name, "lru").inc()
+
+    def invalidate(self, labels) -> None:
+        """Drops entries that read any of the given labels."""
+        labels = set(labels)
+        self.versions.bump(labels)
+        with self._lock:
+            stale = [key for key, (_, entry_labels, _, _) in self._entries.items()
+                     if ALL_LABELS in entry_labels or not labels.isdisjoint(entry_labels)]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                NEO4J_QUERY_CACHE_EVICTIONS_TOTAL.labels(self.name, "invalidated").inc(len(stale))
+
+    def clear(self) -> None:
+        self.versions.bump([ALL_LABELS])
+        with self._lock:
+            self._entries.clear()
+
+    def close(self) -> None:
+        """Shares this worker's pending invalidations with the other workers."""
+        self.versions.flush()
@@ -0,0 +1,262 @@
+import asyncio
+import glob
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+
+from mcp_server.metrics import (
+    NEO4J_WRITE_BUFFER_PENDING,
+    NEO4J_WRITE_BUFFER_OLDEST_AGE_SECONDS,
+    NEO4J_WRITE_BUFFER_COALESCED_TOTAL,
+    NEO4J_WRITE_BUFFER_FLUSHED_TOTAL,
+    NEO4J_WRITE_BUFFER_FLUSH_FAILURES_TOTAL,
+    NEO4J_WRITE_BUFFER_FLUSH_SECONDS,
+    set_gauge_function,
+)
+from mcp_server.state_db import pid_alive
+from mcp_server.tools.neo4j_memory import (
+    _merge_keys,
+    _node_batch_template,
+    _relationship_batch_template,
+)
+
+
+class Neo4jWriteBuffer:
+    """
+    A write-behind queue in front of the memory graph backend (see MemoryGraphBackend).
+
+    Writes are accepted immediately and appended to a local spool file, so a restart does
+    not lose them. Each server worker spools to its own file, "<spool_path>.<pid>", and on
+    start adopts the spools of workers that are no longer running. Writes that MERGE the same key are coalesced into one pending write, and
+    a background task flushes pending writes in batches once batch_size is reached or every
+    flush_interval seconds.
+
+    Methods must be called from the event loop thread.
+    """
+
+    def __init__(self, memory_tool, spool_path: str = None, batch_size: int = None, flush_interval: float = None):
+        self.memory_tool = memory_tool
+        self.spool_base = spool_path or os.getenv("NEO4J_WRITE_BUFFER_SPOOL", "neo4j_write_spool.jsonl")
+        self.spool_path = f"{self.spool_base}.{os.getpid()}"
+        self.batch_size = batch_size or int(os.getenv("NEO4J_WRITE_BUFFER_BATCH_SIZE", "500"))
+        self.flush_interval = flush_interval or float(os.getenv("NEO4J_WRITE_BUFFER_FLUSH_INTERVAL", "1.0"))
+        self.fsync = os.getenv("NEO4J_WRITE_BUFFER_FSYNC", "0") == "1"
+        self._pending: "OrderedDict[str, dict]" = OrderedDict()
+        self._spool = None
+        self._wakeup = None
+        self._flush_lock = None
+        self._task = None
+        set_gauge_function(NEO4J_WRITE_BUFFER_PENDING, lambda: len(self._pending))
+        set_gauge_function(NEO4J_WRITE_BUFFER_OLDEST_AGE_SECONDS, self.oldest_pending_age)
+
+    # --- Lifecycle ---
+    async def start(self) -> None:
+        """Replays the spools left by stopped processes and starts the background flusher."""
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        adopted = []
+        for orphan in self._orphaned_spools():
+            # Renaming claims the spool, so two workers starting together never both replay it.
+            claimed = f"{self.spool_path}.adopted-{uuid.uuid4().hex}"
+            try:
+                os.rename(orphan, claimed)
+            except FileNotFoundError:
+                continue
+            with open(claimed) as f:
+                for line in f:
+                    if line.strip():
+                        self._merge(json.loads(line))
+            adopted.append(claimed)
+        if self._pending:
+            print(f"Recovered {len(self._pending)} pending Neo4j writes from {len(adopted)} spool file(s)")
+        self._rewrite_spool()
+        # The recovered writes are now in this worker's spool.
+        for claimed in adopted:
+            os.remove(claimed)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flushes what it can and stops the background flusher. Unflushed writes stay spooled."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        try:
+            await self.flush()
+        except Exception as e:
+            print(f"Could not flush {len(self._pending)} Neo4j writes on shutdown, they remain spooled: {e}")
+        if self._spool:
+            self._spool.close()
+            self._spool = None
+
+    # --- Enqueueing ---
+    def add_node(self, label: str, properties: dict) -> None:
+        """Queues a node write. Raises ValueError for labels that are not allowed."""
+        self.add_batch([(label, properties)], [])
+
+    def add_relationship(self, start_node_label: str, start_node_properties: dict,
+                         end_node_label: str, end_node_properties: dict,
+                         relationship_type: str) -> None:
+        """Queues a relationship write. Raises ValueError for identifiers that are not allowed."""
+        self.add_batch([], [(start_node_label, start_node_properties, end_node_label,
+                             end_node_properties, relationship_type)])
+
+    def add_batch(self, nodes: list, relationships: list) -> None:
+        """
+        Queues nodes and relationships in the format of MemoryGraphBackend.write_batch.
+        Every write is validated before any is queued, so a bad batch is rejected whole.
+        """
+        for label, properties in nodes:
+            _node_batch_template(label, _merge_keys(properties))
+        for start_label, start_properties, end_label, end_properties, relationship_type in relationships:
+            _relationship_batch_template(start_label, _merge_keys(start_properties),
+                                         end_label, _merge_keys(end_properties),
+                                         relationship_type)
+        for label, properties in nodes:
+            self._enqueue({"op": "node", "label": label, "properties": properties})
+        for start_label, start_properties, end_label, end_properties, relationship_type in relationships:
+            self._enqueue({
+                "op": "relationship",
+                "start_label": start_label,
+                "start_properties": start_properties,
+                "end_label": end_label,
+                "end_properties": end_properties,
+                "type": relationship_type,
+            })
+
+    def _enqueue(self, write: dict) -> None:
+        write["enqueued_at"] = time.time()
+        self._append_to_spool(write)
+        self._merge(write)
+        if len(self._pending) >= self.batch_size and self._wakeup:
+            self._wakeup.set()
+
+    @staticmethod
+    def _key(write: dict) -> str:
+        """Writes with the same key MERGE the same node or relationship."""
+        if write["op"] == "node":
+            merge_keys = _merge_keys(write["properties"])
+            if not merge_keys:
+                # CREATE semantics: every write is a new node and cannot be coalesced.
+                write.setdefault("create_id", uuid.uuid4().hex)
+                return json.dumps(["create", write["create_id"]])
+            return json.dumps(["node", write["label"], [[k, write["properties"][k]] for k in merge_keys]], default=str)
+        start_keys = _merge_keys(write["start_properties"])
+        end_keys = _merge_keys(write["end_properties"])
+        return json.dumps([
+            "relationship", write["start_label"], [[k, write["start_properties"][k]] for k in start_keys],
+            write["end_label"], [[k, write["end_properties"][k]] for k in end_keys], write["type"],
+        ], default=str)
+
+    def _merge(self, write: dict, front: bool = False) -> None:
+        key = self._key(write)
+        existing = self._pending.get(key)
+        if existing is None:
+            self._pending[key] = write
+            if front:
+                self._pending.move_to_end(key, last=False)
+            return
+        NEO4J_WRITE_BUFFER_COALESCED_TOTAL.inc()
+        # SET n += props semantics: the older write's properties are overridden by the newer one's.
+        older, newer = (write, existing) if front else (existing, write)
+        if write["op"] == "node":
+            existing["properties"] = {**older["properties"], **newer["properties"]}
+        else:
+            existing["start_properties"] = {**older["start_properties"], **newer["start_properties"]}
+            existing["end_properties"] = {**older["end_properties"], **newer["end_properties"]}
+        existing["enqueued_at"] = min(older["enqueued_at"], newer["enqueued_at"])
+        if front:
+            self._pending.move_to_end(key, last=False)
+
+    # --- Flushing ---
+    async def flush(self) -> int:
+        """Writes all pending writes to Neo4j in batches. Returns the number written."""
+        written = 0
+        async with self._flush_lock:
+            while self._pending:
+                batch = [self._pending.popitem(last=False) for _ in range(min(self.batch_size, len(self._pending)))]
+                nodes = [(w["label"], w["properties"]) for _, w in batch if w["op"] == "node"]
+                relationships = [
+                    (w["start_label"], w["start_properties"], w["end_label"], w["end_properties"], w["type"])
+                    for _, w in batch if w["op"] == "relationship"
+                ]
+                start = time.perf_counter()
+                try:
+                    await self.memory_tool.write_batch(nodes, relationships)
+                except Exception:
+                    NEO4J_WRITE_BUFFER_FLUSH_FAILURES_TOTAL.inc()
+                    # Put the batch back ahead of newer writes, keeping any newer properties.
+                    for _, write in reversed(batch):
+                        self._merge(write, front=True)
+                    raise
+                NEO4J_WRITE_BUFFER_FLUSH_SECONDS.observe(time.perf_counter() - start)
+                NEO4J_WRITE_BUFFER_FLUSHED_TOTAL.inc(len(batch))
+                written += len(batch)
+                self._rewrite_spool()
+        return written
+
+    async def _run(self) -> None:
+        backoff = self.flush_interval
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=backoff)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+                backoff = self.flush_interval
+            except Exception as e:
+                backoff = min(backoff * 2, 60)
+                print(f"Neo4j write-behind flush failed, retrying in {backoff:.0f}s: {e}")
+
+    def oldest_pending_age(self) -> float:
+        """Seconds since the oldest unflushed write was accepted: the buffer's lag."""
+        if not self._pending:
+            return 0.0
+        return time.time() - min(w["enqueued_at"] for w in self._pending.values())
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    # --- Spool ---
+    def _orphaned_spools(self) -> list:
+        """
+        Spool files of processes that are no longer running: "<base>.<pid>" and files a
+        stopped worker was adopting, plus "<base>" itself from before spools were per worker.
+        """
+        orphans = []
+        for path in sorted(glob.glob(f"{glob.escape(self.spool_base)}*")):
+            if path.endswith(".tmp"):
+                continue
+            suffix = path[len(self.spool_base):]
+            if suffix == "":
+                orphans.append(path)
+                continue
+            pid = suffix[1:].split(".", 1)[0]
+            if suffix.startswith(".") and pid.isdigit() and (int(pid) == os.getpid() or not pid_alive(int(pid))):
+                orphans.append(path)
+        return orphans
+
+    def _append_to_spool(self, write: dict) -> None:
+        if self._spool is None:
+            self._spool = open(self.spool_path, "a")
+        self._spool.write(json.dumps(write, default=str) + "\n")
+        self._spool.flush()
+        if self.fsync:
+            os.fsync(self._spool.fileno())
+
+    def _rewrite_spool(self) -> None:
+        """Replaces the spool with the writes still pending."""
+        if self._spool:
+            self._spool.close()
+        tmp_path = f"{self.spool_path}.tmp"
+        with open(tmp_path, "w") as f:
+            for write in self._pending.values():
+                f.write(json.dumps(write, default=str) + "\n")
+        os.replace(tmp_path, self.spool_path)
+        self._spool = open(self.spool_path, "a")
@@ -1,4 +1,5 @@
 import os
+from mcp_server.metrics import FILE_BYTES_READ_TOTAL, FILES_LISTED_TOTAL
 
 class RepoReadTool:
     """
@@ -13,6 +14,7 @@ class RepoReadTool:
         for root, _, files in os.walk(directory):
             for file in files:
                 all_files.append(os.path.join(root, file))
+        FILES_LISTED_TOTAL.inc(len(all_files))
         return all_files
 
     def read_file(self, file_path: str) -> str:
@@ -22,6 +24,8 @@ class RepoReadTool:
         try:
             with open(file_path, "r") as f:
                 content = f.read()
+            # Counted as UTF-8 rather than read as bytes, so newlines are still translated.
+            FILE_BYTES_READ_TOTAL.labels("read_repo").inc(len(content.encode("utf-8")))
             return content
         except FileNotFoundError:
             return f"Error: {file_path} not found."
@@ -0,0 +1,399 @@
+import asyncio
+import json
+import re
+import sqlite3
+import threading
+
+from mcp_server.metrics import NEO4J_COMPACTION_NODES_TOTAL
+from mcp_server.models import RelatedTask, CommitSummary, CoChangedFile
+from mcp_server.tools.memory_backend import MemoryGraphBackend
+from mcp_server.tools.neo4j_memory import (
+    ALLOWED_LABELS,
+    ALLOWED_RELATIONSHIP_TYPES,
+    CO_CHANGE_TASK_WINDOW,
+    STREAM_MAX_LIMIT,
+    UNIQUE_PROPERTY_KEYS,
+    _context_parameters,
+    _merge_keys,
+    _page,
+    _page_parameters,
+    _validate_identifier,
+)
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS nodes (id INTEGER PRIMARY KEY, label TEXT NOT NULL, properties TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS nodes_label ON nodes (label)",
+    *[f"CREATE INDEX IF NOT EXISTS nodes_{key} ON nodes (label, json_extract(properties, '$.{key}'))" for key in UNIQUE_PROPERTY_KEYS],
+    "CREATE TABLE IF NOT EXISTS relationships (start_id INTEGER NOT NULL, type TEXT NOT NULL, end_id INTEGER NOT NULL, "
+    "PRIMARY KEY (start_id, type, end_id)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS relationships_end ON relationships (end_id, type)",
+]
+
+# The Cypher subset the sqlite backend answers: a single labelled node pattern matched on
+# parameterized properties, e.g. MATCH (t:Task {id: $id}) RETURN t
+_QUERY_PATTERN = re.compile(
+    r"^\s*MATCH\s*\(\s*(?P<var>[A-Za-z_]\w*)\s*:\s*(?P<label>[A-Za-z_]\w*)\s*(?:\{(?P<props>[^}]*)\})?\s*\)"
+    r"\s*RETURN\s+(?P<ret>[A-Za-z_]\w*)\s*;?\s*$",
+    re.IGNORECASE,
+)
+_PROPERTY_PATTERN = re.compile(r"^\s*([A-Za-z_]\w*)\s*:\s*\$([A-Za-z_]\w*)\s*$")
+
+ORPHAN_LABELS = ("Commit", "File", "GeneratedFile", "DocumentationOutput", "Repository")
+
+
+def _parse_query(query: str) -> tuple:
+    """Returns (variable, label, {property: parameter name}) for a supported query."""
+    match = _QUERY_PATTERN.match(query)
+    if not match or match.group("var") != match.group("ret"):
+        raise ValueError(
+            "The sqlite memory backend only supports queries of the form "
+            "MATCH (n:Label {key: $param, ...}) RETURN n. Use MEMORY_BACKEND=neo4j for full Cypher."
+        )
+    filters = {}
+    for pair in filter(str.strip, (match.group("props") or "").split(",")):
+        property_match = _PROPERTY_PATTERN.match(pair)
+        if not property_match:
+            raise ValueError(f"Unsupported property filter '{pair.strip()}'. Use key: $param.")
+        filters[property_match.group(1)] = property_match.group(2)
+    return match.group("var"), match.group("label"), filters
+
+
+class SqliteMemoryGraph(MemoryGraphBackend):
+    """
+    An in-process memory graph in a single SQLite file (or ":memory:"), for development,
+    benchmarks and single-node deployments without a Neo4j server. It supports the MERGE
+    and relationship writes the tools make, the context lookups, compaction and simple
+    label/property queries.
+
+    Calls are serialized by a lock and run in a worker thread, off the event loop.
+    """
+
+    def __init__(self, path: str = "memory_graph.sqlite"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    async def _call(self, fn, *args):
+        def locked():
+            with self._lock:
+                return fn(*args)
+        return await asyncio.to_thread(locked)
+
+    async def close(self) -> None:
+        self._conn.close()
+
+    # --- Writes ---
+    async def add_node(self, label: str, properties: dict) -> str:
+        node_id = await self._call(self._write, [(label, properties)], [])
+        return f"Created node: {label} {node_id}"
+
+    async def add_relationship(self, start_node_label: str, start_node_properties: dict,
+                               end_node_label: str, end_node_properties: dict,
+                               relationship_type: str) -> str:
+        await self._call(self._write, [], [(start_node_label, start_node_properties, end_node_label,
+                                            end_node_properties, relationship_type)])
+        return f"Created relationship: {relationship_type}"
+
+    async def write_batch(self, nodes: list, relationships: list) -> int:
+        await self._call(self._write, nodes, relationships)
+        return len(nodes) + len(relationships)
+
+    def _write(self, nodes: list, relationships: list):
+        for label, _ in nodes:
+            _validate_identifier(label, ALLOWED_LABELS, "Label")
+        for start_label, _, end_label, _, relationship_type in relationships:
+            _validate_identifier(start_label, ALLOWED_LABELS, "Label")
+            _validate_identifier(end_label, ALLOWED_LABELS, "Label")
+            _validate_identifier(relationship_type, ALLOWED_RELATIONSHIP_TYPES, "Relationship type")
+        node_id = None
+        with self._conn:
+            for label, properties in nodes:
+                node_id = self._merge_node(label, properties, create_if_keyless=True)
+            for start_label, start_properties, end_label, end_properties, relationship_type in relationships:
+                start_id = self._merge_node(start_label, start_properties)
+                end_id = self._merge_node(end_label, end_properties)
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO relationships (start_id, type, end_id) VALUES (?, ?, ?)",
+                    (start_id, relationship_type, end_id),
+                )
+        return node_id
+
+    def _merge_node(self, label: str, properties: dict, create_if_keyless: bool = False) -> int:
+        """
+        MERGE semantics: the first node with the label and the same values for the merge
+        keys is updated with properties, otherwise a node is created. A node without merge
+        keys is always created by add_node (CREATE), and matches any node of its label in a
+        relationship, as in Cypher.
+        """
+        merge_keys = _merge_keys(properties)
+        row = None
+        if merge_keys or not create_if_keyless:
+            conditions = "".join(f" AND json_extract(properties, '$.{k}') = ?" for k in merge_keys)
+            row = self._conn.execute(
+                f"SELECT id, properties FROM nodes WHERE label = ?{conditions} ORDER BY id LIMIT 1",
+                (label, *[properties[k] for k in merge_keys]),
+            ).fetchone()
+        if row is None:
+            cursor = self._conn.execute(
+                "INSERT INTO nodes (label, properties) VALUES (?, ?)", (label, json.dumps(properties, default=str)))
+            return cursor.lastrowid
+        self._set_properties(row[0], {**json.loads(row[1]), **properties})
+        return row[0]
+
+    def _set_properties(self, node_id: int, properties: dict) -> None:
+        self._conn.execute("UPDATE nodes SET properties = ? WHERE id = ?", (json.dumps(properties, default=str), node_id))
+
+    def _delete_node(self, node_id: int) -> None:
+        self._conn.execute("DELETE FROM relationships WHERE start_id = ? OR end_id = ?", (node_id, node_id))
+        self._conn.execute("DELETE FROM nodes WHERE id = ?", (node_id,))
+
+    # --- Queries ---
+    async def query(self, query: str, parameters: dict = None, limit: int = None, cursor: str = None) -> dict:
+        parameters = parameters or {}
+        limit, offset, _ = _page_parameters(query, parameters, limit, cursor)
+        records = await self._call(self._match, query, parameters, offset, limit + 1)
+        return _page(query, parameters, records, limit, offset)
+
+    async def stream(self, query: str, parameters: dict = None, limit: int = None):
+        limit = max(1, min(limit or STREAM_MAX_LIMIT, STREAM_MAX_LIMIT))
+        for record in await self._call(self._match, query, parameters or {}, 0, limit):
+            yield record
+
+    def _match(self, query: str, parameters: dict, offset: int, limit: int) -> list:
+        variable, label, filters = _parse_query(query)
+        missing = [name for name in filters.values() if name not in parameters]
+        if missing:
+            raise ValueError(f"Missing query parameters: {missing}")
+        conditions = "".join(f" AND json_extract(properties, '$.{key}') = ?" for key in filters)
+        rows = self._conn.execute(
+            f"SELECT id, properties FROM nodes WHERE label = ?{conditions} ORDER BY id LIMIT ? OFFSET ?",
+            (label, *[parameters[name] for name in filters.values()], limit, offset),
+        ).fetchall()
+        return [
+            {variable: {"element_id": str(node_id), "labels": [label], "properties": json.loads(properties)}}
+            for node_id, properties in rows
+        ]
+
+    # --- Context retrieval ---
+    async def related_tasks(self, paths: list, limit: int = 10) -> list:
+        return await self._call(self._related_tasks, _context_parameters(paths, limit))
+
+    async def recent_commits(self, paths: list, limit: int = 10) -> dict:
+        return await self._call(self._recent_commits, _context_parameters(paths, limit))
+
+    async def co_changed_files(self, paths: list, limit: int = 10) -> dict:
+        return await self._call(self._co_changed_files, _context_parameters(paths, limit))
+
+    def _tasks_by_path(self, paths: list) -> dict:
+        """Returns {path: [(task node id, task properties), ...]} for the tasks that affected each path."""
+        placeholders = ", ".join("?" for _ in paths)
+        rows = self._conn.execute(
+            "SELECT json_extract(f.properties, '$.path'), t.id, t.properties FROM nodes f "
+            "JOIN relationships r ON r.end_id = f.id AND r.type = 'AFFECTS_FILE' "
+            "JOIN nodes t ON t.id = r.start_id AND t.label = 'Task' "
+            f"WHERE f.label = 'File' AND json_extract(f.properties, '$.path') IN ({placeholders})",
+            paths,
+        ).fetchall()
+        tasks = {}
+        for path, task_node_id, properties in rows:
+            tasks.setdefault(path, []).append((task_node_id, json.loads(properties)))
+        return tasks
+
+    def _neighbours(self, start_ids: set, relationship_type: str) -> dict:
+        """Returns {start node id: [end node properties, ...]} over one relationship type."""
+        if not start_ids:
+            return {}
+        placeholders = ", ".join("?" for _ in start_ids)
+        rows = self._conn.execute(
+            f"SELECT r.start_id, n.properties FROM relationships r JOIN nodes n ON n.id = r.end_id "
+            f"WHERE r.type = ? AND r.start_id IN ({placeholders})",
+            (relationship_type, *start_ids),
+        ).fetchall()
+        neighbours = {}
+        for start_id, properties in rows:
+            neighbours.setdefault(start_id, []).append(json.loads(properties))
+        return neighbours
+
+    def _related_tasks(self, parameters: dict) -> list:
+        tasks = {}
+        for path, path_tasks in self._tasks_by_path(parameters["paths"]).items():
+            for task_node_id, properties in path_tasks:
+                task = tasks.setdefault(task_node_id, (properties, set()))
+                task[1].add(path)
+        ranked = sorted(tasks.values(), key=lambda task: (-len(task[1]), -(task[0].get("id") or 0)))
+        return [
+            RelatedTask(id=properties["id"], description=properties.get("description"),
+                        status=properties.get("status"), files=sorted(files))
+            for properties, files in ranked[:parameters["limit"]]
+        ]
+
+    def _recent_commits(self, parameters: dict) -> dict:
+        tasks_by_path = self._tasks_by_path(parameters["paths"])
+        commits_by_task = self._neighbours({t for tasks in tasks_by_path.values() for t, _ in tasks}, "TRIGGERED_BY_COMMIT")
+        result = {}
+        for path in parameters["paths"]:
+            latest = {}
+            for task_node_id, task in tasks_by_path.get(path, []):
+                for commit in commits_by_task.get(task_node_id, []):
+                    if commit["sha"] not in latest or (task.get("id") or 0) > latest[commit["sha"]][1]:
+                        latest[commit["sha"]] = (commit, task.get("id") or 0)
+            ranked = sorted(latest.values(), key=lambda item: -item[1])[:parameters["limit"]]
+            result[path] = [
+                CommitSummary(sha=commit["sha"], repo_url=commit.get("repo_url"),
+                              event_type=commit.get("event_type"), task_id=task_id)
+                for commit, task_id in ranked
+            ]
+        return result
+
+    def _co_changed_files(self, parameters: dict) -> dict:
+        tasks_by_path = {
+            path: sorted(tasks, key=lambda task: -(task[1].get("id") or 0))[:CO_CHANGE_TASK_WINDOW]
+            for path, tasks in self._tasks_by_path(parameters["paths"]).items()
+        }
+        files_by_task = self._neighbours({t for tasks in tasks_by_path.values() for t, _ in tasks}, "AFFECTS_FILE")
+        result = {}
+        for path in parameters["paths"]:
+            counts = {}
+            for task_node_id, _ in tasks_by_path.get(path, []):
+                for other_path in {f.get("path") for f in files_by_task.get(task_node_id, [])} - {path, None}:
+                    counts[other_path] = counts.get(other_path, 0) + 1
+            ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:parameters["limit"]]
+            result[path] = [CoChangedFile(path=other_path, co_changes=count) for other_path, count in ranked]
+        return result
+
+    # --- Compaction ---
+    async def compact(self, now: int, cutoff: int, batch_size: int) -> dict:
+        counts = {
+            "backfilled_tasks": await self._repeat("backfill", self._backfill_updated_at, now, batch_size),
+            "merged_generated_files": await self._repeat("merge_generated_files", self._merge_generated_files, batch_size),
+            "merged_documentation_outputs": await self._repeat(
+                "merge_documentation_outputs", self._merge_documentation_outputs, batch_size),
+            "aged_out_tasks": 0,
+            "deleted_orphans": 0,
+        }
+        if cutoff is not None:
+            counts["aged_out_tasks"] = await self._repeat("age_out_tasks", self._age_out_tasks, cutoff, batch_size)
+        for label in ORPHAN_LABELS:
+            counts["deleted_orphans"] += await self._repeat("delete_orphans", self._delete_orphans, label, batch_size)
+        counts["rolled_up_files"] = await self._repeat("roll_up_file_stats", self._roll_up_file_stats, now, batch_size)
+        return counts
+
+    async def _repeat(self, step: str, fn, *args) -> int:
+        """Runs a batched step, one transaction per batch, until a batch handles no nodes."""
+        total = 0
+        while True:
+            count = await self._call(self._in_transaction, fn, *args)
+            if not count:
+                return total
+            NEO4J_COMPACTION_NODES_TOTAL.labels(step).inc(count)
+            total += count
+
+    def _in_transaction(self, fn, *args) -> int:
+        with self._conn:
+            return fn(*args)
+
+    def _nodes(self, sql: str, parameters: tuple) -> list:
+        return [(node_id, json.loads(properties)) for node_id, properties in self._conn.execute(sql, parameters)]
+
+    def _backfill_updated_at(self, now: int, batch_size: int) -> int:
+        tasks = self._nodes(
+            "SELECT id, properties FROM nodes WHERE label = 'Task' AND json_extract(properties, '$.updated_at') IS NULL LIMIT ?",
+            (batch_size,),
+        )
+        for node_id, properties in tasks:
+            self._set_properties(node_id, {**properties, "updated_at": now})
+        return len(tasks)
+
+    def _move_incoming(self, duplicate_id: int, target_id: int, relationship_type: str) -> None:
+        self._conn.execute(
+            "INSERT OR IGNORE INTO relationships (start_id, type, end_id) "
+            "SELECT start_id, type, ? FROM relationships WHERE end_id = ? AND type = ?",
+            (target_id, duplicate_id, relationship_type),
+        )
+        self._delete_node(duplicate_id)
+
+    def _merge_generated_files(self, batch_size: int) -> int:
+        groups = self._conn.execute(
+            "SELECT group_concat(id) FROM (SELECT id, json_extract(properties, '$.path') AS path FROM nodes "
+            "WHERE label = 'GeneratedFile' AND path IS NOT NULL ORDER BY id) GROUP BY path HAVING count(*) > 1 LIMIT ?",
+            (batch_size,),
+        ).fetchall()
+        merged = 0
+        for (ids,) in groups:
+            keep, *duplicates = [int(node_id) for node_id in ids.split(",")]
+            for duplicate_id in duplicates:
+                self._move_incoming(duplicate_id, keep, "GENERATED_CODE")
+            merged += len(duplicates)
+        return merged
+
+    def _merge_documentation_outputs(self, batch_size: int) -> int:
+        groups = {}
+        for node_id, properties in self._nodes(
+                "SELECT id, properties FROM nodes WHERE label = 'DocumentationOutput' "
+                "AND json_extract(properties, '$.task_id') IS NOT NULL AND json_extract(properties, '$.id') IS NULL ORDER BY id",
+                ()):
+            groups.setdefault(properties["task_id"], []).append(node_id)
+        for task_id, node_ids in list(groups.items())[:batch_size]:
+            docs_id = f"task-{task_id}"
+            existing = self._conn.execute(
+                "SELECT id, properties FROM nodes WHERE label = 'DocumentationOutput' AND json_extract(properties, '$.id') = ?",
+                (docs_id,),
+            ).fetchone()
+            target_id = existing[0] if existing else node_ids[0]
+            if not existing:
+                properties = json.loads(self._conn.execute("SELECT properties FROM nodes WHERE id = ?", (target_id,)).fetchone()[0])
+                self._set_properties(target_id, {**properties, "id": docs_id})
+            for duplicate_id in node_ids:
+                if duplicate_id != target_id:
+                    self._move_incoming(duplicate_id, target_id, "GENERATED_DOCS")
+        return min(len(groups), batch_size)
+
+    def _age_out_tasks(self, cutoff: int, batch_size: int) -> int:
+        tasks = self._nodes(
+            "SELECT id, properties FROM nodes WHERE label = 'Task' AND json_extract(properties, '$.updated_at') < ? LIMIT ?",
+            (cutoff, batch_size),
+        )
+        for node_id, task in tasks:
+            for file_id, properties in self._nodes(
+                    "SELECT n.id, n.properties FROM relationships r JOIN nodes n ON n.id = r.end_id "
+                    "WHERE r.start_id = ? AND r.type = 'AFFECTS_FILE' AND n.label = 'File'",
+                    (node_id,)):
+                properties["archived_task_count"] = properties.get("archived_task_count", 0) + 1
+                properties["last_changed_at"] = max(properties.get("last_changed_at") or 0, task["updated_at"])
+                self._set_properties(file_id, properties)
+            self._delete_node(node_id)
+        return len(tasks)
+
+    def _delete_orphans(self, label: str, batch_size: int) -> int:
+        keep_stats = " AND json_extract(n.properties, '$.archived_task_count') IS NULL" if label == "File" else ""
+        cursor = self._conn.execute(
+            "DELETE FROM nodes WHERE id IN (SELECT n.id FROM nodes n WHERE n.label = ? "
+            "AND NOT EXISTS (SELECT 1 FROM relationships WHERE start_id = n.id) "
+            f"AND NOT EXISTS (SELECT 1 FROM relationships WHERE end_id = n.id){keep_stats} LIMIT ?)",
+            (label, batch_size),
+        )
+        return cursor.rowcount
+
+    def _roll_up_file_stats(self, now: int, batch_size: int) -> int:
+        files = self._nodes(
+            "SELECT id, properties FROM nodes WHERE label = 'File' AND "
+            "(json_extract(properties, '$.stats_updated_at') IS NULL OR json_extract(properties, '$.stats_updated_at') < ?) LIMIT ?",
+            (now, batch_size),
+        )
+        for file_id, properties in files:
+            live_tasks, last_live_change = self._conn.execute(
+                "SELECT count(*), max(json_extract(t.properties, '$.updated_at')) FROM relationships r "
+                "JOIN nodes t ON t.id = r.start_id AND t.label = 'Task' WHERE r.end_id = ? AND r.type = 'AFFECTS_FILE'",
+                (file_id,),
+            ).fetchone()
+            properties["task_count"] = properties.get("archived_task_count", 0) + live_tasks
+            if last_live_change is not None and (properties.get("last_changed_at") or 0) < last_live_change:
+                properties["last_changed_at"] = last_live_change
+            properties["stats_updated_at"] = now
+            self._set_properties(file_id, properties)
+        return len(files)
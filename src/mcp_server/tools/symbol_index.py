@@ -0,0 +1,306 @@
+import ast
+import hashlib
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from mcp_server.state_db import connect_state_db
+
+SYMBOL_INDEX_PATH = os.getenv("MCP_SYMBOL_INDEX_DB", "symbol_index.sqlite")
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS symbol_files (
+        id INTEGER PRIMARY KEY,
+        repo TEXT NOT NULL,
+        path TEXT NOT NULL,
+        fingerprint TEXT NOT NULL,
+        UNIQUE (repo, path)
+    )
+    """,
+    # kind is module, class, function or method; qualname is relative to the module.
+    """
+    CREATE TABLE IF NOT EXISTS symbols (
+        file_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        qualname TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        line INTEGER NOT NULL,
+        end_line INTEGER,
+        signature TEXT
+    )
+    """,
+    "CREATE TABLE IF NOT EXISTS imports (file_id INTEGER NOT NULL, module TEXT NOT NULL, name TEXT, alias TEXT, line INTEGER NOT NULL)",
+    # callee is the called name without its receiver ("send" for "self.batch.send()").
+    "CREATE TABLE IF NOT EXISTS calls (file_id INTEGER NOT NULL, caller TEXT NOT NULL, callee TEXT NOT NULL, expression TEXT NOT NULL, line INTEGER NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS symbols_name ON symbols (name)",
+    "CREATE INDEX IF NOT EXISTS symbols_qualname ON symbols (qualname)",
+    "CREATE INDEX IF NOT EXISTS symbols_file ON symbols (file_id)",
+    "CREATE INDEX IF NOT EXISTS imports_module ON imports (module)",
+    "CREATE INDEX IF NOT EXISTS imports_file ON imports (file_id)",
+    "CREATE INDEX IF NOT EXISTS calls_callee ON calls (callee)",
+    "CREATE INDEX IF NOT EXISTS calls_file ON calls (file_id)",
+]
+
+SKIP_DIRS = {".git", ".venv", "venv", "node_modules", "__pycache__"}
+
+# Call expressions longer than this are stored truncated.
+MAX_EXPRESSION_CHARS = 200
+
+
+def module_name(path: str) -> str:
+    """The dotted module name of a repository-relative .py path."""
+    parts = path[:-3].split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts) or path
+
+
+class _SymbolVisitor(ast.NodeVisitor):
+    """Collects the definitions, imports and call sites of one module."""
+
+    def __init__(self):
+        self.scope: List[str] = []
+        self.in_class: List[bool] = [False]
+        self.symbols: List[tuple] = []
+        self.imports: List[tuple] = []
+        self.calls: List[tuple] = []
+        # Names bound by "import ... as" / "from ... import ... as", so aliased calls are
+        # indexed under the imported name.
+        self.aliases: Dict[str, str] = {}
+
+    def _define(self, node, kind: str, signature: str = None):
+        qualname = ".".join([*self.scope, node.name])
+        self.symbols.append((node.name, qualname, kind, node.lineno, node.end_lineno, signature))
+        self.scope.append(node.name)
+        self.in_class.append(kind == "class")
+        self.generic_visit(node)
+        self.scope.pop()
+        self.in_class.pop()
+
+    def visit_ClassDef(self, node):
+        self._define(node, "class")
+
+    def visit_FunctionDef(self, node):
+        returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+        qualname = ".".join([*self.scope, node.name])
+        self._define(node, "method" if self.in_class[-1] else "function", f"{qualname}({ast.unparse(node.args)}){returns}")
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.imports.append((alias.name, None, alias.asname, node.lineno))
+            if alias.asname:
+                self.aliases[alias.asname] = alias.name.rsplit(".", 1)[-1]
+
+    def visit_ImportFrom(self, node):
+        module = "." * node.level + (node.module or "")
+        for alias in node.names:
+            self.imports.append((module, alias.name, alias.asname, node.lineno))
+            if alias.asname:
+                self.aliases[alias.asname] = alias.name
+
+    def visit_Call(self, node):
+        if isinstance(node.func, ast.Name):
+            callee = self.aliases.get(node.func.id, node.func.id)
+        elif isinstance(node.func, ast.Attribute):
+            callee = node.func.attr
+        else:
+            callee = None
+        if callee:
+            caller = ".".join(self.scope) or "<module>"
+            self.calls.append((caller, callee, ast.unparse(node.func)[:MAX_EXPRESSION_CHARS], node.lineno))
+        self.generic_visit(node)
+
+
+class SymbolIndexTool:
+    """
+    An index of the Python definitions, imports and call sites of the target repositories,
+    built with the ast module and kept in SQLite (MCP_SYMBOL_INDEX_DB). Files are re-parsed
+    only when their content changes, so updating the index after a push costs one parse per
+    changed file. Answers "where is X defined" and "who calls X" without reading the repository.
+
+    Calls are matched by name: "who calls send" lists every call of a send attribute or
+    function, whatever its receiver.
+    """
+
+    def __init__(self, db_path: str = None):
+        self._conn = connect_state_db(db_path or SYMBOL_INDEX_PATH)
+        self._lock = threading.Lock()
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+
+    # --- Indexing ---
+    def index_repository(self, repo: str, root_dir: str, changed_files: Optional[Iterable[str]] = None,
+                         removed_files: Iterable[str] = ()) -> Dict[str, int]:
+        """
+        Updates the index of a repository checked out at root_dir. With changed_files
+        (repository-relative paths) only those files are looked at; otherwise, or if the
+        repository has not been indexed yet, the whole tree is walked and files no longer
+        present are dropped. Unchanged files are skipped. Raises ValueError if root_dir is
+        not a directory.
+        """
+        if not os.path.isdir(root_dir):
+            raise ValueError(f"{root_dir} is not a directory.")
+        with self._lock:
+            fingerprints = dict(self._conn.execute(
+                "SELECT path, fingerprint FROM symbol_files WHERE repo = ?", (repo,)
+            ).fetchall())
+        # A repository not indexed yet is walked in full, whatever changed.
+        if changed_files is None or not fingerprints:
+            paths = self._python_files(root_dir)
+            removed = set(fingerprints) - set(paths)
+        else:
+            changed_files = list(changed_files)
+            paths = [p for p in changed_files if p.endswith(".py") and os.path.isfile(os.path.join(root_dir, p))]
+            removed = {p for p in changed_files if p.endswith(".py")} - set(paths)
+        removed |= set(removed_files) & set(fingerprints)
+
+        stats = {"indexed": 0, "unchanged": 0, "removed": 0}
+        for path in paths:
+            with open(os.path.join(root_dir, path), "rb") as f:
+                data = f.read()
+            fingerprint = hashlib.sha256(data).hexdigest()
+            if fingerprints.get(path) == fingerprint:
+                stats["unchanged"] += 1
+                continue
+            self._index_source(repo, path, data, fingerprint)
+            stats["indexed"] += 1
+        for path in removed:
+            if path in fingerprints:
+                self.remove_file(repo, path)
+                stats["removed"] += 1
+        return stats
+
+    def index_file(self, repo: str, path: str, source: str) -> None:
+        """Indexes one file from its source, replacing what was indexed for it before."""
+        data = source.encode("utf-8")
+        self._index_source(repo, path, data, hashlib.sha256(data).hexdigest())
+
+    def remove_file(self, repo: str, path: str) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                row = self._conn.execute("SELECT id FROM symbol_files WHERE repo = ? AND path = ?", (repo, path)).fetchone()
+                if row:
+                    self._delete_rows(row[0])
+                    self._conn.execute("DELETE FROM symbol_files WHERE id = ?", (row[0],))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _python_files(root_dir: str) -> List[str]:
+        paths = []
+        for root, dirs, files in os.walk(root_dir):
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+            for file in files:
+                if file.endswith(".py"):
+                    paths.append(os.path.relpath(os.path.join(root, file), root_dir).replace(os.sep, "/"))
+        return paths
+
+    def _index_source(self, repo: str, path: str, data: bytes, fingerprint: str) -> None:
+        visitor = _SymbolVisitor()
+        try:
+            tree = ast.parse(data, filename=path)
+        except (SyntaxError, ValueError) as e:
+            # Recorded without symbols, so it is not re-parsed until it changes.
+            print(f"Could not parse {repo}:{path} for the symbol index: {e}")
+            tree = None
+        module = module_name(path)
+        if tree is not None:
+            visitor.visit(tree)
+            visitor.symbols.insert(0, (module.rsplit(".", 1)[-1], module, "module", 1, None, None))
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                row = self._conn.execute("SELECT id FROM symbol_files WHERE repo = ? AND path = ?", (repo, path)).fetchone()
+                if row:
+                    file_id = row[0]
+                    self._delete_rows(file_id)
+                    self._conn.execute("UPDATE symbol_files SET fingerprint = ? WHERE id = ?", (fingerprint, file_id))
+                else:
+                    file_id = self._conn.execute(
+                        "INSERT INTO symbol_files (repo, path, fingerprint) VALUES (?, ?, ?)", (repo, path, fingerprint)
+                    ).lastrowid
+                self._conn.executemany(
+                    "INSERT INTO symbols (file_id, name, qualname, kind, line, end_line, signature) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(file_id, *symbol) for symbol in visitor.symbols],
+                )
+                self._conn.executemany(
+                    "INSERT INTO imports (file_id, module, name, alias, line) VALUES (?, ?, ?, ?, ?)",
+                    [(file_id, *entry) for entry in visitor.imports],
+                )
+                self._conn.executemany(
+                    "INSERT INTO calls (file_id, caller, callee, expression, line) VALUES (?, ?, ?, ?, ?)",
+                    [(file_id, *call) for call in visitor.calls],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _delete_rows(self, file_id: int) -> None:
+        for table in ("symbols", "imports", "calls"):
+            self._conn.execute(f"DELETE FROM {table} WHERE file_id = ?", (file_id,))
+
+    # --- Queries ---
+    def find_definitions(self, name: str, repo: str = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Where a symbol is defined. name is a plain name ("send"), a qualified name within
+        its module ("Neo4jBatch.send") or a module ("orchestrator.graph").
+        """
+        query = """
+            SELECT f.repo, f.path, s.name, s.qualname, s.kind, s.line, s.end_line, s.signature
+            FROM symbols s JOIN symbol_files f ON f.id = s.file_id
+            WHERE (s.name = ? OR s.qualname = ?)
+        """
+        params: list = [name, name]
+        if repo:
+            query += " AND f.repo = ?"
+            params.append(repo)
+        query += " ORDER BY f.repo, f.path, s.line LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query, (*params, limit)).fetchall()
+        keys = ("repo", "path", "name", "qualname", "kind", "line", "end_line", "signature")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def find_callers(self, name: str, repo: str = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """The call sites of a function or method, matched by its last name component."""
+        query = """
+            SELECT f.repo, f.path, c.caller, c.expression, c.line
+            FROM calls c JOIN symbol_files f ON f.id = c.file_id
+            WHERE c.callee = ?
+        """
+        params: list = [name.rsplit(".", 1)[-1]]
+        if repo:
+            query += " AND f.repo = ?"
+            params.append(repo)
+        query += " ORDER BY f.repo, f.path, c.line LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query, (*params, limit)).fetchall()
+        keys = ("repo", "path", "caller", "expression", "line")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def file_symbols(self, repo: str, paths: Iterable[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """The classes, functions and methods defined in each of the given files, in order."""
+        result: Dict[str, List[Dict[str, Any]]] = {}
+        with self._lock:
+            for path in paths:
+                rows = self._conn.execute(
+                    """
+                    SELECT s.qualname, s.kind, s.line, s.signature
+                    FROM symbols s JOIN symbol_files f ON f.id = s.file_id
+                    WHERE f.repo = ? AND f.path = ? AND s.kind != 'module' ORDER BY s.line
+                    """,
+                    (repo, path),
+                ).fetchall()
+                if rows:
+                    result[path] = [dict(zip(("qualname", "kind", "line", "signature"), row)) for row in rows]
+        return result
+
+    def close(self) -> None:
+        self._conn.close()
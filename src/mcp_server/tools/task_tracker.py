@@ -1,43 +1,81 @@
+import json
+import threading
 from typing import List, Dict, Any
 from mcp_server.models import Task
+from mcp_server.state_db import connect_state_db
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    description TEXT NOT NULL,
+    status TEXT NOT NULL,
+    context TEXT NOT NULL
+)
+"""
 
 class TaskTrackerTool:
     """
     A simple tool to interact with the MCP's task management system.
+
+    Tasks are kept in the shared state database (MCP_STATE_DB), so every server worker
+    sees the same tasks and IDs are never handed out twice.
     """
 
-    def __init__(self, tasks_db: List[Task], task_id_counter: int):
-        self.tasks_db = tasks_db
-        self.task_id_counter = task_id_counter
+    def __init__(self, db_path: str = None):
+        self._conn = connect_state_db(db_path)
+        self._lock = threading.Lock()
+        self._conn.execute(SCHEMA)
+
+    @staticmethod
+    def _task(row) -> Task:
+        return Task(id=row[0], description=row[1], status=row[2], context=json.loads(row[3]))
 
     def create_task(self, description: str, context: Dict[str, Any] = None) -> Task:
         """
         Creates a new task in the MCP.
         """
-        new_task = Task(id=self.task_id_counter, description=description, context=context if context else {})
-        self.tasks_db.append(new_task)
-        self.task_id_counter += 1
+        new_task = Task(id=0, description=description, context=context if context else {})
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO tasks (description, status, context) VALUES (?, ?, ?)",
+                (new_task.description, new_task.status, json.dumps(new_task.context, default=str)),
+            )
+        new_task.id = cursor.lastrowid
         return new_task
 
     def get_task(self, task_id: int) -> Task:
         """
         Retrieves a task by its ID.
         """
-        task = next((t for t in self.tasks_db if t.id == task_id), None)
-        if not task:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, description, status, context FROM tasks WHERE id = ?", (task_id,)
+            ).fetchone()
+        if not row:
             raise ValueError(f"Task with ID {task_id} not found.")
-        return task
+        return self._task(row)
 
     def update_task_status(self, task_id: int, status: str) -> Task:
         """
         Updates the status of an existing task.
         """
-        task = self.get_task(task_id)
-        task.status = status
-        return task
+        with self._lock:
+            cursor = self._conn.execute("UPDATE tasks SET status = ? WHERE id = ?", (status, task_id))
+        if not cursor.rowcount:
+            raise ValueError(f"Task with ID {task_id} not found.")
+        return self.get_task(task_id)
 
     def list_tasks(self) -> List[Task]:
         """
         Lists all available tasks.
         """
-        return self.tasks_db
+        with self._lock:
+            rows = self._conn.execute("SELECT id, description, status, context FROM tasks ORDER BY id").fetchall()
+        return [self._task(row) for row in rows]
+
+    def count_tasks(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM tasks").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
@@ -1,5 +1,14 @@
+import json
+import os
+import re
+from typing import Dict, Iterable
+
 from mcp_server.tools.generate_code import CodeGenerationTool
 
+# Marks the start of a section in a stitched document; the key is usually a module path.
+SECTION_MARKER = "<!-- section: {} -->"
+_SECTION_MARKER_RE = re.compile(r"^<!-- section: (.+?) -->$", re.MULTILINE)
+
 class DocsWriteTool:
     """
     A tool for generating READMEs and architecture documents.
@@ -20,3 +29,66 @@ class DocsWriteTool:
         Generates an architecture documentation file.
         """
         return self.code_gen_tool.write_file(file_path, architecture_overview)
+
+    @staticmethod
+    def manifest_path(file_path: str) -> str:
+        directory, name = os.path.split(file_path)
+        return os.path.join(directory, f".{name}.manifest.json")
+
+    def read_sections(self, file_path: str) -> Dict[str, str]:
+        """
+        The sections of a document written by write_sections, by key. Missing or
+        unsectioned documents have none.
+        """
+        try:
+            with open(file_path, encoding="utf-8") as f:
+                text = f.read()
+        except FileNotFoundError:
+            return {}
+        markers = list(_SECTION_MARKER_RE.finditer(text))
+        sections = {}
+        for i, marker in enumerate(markers):
+            end = markers[i + 1].start() if i + 1 < len(markers) else len(text)
+            sections[marker.group(1)] = text[marker.end():end].strip("\n")
+        return sections
+
+    def read_manifest(self, file_path: str) -> Dict[str, str]:
+        """The source fingerprint each section of the document was generated from."""
+        try:
+            with open(self.manifest_path(file_path)) as f:
+                return json.load(f).get("sections", {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def write_sections(self, file_path: str, title: str, sections: Dict[str, str], fingerprints: Dict[str, str]) -> str:
+        """
+        Stitches sections, in key order, into one document under a title and records the
+        fingerprint of each next to it, so later runs can tell which sections are stale.
+        """
+        parts = [f"# {title}\n"]
+        for key in sorted(sections):
+            parts.append(f"{SECTION_MARKER.format(key)}\n{sections[key].strip()}\n")
+        result = self.code_gen_tool.write_file(file_path, "\n".join(parts))
+        manifest = {"sections": {key: fingerprints[key] for key in sorted(sections) if key in fingerprints}}
+        self.code_gen_tool.write_file(self.manifest_path(file_path), json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+        return result
+
+    def write_doc_set(self, root_dir: str, pages: Dict[str, str], fingerprints: Dict[str, str],
+                      removed: Iterable[str] = ()) -> str:
+        """
+        Writes the pages of a documentation tree (paths relative to root_dir), deletes the
+        removed ones and records the fingerprints as the manifest of root_dir/index.md.
+        """
+        for page, content in pages.items():
+            result = self.code_gen_tool.write_file(os.path.join(root_dir, page), content)
+            if result.startswith("Error"):
+                return result
+        for page in removed:
+            try:
+                os.remove(os.path.join(root_dir, page))
+            except FileNotFoundError:
+                pass
+        manifest = {"sections": dict(sorted(fingerprints.items()))}
+        self.code_gen_tool.write_file(
+            self.manifest_path(os.path.join(root_dir, "index.md")), json.dumps(manifest, indent=2) + "\n")
+        return f"Successfully wrote {len(pages)} pages to {root_dir}"
@@ -0,0 +1,104 @@
+import gzip
+import hashlib
+import os
+import re
+import struct
+import uuid
+from typing import Optional, Union
+
+_ARTIFACT_ID_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class ArtifactStore:
+    """
+    Stores generated outputs (code, documentation, checklists) on disk as gzip blobs named by
+    the SHA-256 of their content, so an output produced by several tasks is stored once.
+    Tasks reference their outputs by artifact ID instead of carrying them in the memory graph.
+
+    Refs map a key describing how an output was produced (e.g. the inputs of a checklist) to
+    its artifact ID, so an output that already exists can be reused instead of regenerated.
+    """
+
+    def __init__(self, root_dir: str = None):
+        self.root_dir = root_dir or os.getenv("ORCHESTRATOR_ARTIFACT_DIR", "artifact_store")
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def _path(self, artifact_id: str) -> str:
+        if not _ARTIFACT_ID_RE.match(artifact_id):
+            raise ValueError(f"Invalid artifact ID '{artifact_id}'.")
+        return os.path.join(self.root_dir, artifact_id[:2], f"{artifact_id}.gz")
+
+    def _ref_path(self, key: str) -> str:
+        return os.path.join(self.root_dir, "refs", hashlib.sha256(key.encode("utf-8")).hexdigest())
+
+    @staticmethod
+    def _write_atomically(path: str, data: bytes, compress: bool = False) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique per writer: threads of one process may store the same content at once.
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with (gzip.open(tmp_path, "wb") if compress else open(tmp_path, "wb")) as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def put(self, content: Union[str, bytes], ref: str = None) -> str:
+        """
+        Stores content and returns its artifact ID. Storing the same content twice is a
+        no-op. With ref, the ID is also recorded under that key.
+        """
+        data = content.encode("utf-8") if isinstance(content, str) else content
+        artifact_id = hashlib.sha256(data).hexdigest()
+        path = self._path(artifact_id)
+        if not os.path.exists(path):
+            self._write_atomically(path, data, compress=True)
+        if ref is not None:
+            self._write_atomically(self._ref_path(ref), artifact_id.encode("ascii"))
+        return artifact_id
+
+    def lookup(self, ref: str) -> Optional[str]:
+        """The artifact ID recorded under ref, if it is still stored."""
+        try:
+            with open(self._ref_path(ref)) as f:
+                artifact_id = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return artifact_id if self.exists(artifact_id) else None
+
+    def exists(self, artifact_id: str) -> bool:
+        try:
+            return os.path.exists(self._path(artifact_id))
+        except ValueError:
+            return False
+
+    def size(self, artifact_id: str) -> int:
+        """
+        The uncompressed size in bytes, from the gzip trailer (which holds it modulo 2^32;
+        outputs here are far smaller).
+        """
+        try:
+            with open(self._path(artifact_id), "rb") as f:
+                f.seek(-4, os.SEEK_END)
+                return struct.unpack("<I", f.read(4))[0]
+        except FileNotFoundError:
+            raise ValueError(f"Artifact {artifact_id} not found.")
+
+    def read_compressed(self, artifact_id: str) -> bytes:
+        """The stored gzip blob, to send as is to clients that accept gzip."""
+        try:
+            with open(self._path(artifact_id), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise ValueError(f"Artifact {artifact_id} not found.")
+
+    def read(self, artifact_id: str, start: int = 0, end: int = None) -> bytes:
+        """The uncompressed bytes start..end (inclusive, as in an HTTP range) of an artifact."""
+        try:
+            with gzip.open(self._path(artifact_id), "rb") as f:
+                if start:
+                    f.seek(start)
+                return f.read() if end is None else f.read(end - start + 1)
+        except FileNotFoundError:
+            raise ValueError(f"Artifact {artifact_id} not found.")
+
+    def get(self, artifact_id: str) -> str:
+        """Loads a stored text artifact by ID."""
+        return self.read(artifact_id).decode("utf-8")
@@ -0,0 +1,76 @@
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+from orchestrator.git_mirror import GitMirror
+
+ADDED, MODIFIED, REMOVED = "added", "modified", "removed"
+CODE, DOCS, CONFIG = "code", "docs", "config"
+
+_DOCS_EXTENSIONS = {".md", ".rst", ".adoc", ".txt"}
+_DOCS_DIRS = {"docs", "doc"}
+_DOCS_NAMES = ("readme", "changelog", "license", "contributing")
+_CONFIG_EXTENSIONS = {".toml", ".ini", ".cfg", ".yaml", ".yml", ".json", ".env", ".lock"}
+_CONFIG_NAMES = {"dockerfile", "makefile", "setup.py", "setup.cfg", "procfile", ".gitignore", ".dockerignore", ".env"}
+
+# A push's "before" when it creates the branch.
+_NULL_SHA = "0" * 40
+
+_MIRROR_STATUS = {"A": ADDED, "D": REMOVED}
+
+
+def classify_path(path: str) -> str:
+    """Whether a changed file is code, docs or config, from its location and name."""
+    name = os.path.basename(path).lower()
+    stem, extension = os.path.splitext(name)
+    top_dir = path.split("/", 1)[0].lower() if "/" in path else ""
+    if name in _CONFIG_NAMES or stem.startswith("requirements") or top_dir == ".github" or extension in _CONFIG_EXTENSIONS:
+        return CONFIG
+    if top_dir in _DOCS_DIRS or stem.startswith(_DOCS_NAMES) or extension in _DOCS_EXTENSIONS:
+        return DOCS
+    return CODE
+
+
+def aggregate_commit_changes(commits: Iterable[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    The net change of each path across a push's commits, oldest first: a file added and
+    then modified is added, added and then removed is dropped, removed and re-added is modified.
+    """
+    changes: Dict[str, str] = {}
+    for commit in commits:
+        for path in commit.get("added", []):
+            changes[path] = MODIFIED if changes.get(path) == REMOVED else ADDED
+        for path in commit.get("modified", []):
+            if changes.get(path) != ADDED:
+                changes[path] = MODIFIED
+        for path in commit.get("removed", []):
+            if changes.pop(path, None) != ADDED:
+                changes[path] = REMOVED
+    return changes
+
+
+def mirror_changes(diff: Iterable[tuple]) -> Dict[str, str]:
+    """The changes of a GitMirror.diff: its status letters as added, modified or removed."""
+    return {path: _MIRROR_STATUS.get(status, MODIFIED) for status, path in diff}
+
+
+def push_changes(payload: Dict[str, Any], repo_name: Optional[str], mirror: GitMirror) -> Dict[str, str]:
+    """
+    The net changes of a push event. The mirror's before..after diff is exact (it also covers
+    force pushes and pushes with more commits than the payload lists), so it is used when it
+    holds both commits; otherwise the payload's commits are aggregated.
+    """
+    before, after = payload.get("before"), payload.get("after")
+    if before and before != _NULL_SHA and after and after != _NULL_SHA:
+        diff = mirror.diff(repo_name, before, after)
+        if diff is not None:
+            return mirror_changes(diff)
+    commits = payload.get("commits") or ([payload["head_commit"]] if payload.get("head_commit") else [])
+    return aggregate_commit_changes(commits)
+
+
+def files_of_kind(changes: Dict[str, str], *kinds: str, include_removed: bool = False) -> List[str]:
+    """Sorted paths of the given kinds, without removed files unless asked for."""
+    return sorted(
+        path for path, status in changes.items()
+        if classify_path(path) in kinds and (include_removed or status != REMOVED)
+    )
@@ -0,0 +1,206 @@
+import contextvars
+import hashlib
+import os
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from mcp_server.tools.read_repo import RepoReadTool
+from mcp_server.tools.write_docs import DocsWriteTool
+from orchestrator.module_summary import ModuleSummary, summarize_module
+from orchestrator.tracing import tracer
+
+# Files documented as modules, and directories never walked into.
+SOURCE_EXTENSIONS = {".py", ".js", ".ts", ".go", ".java", ".rb", ".rs"}
+SKIP_DIRS = {".git", ".venv", "venv", "node_modules", "__pycache__", "docs"}
+
+# Concurrent LLM calls of one docs run.
+DOCS_CONCURRENCY = int(os.getenv("ORCHESTRATOR_DOCS_CONCURRENCY", "4"))
+
+# Part of every fingerprint: bump it when the section prompt changes to regenerate all sections.
+SECTION_FORMAT_VERSION = "1"
+
+
+class IncrementalDocsPipeline:
+    """
+    Keeps an architecture document with one section per source module up to date.
+    Each section is stored with a fingerprint of the module it was generated from; a run
+    regenerates only sections whose module changed (concurrently, up to DOCS_CONCURRENCY),
+    drops sections of deleted modules, reuses the rest and stitches the document through
+    DocsWriteTool. A run over an unchanged repository makes no LLM calls and writes nothing.
+
+    agent is a DocsAgent, or anything with its generate_module_section method.
+    """
+
+    def __init__(self, agent, reader: RepoReadTool = None, writer: DocsWriteTool = None, concurrency: int = None):
+        self.agent = agent
+        self.reader = reader or RepoReadTool()
+        self.writer = writer or DocsWriteTool()
+        self.concurrency = concurrency or DOCS_CONCURRENCY
+
+    def source_modules(self, repo_dir: str) -> List[str]:
+        """Repository-relative paths of the source modules, sorted."""
+        modules = []
+        for path in self.reader.list_files(repo_dir):
+            relative = os.path.relpath(path, repo_dir).replace(os.sep, "/")
+            if os.path.splitext(relative)[1] in SOURCE_EXTENSIONS and not SKIP_DIRS & set(relative.split("/")[:-1]):
+                modules.append(relative)
+        return sorted(modules)
+
+    @staticmethod
+    def fingerprint(module_path: str, source: str) -> str:
+        return hashlib.sha256(f"{SECTION_FORMAT_VERSION}\0{module_path}\0{source}".encode("utf-8")).hexdigest()
+
+    def run(self, repo_dir: str, doc_path: str = "docs/architecture.md", title: str = "Architecture",
+            task_description: str = "") -> Dict[str, object]:
+        """
+        Brings the document at doc_path (relative to repo_dir) up to date. Returns the
+        regenerated, removed and failed section keys, the section count and whether the
+        document was written; it is not when every stale section failed and none was removed.
+        """
+        doc_file = os.path.join(repo_dir, doc_path)
+        sources = {module: self.reader.read_file(os.path.join(repo_dir, module)) for module in self.source_modules(repo_dir)}
+        fingerprints = {module: self.fingerprint(module, source) for module, source in sources.items()}
+        previous = self.writer.read_manifest(doc_file)
+        sections = self.writer.read_sections(doc_file)
+
+        stale = [m for m in sources if previous.get(m) != fingerprints[m] or m not in sections]
+        removed = sorted(set(sections) - set(sources))
+        result = {"regenerated": [], "removed": removed, "failed": [], "sections": len(sources), "written": False}
+        if not stale and not removed:
+            return result
+
+        generated, failed = self._generate_all(
+            {module: (self.agent.generate_module_section, module, sources[module], task_description) for module in stale},
+            "gemini.generate_docs_section",
+        )
+        result.update(regenerated=sorted(generated), failed=sorted(failed))
+        if not generated and not removed:
+            return result
+        sections.update(generated)
+        for module in removed:
+            del sections[module]
+        self.writer.write_sections(
+            doc_file, title, sections, {m: "" if m in failed else f for m, f in fingerprints.items()},
+        )
+        result["written"] = True
+        return result
+
+    def _generate_all(self, calls: Dict[str, tuple], span_name: str):
+        """
+        Runs one agent call per module, up to self.concurrency at a time. Returns the
+        generated text by module and the modules whose call failed.
+        """
+        generated, failed = {}, set()
+        if not calls:
+            return generated, failed
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(calls))) as pool:
+            # Each call runs in a copy of this context so its span joins the node's trace.
+            futures = {
+                module: pool.submit(contextvars.copy_context().run, self._generate, span_name, *call)
+                for module, call in calls.items()
+            }
+            for module, future in futures.items():
+                try:
+                    generated[module] = future.result()
+                except Exception as e:
+                    # Failed modules are recorded with an empty fingerprint, so the next run retries them.
+                    print(f"Could not generate docs for {module}: {e}")
+                    failed.add(module)
+        return generated, failed
+
+    @staticmethod
+    def _generate(span_name: str, fn, module: str, text: str, task_description: str) -> str:
+        with tracer.span(span_name, "llm", prompt_chars=len(text)) as span:
+            output = fn(module, text, task_description)
+            span.set("response_chars", len(output))
+        return output
+
+
+class ModuleDocSetPipeline(IncrementalDocsPipeline):
+    """
+    Documents a repository as a tree of pages under one directory: a page per source
+    module, generated from the module's AST outline rather than its full source, and an
+    index.md per directory linking its modules and subdirectories. Module pages are
+    regenerated only when their outline changes, concurrently up to DOCS_CONCURRENCY, so
+    a full run over a large repository takes about as long as its slowest module.
+    Index pages cost no LLM calls and are rebuilt on every run that changes a page.
+
+    agent is a DocsAgent, or anything with its generate_module_docs method.
+    """
+
+    @staticmethod
+    def page_path(module: str) -> str:
+        # The module's file name is kept whole, so e.g. index.py cannot collide with index.md.
+        return f"{module}.md"
+
+    def run(self, repo_dir: str, doc_path: str = "docs/modules", title: str = "Modules",
+            task_description: str = "") -> Dict[str, object]:
+        root_dir = os.path.join(repo_dir, doc_path)
+        summaries = {
+            module: summarize_module(module, self.reader.read_file(os.path.join(repo_dir, module)))
+            for module in self.source_modules(repo_dir)
+        }
+        fingerprints = {module: self.fingerprint(module, summary.outline) for module, summary in summaries.items()}
+        previous = self.writer.read_manifest(os.path.join(root_dir, "index.md"))
+
+        stale = [
+            m for m in summaries
+            if previous.get(m) != fingerprints[m] or not os.path.exists(os.path.join(root_dir, self.page_path(m)))
+        ]
+        removed = sorted(set(previous) - set(summaries))
+        result = {"regenerated": [], "removed": removed, "failed": [], "sections": len(summaries), "written": False}
+        if not stale and not removed:
+            return result
+
+        generated, failed = self._generate_all(
+            {m: (self.agent.generate_module_docs, m, summaries[m].outline, task_description) for m in stale},
+            "gemini.generate_module_docs",
+        )
+        result.update(regenerated=sorted(generated), failed=sorted(failed))
+        if not generated and not removed:
+            return result
+        pages = {self.page_path(m): text.strip() + "\n" for m, text in generated.items()}
+        # A new module whose page failed has no page yet, so the indexes leave it out.
+        documented = {
+            m: summary for m, summary in summaries.items()
+            if m in generated or os.path.exists(os.path.join(root_dir, self.page_path(m)))
+        }
+        pages.update(self._index_pages(title, documented))
+        removed_pages = [self.page_path(m) for m in removed]
+        removed_pages += [f"{d}/index.md" for d in _directories(previous) - _directories(documented) if d]
+        self.writer.write_doc_set(
+            root_dir, pages, {m: "" if m in failed else f for m, f in fingerprints.items()}, removed_pages,
+        )
+        result["written"] = True
+        return result
+
+    def _index_pages(self, title: str, summaries: Dict[str, ModuleSummary]) -> Dict[str, str]:
+        """One index.md per directory, listing subdirectories and then modules with their description."""
+        children: Dict[str, set] = {d: set() for d in _directories(summaries)}
+        for directory in children:
+            if directory:
+                children[posixpath.dirname(directory)].add(directory)
+        pages = {}
+        for directory, subdirs in children.items():
+            heading = f"`{directory}/`" if directory else title
+            lines = [f"# {heading}", ""]
+            for subdir in sorted(subdirs):
+                lines.append(f"- [{posixpath.basename(subdir)}/]({posixpath.basename(subdir)}/index.md)")
+            for module in sorted(m for m in summaries if posixpath.dirname(m) == directory):
+                name = posixpath.basename(module)
+                description = summaries[module].description
+                lines.append(f"- [{name}]({self.page_path(name)})" + (f": {description}" if description else ""))
+            pages[posixpath.join(directory, "index.md")] = "\n".join(lines) + "\n"
+        return pages
+
+
+def _directories(modules) -> set:
+    """Every directory containing a module, and their parents, as repository-relative paths ("" is the root)."""
+    directories = {""}
+    for module in modules:
+        directory = posixpath.dirname(module)
+        while directory:
+            directories.add(directory)
+            directory = posixpath.dirname(directory)
+    return directories
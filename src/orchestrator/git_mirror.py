@@ -0,0 +1,54 @@
+import os
+import subprocess
+from typing import List, Optional, Tuple
+
+from orchestrator.tracing import tracer
+
+
+class GitMirror:
+    """
+    Local bare mirrors of the watched repositories, at ORCHESTRATOR_GIT_MIRROR_DIR/<owner>/<repo>.git.
+    Mirrors are kept up to date outside the orchestrator (e.g. `git remote update` from cron);
+    lookups here never fetch, they report a commit as missing and callers fall back.
+    """
+
+    def __init__(self, root_dir: str = None):
+        self.root_dir = root_dir if root_dir is not None else os.getenv("ORCHESTRATOR_GIT_MIRROR_DIR")
+
+    def path(self, repo_name: str) -> Optional[str]:
+        if not self.root_dir or not repo_name:
+            return None
+        path = os.path.join(self.root_dir, f"{repo_name}.git")
+        return path if os.path.isdir(path) else None
+
+    def has_commits(self, repo_name: str, *shas: str) -> bool:
+        mirror = self.path(repo_name)
+        if not mirror or not all(shas):
+            return False
+        for sha in shas:
+            if subprocess.run(["git", "-C", mirror, "cat-file", "-e", f"{sha}^{{commit}}"],
+                              capture_output=True).returncode != 0:
+                return False
+        return True
+
+    def diff(self, repo_name: str, base_sha: str, head_sha: str, merge_base: bool = False) -> Optional[List[Tuple[str, str]]]:
+        """
+        (status letter, path) pairs changed between two commits, or None if the mirror lacks
+        either commit. With merge_base the diff starts at their merge base, as GitHub shows
+        pull requests.
+        """
+        if not self.has_commits(repo_name, base_sha, head_sha):
+            return None
+        revision = f"{base_sha}...{head_sha}" if merge_base else f"{base_sha}..{head_sha}"
+        with tracer.span("git diff", "git") as span:
+            result = subprocess.run(
+                ["git", "-C", self.path(repo_name), "diff", "--name-status", "--no-renames", revision],
+                check=True, capture_output=True, text=True,
+            )
+            span.set("stdout_bytes", len(result.stdout))
+        changes = []
+        for line in result.stdout.splitlines():
+            status, _, path = line.partition("\t")
+            if path:
+                changes.append((status[:1], path))
+        return changes
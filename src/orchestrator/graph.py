@@ -1,436 +1,332 @@
+import os
+import shutil
+import subprocess
+import time
+import secrets
+import operator
+import sqlite3
+import threading
+import uuid
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait as wait_futures
 import requests
 import json
 from typing import TypedDict, Annotated, List, Union, Optional, Dict, Any
 from langgraph.graph import StateGraph, END
+from langgraph.checkpoint.sqlite import SqliteSaver
 from langchain_core.messages import BaseMessage
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from orchestrator.state import GitEventSummary, CHECKPOINT_TYPES
+from orchestrator.payload_store import PayloadStore
+from orchestrator.artifact_store import ArtifactStore
+from orchestrator.pr_files import PullRequestFileResolver
+from orchestrator.git_mirror import GitMirror
+from orchestrator.docs_pipeline import IncrementalDocsPipeline, ModuleDocSetPipeline
+from mcp_server.tools.write_docs import DocsWriteTool
+from mcp_server.github_webhook import extract_task_from_git_context
+from orchestrator.changes import push_changes, files_of_kind, CODE, DOCS, CONFIG, REMOVED
+from orchestrator.tracing import tracer
 
 # --- MCP Server Configuration ---
-MCP_SERVER_URL = "http://localhost:8000"
+MCP_SERVER_URL = os.getenv("MCP_SERVER_URL", "http://localhost:8000")
+
+payload_store = PayloadStore()
+artifact_store = ArtifactStore()
+git_mirror = GitMirror()
+pr_file_resolver = PullRequestFileResolver(mirror=git_mirror)
 
 # --- 1. Define Graph State ---
+def _latest_status(current: str, update: str) -> str:
+    """Reducer for status_message: parallel branches may both report a status, keep the last one."""
+    return update
+
+def _merge_artifacts(current: Dict[str, str], update: Dict[str, str]) -> Dict[str, str]:
+    """Reducer for artifacts: each node adds the IDs of the outputs it produced."""
+    return {**(current or {}), **(update or {})}
+
 class GraphState(TypedDict):
     """
     Represents the state of our graph.
     """
     task_description: str
     task_id: Annotated[int, "The ID of the task in the MCP"]
-    status_message: Annotated[str, "A message about the current status of the operation"]
+    status_message: Annotated[str, "A message about the current status of the operation", _latest_status]
     agent_outcome: Annotated[Union[BaseMessage, List[BaseMessage]], "The outcome of any agent/tool execution"]
     file_path: Annotated[str, "The path to the file to be modified"]
     code_changes: Annotated[List[str], "A list of code changes made by the coding agent"]
     documentation: Annotated[str, "The generated documentation"]
     loom_checklist: Annotated[str, "The generated Loom checklist"]
     
-    # New GitHub-related fields
-    repo_url: Optional[str]
-    head_commit_id: Optional[str]
-    changed_files: Annotated[List[str], "Files changed in the commit/PR"]
-    github_event_type: Optional[str]
-    github_payload: Optional[Dict[str, Any]] # Store full payload for detailed analysis if needed
-    git_context: Optional[Dict[str, Any]] # Add git_context to GraphState
+    # GitHub event fields. The raw payload is kept in the PayloadStore, not in the state:
+    # git_context is only an input and is summarized into git_event by create_task_node.
+    git_event: Optional[GitEventSummary]
+    git_context: Optional[Dict[str, Any]]
+
+    # Trace ID shared by the spans of every node in this run
+    trace_id: Optional[str]
+
+    # Names of branch nodes that were abandoned after exceeding their timeout, or that raised
+    timed_out_nodes: Annotated[List[str], operator.add]
+    failed_nodes: Annotated[List[str], operator.add]
+
+    # Artifact store IDs of the run's outputs, by kind (code, docs, checklist)
+    artifacts: Annotated[Dict[str, str], _merge_artifacts]
 
 # --- 2. MCP API Client ---
+MCP_REQUEST_RETRIES = int(os.getenv("MCP_REQUEST_RETRIES", "2"))
+
+def _mcp_request(method: str, path: str, route: str = None, **kwargs) -> Any:
+    """
+    Sends a request to the MCP server inside a traced span named after the route template.
+    Requests that never reached the server (connection errors) are retried up to
+    MCP_REQUEST_RETRIES times.
+    """
+    route = route or path
+    kind = "neo4j" if route.startswith("/tools/neo4j_memory/") else "mcp"
+    with tracer.span(f"{method} {route}", kind) as span:
+        for attempt in range(MCP_REQUEST_RETRIES + 1):
+            try:
+                response = requests.request(method, f"{MCP_SERVER_URL}{path}", **kwargs)
+                break
+            except requests.ConnectionError:
+                if attempt == MCP_REQUEST_RETRIES:
+                    raise
+                time.sleep(0.2 * 2 ** attempt)
+        span.set("retries", attempt)
+        span.set("request_bytes", len(response.request.body or b""))
+        span.set("response_bytes", len(response.content))
+        span.set("http.status_code", response.status_code)
+        response.raise_for_status()
+        return response.json()
+
 def create_mcp_task(description: str, context: Dict[str, Any] = None) -> dict:
     """Creates a new task in the MCP server."""
     if context is None:
         context = {}
-    response = requests.post(f"{MCP_SERVER_URL}/tasks/", params={"task_description": description}, json={"context": context})
-    response.raise_for_status()
-    return response.json()
+    return _mcp_request("POST", "/tasks/", params={"task_description": description}, json={"context": context})
 
 def update_mcp_task_status(task_id: int, status: str) -> dict:
     """Updates the status of an existing task in the MCP server."""
-    response = requests.put(f"{MCP_SERVER_URL}/tasks/{task_id}", params={"status": status})
-    response.raise_for_status()
-    return response.json()
+    return _mcp_request("PUT", f"/tasks/{task_id}", route="/tasks/{task_id}", params={"status": status})
 
 def write_file(file_path: str, content: str) -> str:
     """Writes content to a file."""
-    response = requests.post(f"{MCP_SERVER_URL}/tools/generate_code/write_file", json={"file_path": file_path, "content": content})
-    response.raise_for_status()
-    return response.json()
+    return _mcp_request("POST", "/tools/generate_code/write_file", json={"file_path": file_path, "content": content})
 
 def add_neo4j_node(label: str, properties: dict) -> dict:
     """Adds a node to the Neo4j graph."""
-    response = requests.post(f"{MCP_SERVER_URL}/tools/neo4j_memory/add_node", json={"label": label, "properties": properties})
-    response.raise_for_status()
-    return response.json()
+    return _mcp_request("POST", "/tools/neo4j_memory/add_node", json={"label": label, "properties": properties})
 
 def add_neo4j_relationship(start_node_label: str, start_node_properties: dict,
                              end_node_label: str, end_node_properties: dict,
                              relationship_type: str) -> dict:
     """Adds a relationship between two nodes in the Neo4j graph."""
-    response = requests.post(f"{MCP_SERVER_URL}/tools/neo4j_memory/add_relationship", json={
+    return _mcp_request("POST", "/tools/neo4j_memory/add_relationship", json={
         "start_node_label": start_node_label,
         "start_node_properties": start_node_properties,
         "end_node_label": end_node_label,
         "end_node_properties": end_node_properties,
         "relationship_type": relationship_type
     })
-    response.raise_for_status()
-    return response.json()
-
-def generate_loom_checklist(task_description: str, code_changes: list[str]) -> str:
-    """Generates a Loom checklist."""
-    response = requests.post(f"{MCP_SERVER_URL}/tools/loom_helper/generate_demo_checklist", json={"task_description": task_description, "code_changes": code_changes})
-    response.raise_for_status()
-    return response.json()
-
-# --- Utility to extract task from GitHub context ---
-def extract_task_from_git_context(git_context: Dict[str, Any]) -> str:
-    event_type = git_context.get("event_type")
-    payload = git_context.get("payload", {})
-    repo_name = git_context.get("repo_name", "unknown/unknown")
-
-    if event_type == "push":
-        head_commit = payload.get("head_commit", {})
-        message = head_commit.get("message", f"New push to {repo_name}")
-        return f"Analyze recent push to {repo_name}: {message}"
-    elif event_type == "pull_request":
-        pr = payload.get("pull_request", {})
-        action = payload.get("action", "activity")
-        title = pr.get("title", f"Pull request activity in {repo_name}")
-        return f"Process pull request '{title}' ({action}) in {repo_name}"
-    elif event_type == "issues" and payload.get("action") == "opened":
-        issue = payload.get("issue", {})
-        title = issue.get("title", "New issue")
-        body = issue.get("body", "")
-        return f"Task from new issue '{title}': {body}"
-    else:
-        return f"Handle GitHub event '{event_type}' for {repo_name}"
-
-def get_changed_files_from_git_context(git_context: Dict[str, Any]) -> List[str]:
-    event_type = git_context.get("event_type")
-    payload = git_context.get("payload", {})
-    
-    changed_files = []
-    if event_type == "push":
-        head_commit = payload.get("head_commit", {})
-        changed_files.extend(head_commit.get("added", []))
-        changed_files.extend(head_commit.get("modified", []))
-        changed_files.extend(head_commit.get("removed", []))
-    elif event_type == "pull_request":
-        # For PRs, getting changed files usually requires an extra API call.
-        # For simplicity, we'll just indicate a PR event triggered changes.
-        # In a real scenario, you'd use PyGithub to fetch PR files.
-        changed_files.append(f"Pull Request #{payload.get('number')} changed files")
-    return list(set(changed_files)) # Remove duplicates
-
-# --- 3. Define Graph Nodes ---
-
-def create_task_node(state: GraphState) -> GraphState:
-
-    """Node to create a task in the MCP based on initial state or GitHub context."""
-
-    print(f"--- Node: create_task_node ---")
-
-    print(f"Input: task_description='{state['task_description']}', git_context_present={bool(state.get('git_context'))}")
-
-    
-
-    task_description = state["task_description"]
-
-    git_context = state.get("git_context")
-
-
-
-    if git_context:
-
-        task_description = extract_task_from_git_context(git_context)
-
-        # Pass GitHub context to MCP task for later retrieval
-
-        task = create_mcp_task(task_description, context=git_context)
-
-        
-
-        # Populate state with GitHub details
-
-        repo_url = git_context.get("repo_url")
-
-        head_commit_id = None
-
-        changed_files = get_changed_files_from_git_context(git_context)
-
-
-
-        if git_context["event_type"] == "push":
-
-            head_commit_id = git_context.get("payload", {}).get("head_commit", {}).get("id")
-
-        elif git_context["event_type"] == "pull_request":
-
-            head_commit_id = git_context.get("payload", {}).get("pull_request", {}).get("head", {}).get("sha")
-
-
-
-        state.update({
-
-            "task_id": task["id"],
-
-            "status_message": f"Task created from GitHub event: {task_description}",
-
-            "repo_url": repo_url,
-
-            "head_commit_id": head_commit_id,
-
-            "changed_files": changed_files,
-
-            "github_event_type": git_context["event_type"],
-
-            "github_payload": git_context["payload"]
-
-        })
-
-        print(f"Output: Task ID: {task['id']}, Status: {state['status_message']}, Repo: {repo_url}")
-
-    else:
-
-        task = create_mcp_task(task_description)
-
-        state.update({
-
-            "task_id": task["id"],
-
-            "status_message": f"Task created: {task_description}"
 
+def write_neo4j_batch(nodes: List[dict], relationships: List[dict]) -> dict:
+    """Sends several node and relationship writes to the Neo4j memory in one request."""
+    return _mcp_request("POST", "/tools/neo4j_memory/write_batch", json={"nodes": nodes, "relationships": relationships})
+
+class Neo4jBatch:
+    """Collects the writes of one node so they are sent as a single write_batch request."""
+
+    def __init__(self):
+        self.nodes: List[dict] = []
+        self.relationships: List[dict] = []
+
+    def add_node(self, label: str, properties: dict) -> None:
+        self.nodes.append({"label": label, "properties": properties})
+
+    def add_relationship(self, start_node_label: str, start_node_properties: dict,
+                         end_node_label: str, end_node_properties: dict,
+                         relationship_type: str) -> None:
+        self.relationships.append({
+            "start_node_label": start_node_label,
+            "start_node_properties": start_node_properties,
+            "end_node_label": end_node_label,
+            "end_node_properties": end_node_properties,
+            "relationship_type": relationship_type
         })
 
-        print(f"Output: Task ID: {task['id']}, Status: {state['status_message']}")
-
-    
-
-    return state
-
-
-
-class RouteQuery(BaseModel):
-
-    """Route a user query to the most relevant agent."""
-
-    datasource: str = Field(
-
-        description="Given a user query choose which agent to route it to.",
+    def send(self) -> dict:
+        return write_neo4j_batch(self.nodes, self.relationships)
 
-        enum=["coding", "docs", "general"],
+def index_symbols(repo: str, root_dir: str, changed_files: List[str] = None, removed_files: List[str] = ()) -> dict:
+    """Updates the MCP symbol index of a checked-out repository, re-parsing only changed files."""
+    return _mcp_request("POST", "/tools/symbol_index/index", json={
+        "repo": repo, "root_dir": root_dir, "changed_files": changed_files, "removed_files": list(removed_files),
+    })
 
-    )
+def get_file_symbols(repo: str, paths: List[str]) -> dict:
+    """The classes and functions defined in each of the given files, from the MCP symbol index."""
+    return _mcp_request("POST", "/tools/symbol_index/file_symbols", json={"repo": repo, "paths": paths})
 
+def get_file_context(paths: List[str], limit: int = 10) -> dict:
+    """Fetches related tasks, recent commits and co-changed files for the given paths from the Neo4j memory."""
+    return _mcp_request("POST", "/tools/neo4j_memory/context", json={"paths": paths, "limit": limit})
 
+def generate_loom_checklist(task_description: str, code_changes: list[str]) -> str:
+    """Generates a Loom checklist."""
+    return _mcp_request("POST", "/tools/loom_helper/generate_demo_checklist", json={"task_description": task_description, "code_changes": code_changes})
 
-import os
-import shutil
-import subprocess
-from agents.gemini_coder import GeminiCodingAgent
-import requests
-import json
-from typing import TypedDict, Annotated, List, Union, Optional, Dict, Any
-from langgraph.graph import StateGraph, END
-from langchain_core.messages import BaseMessage
-from langchain_core.prompts import ChatPromptTemplate
-from pydantic import BaseModel, Field
+def run_git(cmd: List[str], **kwargs) -> subprocess.CompletedProcess:
+    """Runs a git command inside a traced span."""
+    with tracer.span(f"git {cmd[1]}", "git") as span:
+        result = subprocess.run(cmd, check=True, capture_output=True, text=True, **kwargs)
+        span.set("stdout_bytes", len(result.stdout))
+        return result
 
-# --- MCP Server Configuration ---
-MCP_SERVER_URL = "http://localhost:8000"
+WORKSPACE_ROOT = "/tmp/mcp_workspace"
 
-# --- 1. Define Graph State ---
-class GraphState(TypedDict):
+def new_workspace(task_id: int) -> str:
     """
-    Represents the state of our graph.
+    Creates an empty checkout directory for one attempt of a task's agent node. Attempts get
+    their own directory, so a retry never deletes the checkout of an abandoned attempt that
+    is still running.
     """
-    task_description: str
-    task_id: Annotated[int, "The ID of the task in the MCP"]
-    status_message: Annotated[str, "A message about the current status of the operation"]
-    agent_outcome: Annotated[Union[BaseMessage, List[BaseMessage]], "The outcome of any agent/tool execution"]
-    file_path: Annotated[str, "The path to the file to be modified"]
-    code_changes: Annotated[List[str], "A list of code changes made by the coding agent"]
-    documentation: Annotated[str, "The generated documentation"]
-    loom_checklist: Annotated[str, "The generated Loom checklist"]
-    
-    # New GitHub-related fields
-    repo_url: Optional[str]
-    head_commit_id: Optional[str]
-    changed_files: Annotated[List[str], "Files changed in the commit/PR"]
-    github_event_type: Optional[str]
-    github_payload: Optional[Dict[str, Any]] # Store full payload for detailed analysis if needed
-    git_context: Optional[Dict[str, Any]] # Add git_context to GraphState
-
-# --- 2. MCP API Client ---
-def create_mcp_task(description: str, context: Dict[str, Any] = None) -> dict:
-    """Creates a new task in the MCP server."""
-    if context is None:
-        context = {}
-    response = requests.post(f"{MCP_SERVER_URL}/tasks/", params={"task_description": description}, json={"context": context})
-    response.raise_for_status()
-    return response.json()
-
-def update_mcp_task_status(task_id: int, status: str) -> dict:
-    """Updates the status of an existing task in the MCP server."""
-    response = requests.put(f"{MCP_SERVER_URL}/tasks/{task_id}", params={"status": status})
-    response.raise_for_status()
-    return response.json()
-
-def write_file(file_path: str, content: str) -> str:
-    """Writes content to a file."""
-    response = requests.post(f"{MCP_SERVER_URL}/tools/generate_code/write_file", json={"file_path": file_path, "content": content})
-    response.raise_for_status()
-    return response.json()
+    workspace_dir = os.path.join(WORKSPACE_ROOT, f"{task_id}-{uuid.uuid4().hex[:8]}")
+    os.makedirs(workspace_dir)
+    return workspace_dir
 
-def add_neo4j_node(label: str, properties: dict) -> dict:
-    """Adds a node to the Neo4j graph."""
-    response = requests.post(f"{MCP_SERVER_URL}/tools/neo4j_memory/add_node", json={"label": label, "properties": properties})
-    response.raise_for_status()
-    return response.json()
+class NodeCancelled(Exception):
+    """Raised inside a node that with_timeout has abandoned, at its next check_cancelled()."""
 
-def add_neo4j_relationship(start_node_label: str, start_node_properties: dict,
-                             end_node_label: str, end_node_properties: dict,
-                             relationship_type: str) -> dict:
-    """Adds a relationship between two nodes in the Neo4j graph."""
-    response = requests.post(f"{MCP_SERVER_URL}/tools/neo4j_memory/add_relationship", json={
-        "start_node_label": start_node_label,
-        "start_node_properties": start_node_properties,
-        "end_node_label": end_node_label,
-        "end_node_properties": end_node_properties,
-        "relationship_type": relationship_type
-    })
-    response.raise_for_status()
-    return response.json()
+# Set by with_timeout when it gives up on the node running in this context.
+_node_cancelled: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar("node_cancelled", default=None)
 
-def generate_loom_checklist(task_description: str, code_changes: list[str]) -> str:
-    """Generates a Loom checklist."""
-    response = requests.post(f"{MCP_SERVER_URL}/tools/loom_helper/generate_demo_checklist", json={"task_description": task_description, "code_changes": code_changes})
-    response.raise_for_status()
-    return response.json()
+def check_cancelled(step: str) -> None:
+    """
+    Stops a node that has been abandoned before its next side effect. Nodes that change
+    repositories call this before each of them (clone, write, commit, push).
+    """
+    cancelled = _node_cancelled.get()
+    if cancelled is not None and cancelled.is_set():
+        raise NodeCancelled(f"Node abandoned after its timeout, stopped before {step}.")
 
-# --- Utility to extract task from GitHub context ---
-def extract_task_from_git_context(git_context: Dict[str, Any]) -> str:
+# --- Utilities to read the GitHub context ---
+def get_file_changes_from_git_context(git_context: Dict[str, Any]) -> Dict[str, str]:
+    """
+    The net change (added, modified or removed) of each file touched by the event: across
+    all commits of a push, or the files of a pull request.
+    """
     event_type = git_context.get("event_type")
     payload = git_context.get("payload", {})
-    repo_name = git_context.get("repo_name", "unknown/unknown")
+    repo_name = payload.get("repository", {}).get("full_name") or git_context.get("repo_name")
 
     if event_type == "push":
-        head_commit = payload.get("head_commit", {})
-        message = head_commit.get("message", f"New push to {repo_name}")
-        return f"Analyze recent push to {repo_name}: {message}"
-    elif event_type == "pull_request":
+        return push_changes(payload, repo_name, git_mirror)
+    if event_type == "pull_request":
         pr = payload.get("pull_request", {})
-        action = payload.get("action", "activity")
-        title = pr.get("title", f"Pull request activity in {repo_name}")
-        return f"Process pull request '{title}' ({action}) in {repo_name}"
-    elif event_type == "issues" and payload.get("action") == "opened":
-        issue = payload.get("issue", {})
-        title = issue.get("title", "New issue")
-        body = issue.get("body", "")
-        return f"Task from new issue '{title}': {body}"
-    else:
-        return f"Handle GitHub event '{event_type}' for {repo_name}"
+        try:
+            return pr_file_resolver.resolve(
+                repo_name,
+                payload.get("number"),
+                head_sha=pr.get("head", {}).get("sha"),
+                base_sha=pr.get("base", {}).get("sha"),
+            )
+        except Exception as e:
+            print(f"Could not resolve the files of {repo_name}#{payload.get('number')}: {e}")
+            return {}
+    return {}
 
 def get_changed_files_from_git_context(git_context: Dict[str, Any]) -> List[str]:
+    return sorted(get_file_changes_from_git_context(git_context))
+
+def summarize_git_context(git_context: Dict[str, Any]) -> GitEventSummary:
+    """
+    Extracts the fields the graph needs from a GitHub context and stores the raw payload
+    once in the payload store, so only its ID travels with the task.
+    """
     event_type = git_context.get("event_type")
     payload = git_context.get("payload", {})
-    
-    changed_files = []
+    head_sha = base_sha = None
     if event_type == "push":
-        head_commit = payload.get("head_commit", {})
-        changed_files.extend(head_commit.get("added", []))
-        changed_files.extend(head_commit.get("modified", []))
-        changed_files.extend(head_commit.get("removed", []))
+        head_sha = (payload.get("head_commit") or {}).get("id") or payload.get("after")
+        base_sha = payload.get("before")
     elif event_type == "pull_request":
-        # For PRs, getting changed files usually requires an extra API call.
-        # For simplicity, we'll just indicate a PR event triggered changes.
-        # In a real scenario, you'd use PyGithub to fetch PR files.
-        changed_files.append(f"Pull Request #{payload.get('number')} changed files")
-    return list(set(changed_files)) # Remove duplicates
+        head_sha = payload.get("pull_request", {}).get("head", {}).get("sha")
+        base_sha = payload.get("pull_request", {}).get("base", {}).get("sha")
+    changes = get_file_changes_from_git_context(git_context)
+    return GitEventSummary(
+        event_type=event_type,
+        repo_name=payload.get("repository", {}).get("full_name") or git_context.get("repo_name"),
+        repo_url=git_context.get("repo_url"),
+        head_sha=head_sha,
+        changed_files=tuple(sorted(changes)),
+        pr_number=payload.get("number") if event_type == "pull_request" else None,
+        payload_id=git_context.get("payload_id") or (payload_store.put(payload) if payload else None),
+        base_sha=base_sha,
+        code_files=tuple(files_of_kind(changes, CODE)),
+        docs_files=tuple(files_of_kind(changes, DOCS)),
+        config_files=tuple(files_of_kind(changes, CONFIG)),
+        removed_files=tuple(sorted(path for path, status in changes.items() if status == REMOVED)),
+    )
 
 # --- 3. Define Graph Nodes ---
 
 def create_task_node(state: GraphState) -> GraphState:
-
-    """Node to create a task in the MCP based on initial state or GitHub context."""
-
+    """
+    Node to create a task in the MCP based on initial state or GitHub context.
+    If the caller already allocated a task (checkpointed runs are keyed by task ID),
+    that task is reused instead of creating a new one.
+    """
     print(f"--- Node: create_task_node ---")
-
-    print(f"Input: task_description='{state['task_description']}', git_context_present={bool(state.get('git_context'))}")
-
-    
+    print(f"Input: task_description='{state['task_description']}', task_id={state.get('task_id')}, git_context_present={bool(state.get('git_context') or state.get('git_event'))}")
 
     task_description = state["task_description"]
-
+    git_event = state.get("git_event")
     git_context = state.get("git_context")
-
-
-
-    if git_context:
-
-        task_description = extract_task_from_git_context(git_context)
-
-        # Pass GitHub context to MCP task for later retrieval
-
-        task = create_mcp_task(task_description, context=git_context)
-
-        
-
-        # Populate state with GitHub details
-
-        repo_url = git_context.get("repo_url")
-
-        head_commit_id = None
-
-        changed_files = get_changed_files_from_git_context(git_context)
-
-
-
-        if git_context["event_type"] == "push":
-
-            head_commit_id = git_context.get("payload", {}).get("head_commit", {}).get("id")
-
-        elif git_context["event_type"] == "pull_request":
-
-            head_commit_id = git_context.get("payload", {}).get("pull_request", {}).get("head", {}).get("sha")
-
-
-
-        state.update({
-
+    existing_task_id = state.get("task_id")
+
+    if git_context and "payload" not in git_context and git_context.get("payload_id"):
+        # Runs queued by the webhook endpoint only carry the ID of the stored payload.
+        git_context = {**git_context, "payload": payload_store.get(git_context["payload_id"])}
+    if git_context and not git_event:
+        git_event = summarize_git_context(git_context)
+
+    if git_event:
+        if git_context:
+            task_description = extract_task_from_git_context(git_context)
+        # Only the compact summary goes to the MCP task; the payload is referenced by ID.
+        task = {"id": existing_task_id} if existing_task_id else create_mcp_task(task_description, context=git_event.to_task_context())
+        update = {
             "task_id": task["id"],
-
             "status_message": f"Task created from GitHub event: {task_description}",
-
-            "repo_url": repo_url,
-
-            "head_commit_id": head_commit_id,
-
-            "changed_files": changed_files,
-
-            "github_event_type": git_context["event_type"],
-
-            "github_payload": git_context["payload"]
-
-        })
-
-        print(f"Output: Task ID: {task['id']}, Status: {state['status_message']}, Repo: {repo_url}")
-
+            "git_event": git_event,
+            "git_context": None,
+        }
+        print(f"Output: Task ID: {task['id']}, Status: {update['status_message']}, Repo: {git_event.repo_url}")
     else:
-
-        task = create_mcp_task(task_description)
-
-        state.update({
-
+        task = {"id": existing_task_id} if existing_task_id else create_mcp_task(task_description)
+        update = {
             "task_id": task["id"],
-
             "status_message": f"Task created: {task_description}"
+        }
+        print(f"Output: Task ID: {task['id']}, Status: {update['status_message']}")
 
-        })
-
-        print(f"Output: Task ID: {task['id']}, Status: {state['status_message']}")
+    return update
 
-    
 
-    return state
+def _event_type(state: GraphState) -> Optional[str]:
+    git_event = state.get("git_event")
+    return git_event.event_type if git_event else None
 
+def _repo_url(state: GraphState) -> Optional[str]:
+    git_event = state.get("git_event")
+    return git_event.repo_url if git_event else None
 
+def affected_files(git_event: GitEventSummary, *kinds: str) -> List[str]:
+    """Changed files of the given kinds that still exist, the only files an agent is given."""
+    files_by_kind = {CODE: git_event.code_files, DOCS: git_event.docs_files, CONFIG: git_event.config_files}
+    return [path for kind in kinds for path in files_by_kind[kind]]
 
 class RouteQuery(BaseModel):
 
@@ -452,7 +348,7 @@ def planner_node(state: GraphState) -> GraphState:
 
     print("--- Node: planner_node ---")
 
-    print(f"Input: task_description='{state['task_description']}', github_event_type='{state.get('github_event_type')}'")
+    print(f"Input: task_description='{state['task_description']}', github_event_type='{_event_type(state)}'")
 
     
 
@@ -486,7 +382,7 @@ def planner_node(state: GraphState) -> GraphState:
 
     # Enhanced routing based on GitHub event type or task description
 
-    event_type = state.get("github_event_type")
+    event_type = _event_type(state)
 
     if event_type == "pull_request" or event_type == "issues":
 
@@ -494,21 +390,39 @@ def planner_node(state: GraphState) -> GraphState:
 
         print(f"Routing: Coding Agent (due to {event_type} event)")
 
+    elif event_type == "push":
+
+        # Pushes are routed by what their commits changed: code or config to the coding
+
+        # agent, docs alone to the docs agent, and nothing (e.g. a deleted branch) to neither.
+
+        git_event = state["git_event"]
+
+        if git_event.code_files or git_event.config_files:
+
+            route = "coding"
+
+        elif git_event.docs_files:
+
+            route = "docs"
+
+        else:
+
+            route = "general"
+
+        print(f"Routing: {route} (push changed {len(git_event.code_files)} code, {len(git_event.docs_files)} docs, {len(git_event.config_files)} config files)")
+
     elif "code" in description or "implement" in description or "fix" in description:
 
         route = "coding"
 
         print(f"Routing: Coding Agent")
 
-    elif "docs" in description or "documentation" in description or event_type == "push":
+    elif "docs" in description or "documentation" in description:
 
-        # Pushes often mean documentation updates or general code commits that need docs
+        route = "docs"
 
-        # More sophisticated logic would inspect commit messages/diffs
-
-        route = "docs" if "docs" in description or "documentation" in description else "coding"
-
-        print(f"Routing: {'Docs Agent' if route == 'docs' else 'Coding Agent'} (based on description/push event)")
+        print(f"Routing: Docs Agent (based on description)")
 
     else:
 
@@ -520,18 +434,18 @@ def planner_node(state: GraphState) -> GraphState:
 
     print(f"Output: agent_outcome='{route}'")
 
-    return {**state, "agent_outcome": route}
+    return {"agent_outcome": route}
 
 
 def coding_agent_node(state: GraphState) -> GraphState:
     """Node for the coding agent."""
     print("--- Node: coding_agent_node ---")
-    print(f"Input: task_description='{state['task_description']}', repo_url='{state.get('repo_url')}'")
+    print(f"Input: task_description='{state['task_description']}', repo_url='{_repo_url(state)}'")
 
     # === REAL AGENT IMPLEMENTATION ===
 
     # 1. Get repository URL from state
-    repo_url = state.get("repo_url")
+    repo_url = _repo_url(state)
     if not repo_url:
         # IMPORTANT: Replace this placeholder with the actual HTTPS URL of your new project's repository
         repo_url = "https://github.com/ishant721/MCP-Testing-..git" 
@@ -539,18 +453,16 @@ def coding_agent_node(state: GraphState) -> GraphState:
         # In a real scenario, you might want to raise an error if the URL is missing.
         # For this educational step, we'll proceed with a placeholder.
 
-    # 2. Create a temporary workspace
-    # We use the task_id to create a unique directory for this task.
-    workspace_dir = os.path.join("/tmp/mcp_workspace", str(state["task_id"]))
-    if os.path.exists(workspace_dir):
-        shutil.rmtree(workspace_dir)
-    os.makedirs(workspace_dir)
+    # 2. Create a temporary workspace for this attempt
+    workspace_dir = new_workspace(state["task_id"])
     print(f"Created temporary workspace: {workspace_dir}")
+    artifacts = {}
 
     try:
         # 3. Clone the repository
+        check_cancelled("clone")
         print(f"Cloning repository: {repo_url}")
-        subprocess.run(["git", "clone", repo_url, workspace_dir], check=True, capture_output=True, text=True)
+        run_git(["git", "clone", repo_url, workspace_dir])
 
         # 4. Define the task for the Gemini Coder
         # The task is derived from the state's task_description.
@@ -558,15 +470,54 @@ def coding_agent_node(state: GraphState) -> GraphState:
         
         # 5. Instantiate and run the Gemini Coder Agent
         print("Initializing Gemini Coder Agent...")
+        # Imported here: the Gemini SDK is slow to import and only coding runs need it.
+        from agents.gemini_coder import GeminiCodingAgent
         coder_agent = GeminiCodingAgent() # Assumes Gemini API key is configured in the environment
         # For now, we'll assume the agent generates code for a single file `fibonacci.py`
         # A more advanced agent would return the file name as well.
         file_path = os.path.join(workspace_dir, "fibonacci.py")
-        print(f"Generating code for task: '{coding_task}' in file '{file_path}'")
-        generated_code = coder_agent.generate_code(coding_task, file_path=file_path)
-        print("Code generation complete.")
+        # History from the memory graph is optional context; generation goes ahead without it.
+        git_event = state.get("git_event")
+        context_paths = ["fibonacci.py", *(affected_files(git_event, CODE, CONFIG)[:20] if git_event else ())]
+        try:
+            history = get_file_context(context_paths)
+        except Exception as e:
+            print(f"Could not fetch file history from Neo4j memory: {e}")
+            history = None
+        # The symbol index is updated from this checkout, then gives the definitions in the
+        # affected files without the prompt carrying their source.
+        repo_key = (git_event.repo_name if git_event else None) or repo_url
+        try:
+            if git_event and (git_event.code_files or git_event.removed_files):
+                index_symbols(repo_key, workspace_dir, list(git_event.code_files), git_event.removed_files)
+            else:
+                index_symbols(repo_key, workspace_dir)
+            symbols = get_file_symbols(repo_key, context_paths)
+            if symbols:
+                history = {**(history or {}), "symbols": symbols}
+        except Exception as e:
+            print(f"Could not update the symbol index: {e}")
+        # Code already generated for the same task against the same commit (e.g. by an
+        # earlier attempt whose push failed) is reused instead of generated again.
+        if git_event and git_event.head_sha:
+            code_ref = json.dumps(["code", repo_url, git_event.head_sha, "fibonacci.py", coding_task])
+        else:
+            code_ref = json.dumps(["code", state["task_id"], "fibonacci.py", coding_task])
+        code_artifact = artifact_store.lookup(code_ref)
+        if code_artifact:
+            print(f"Reusing generated code {code_artifact[:12]} for task: '{coding_task}'")
+            generated_code = artifact_store.get(code_artifact)
+        else:
+            print(f"Generating code for task: '{coding_task}' in file '{file_path}'")
+            with tracer.span("gemini.generate_code", "llm", prompt_chars=len(coding_task)) as span:
+                generated_code = coder_agent.generate_code(coding_task, file_path=file_path, history=history)
+                span.set("response_chars", len(generated_code))
+            code_artifact = artifact_store.put(generated_code, ref=code_ref)
+            print("Code generation complete.")
+        artifacts = {"code": code_artifact}
 
         # 6. Write the generated code to a file
+        check_cancelled("write")
         print(f"Writing generated code to: {file_path}")
         with open(file_path, "w") as f:
             f.write(generated_code)
@@ -579,29 +530,30 @@ def coding_agent_node(state: GraphState) -> GraphState:
             ["git", "push"]
         ]
         for cmd in git_commands:
-            result = subprocess.run(cmd, cwd=workspace_dir, check=True, capture_output=True, text=True)
+            check_cancelled(f"git {cmd[1]}")
+            result = run_git(cmd, cwd=workspace_dir)
             print(f"Ran command: '{' '.join(cmd)}'. Output:\n{result.stdout}\n{result.stderr}")
         
         print("Changes pushed successfully.")
         
         # Update state with the outcome
         new_state = {
-            **state,
             "code_changes": [f"Created fibonacci.py with the requested implementations."],
-            "status_message": "Autonomous code generation and push successful."
+            "status_message": "Autonomous code generation and push successful.",
+            "artifacts": artifacts,
         }
 
     except subprocess.CalledProcessError as e:
         print(f"Error during Git operation: {e.stderr}")
         new_state = {
-            **state,
-            "status_message": f"Error during Git operation: {e.stderr}"
+            "status_message": f"Error during Git operation: {e.stderr}",
+            "artifacts": artifacts,
         }
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
         new_state = {
-            **state,
-            "status_message": f"An unexpected error occurred: {e}"
+            "status_message": f"An unexpected error occurred: {e}",
+            "artifacts": artifacts,
         }
     finally:
         # 8. Clean up the workspace
@@ -612,280 +564,437 @@ def coding_agent_node(state: GraphState) -> GraphState:
     return new_state
 
 
-def docs_agent_node(state: GraphState) -> GraphState:
-
-    """Node for the docs agent."""
+# "single": one architecture document with a section per module, at DOCS_PATH.
+# "modules": a page per module plus directory indexes, under DOCS_PATH.
+DOCS_LAYOUT = os.getenv("ORCHESTRATOR_DOCS_LAYOUT", "single")
+DOCS_PATH = os.getenv("ORCHESTRATOR_DOCS_PATH", "docs/modules" if DOCS_LAYOUT == "modules" else "docs/architecture.md")
 
+def docs_agent_node(state: GraphState) -> GraphState:
+    """Node for the docs agent: brings the repository's sectioned architecture document up to date."""
     print("--- Node: docs_agent_node ---")
+    print(f"Input: task_description='{state['task_description']}', repo_url='{_repo_url(state)}'")
 
-    print(f"Input: task_description='{state['task_description']}', repo_url='{state.get('repo_url')}'")
-
-
-
-    # In a real scenario, this would involve a call to the Docs Agent
-
-    # For now, we'll just simulate generating a README
-
-    readme_content = f"This is a sample README generated by the docs agent via API call based on GitHub event. Task: {state['task_description']}.";
-
-    # write_file("README.md", readme_content) # Simulate documentation generation, commented out to avoid polluting repo
-
-    
-
-    new_state = {
-
-        **state,
-
-        "documentation": readme_content,
+    repo_url = _repo_url(state)
+    if not repo_url:
+        update = {"documentation": "", "status_message": "No repository to document."}
+        print(f"Output: status_message='{update['status_message']}', documentation_length=0")
+        return update
 
-        "status_message": "Documentation generated by docs agent"
+    workspace_dir = new_workspace(state["task_id"])
 
-    }
+    try:
+        check_cancelled("clone")
+        print(f"Cloning repository: {repo_url}")
+        run_git(["git", "clone", repo_url, workspace_dir])
+
+        # Imported here: the Gemini SDK is slow to import and only docs runs need it.
+        from agents.docs_agent import DocsAgent
+        pipeline_class = ModuleDocSetPipeline if DOCS_LAYOUT == "modules" else IncrementalDocsPipeline
+        pipeline = pipeline_class(DocsAgent())
+        # Only sections whose module changed since the docs were last written are regenerated.
+        result = pipeline.run(workspace_dir, doc_path=DOCS_PATH, task_description=state["task_description"])
+        print(f"Regenerated {len(result['regenerated'])} of {result['sections']} sections, removed {len(result['removed'])}.")
+
+        # The document and its manifest, or the doc set directory (whose manifest is inside it).
+        if DOCS_LAYOUT == "modules":
+            main_page, doc_paths = os.path.join(workspace_dir, DOCS_PATH, "index.md"), [DOCS_PATH]
+        else:
+            main_page, doc_paths = os.path.join(workspace_dir, DOCS_PATH), [DOCS_PATH, DocsWriteTool.manifest_path(DOCS_PATH)]
+        documentation = ""
+        if os.path.exists(main_page):
+            with open(main_page) as f:
+                documentation = f.read()
+        # Rewriting the same content leaves nothing to commit, and git commit would fail.
+        changed = result["written"] and run_git(["git", "status", "--porcelain", "--", *doc_paths], cwd=workspace_dir).stdout.strip()
+        if changed:
+            git_commands = [
+                # -A also stages the pages of deleted modules.
+                ["git", "add", "-A", *doc_paths],
+                ["git", "commit", "-m", f"MCP: Update {len(result['regenerated'])} documentation sections"],
+                ["git", "push"],
+            ]
+            for cmd in git_commands:
+                check_cancelled(f"git {cmd[1]}")
+                run_git(cmd, cwd=workspace_dir)
+            status = f"Documentation updated: {len(result['regenerated'])} sections regenerated, {len(result['removed'])} removed."
+        elif result["failed"]:
+            status = f"Documentation not updated: generating {len(result['failed'])} sections failed."
+        else:
+            status = "Documentation already up to date."
+        if changed and result["failed"]:
+            status += f" {len(result['failed'])} failed and will be retried."
+        update = {"documentation": documentation, "status_message": status}
+        if documentation:
+            update["artifacts"] = {"docs": artifact_store.put(documentation)}
 
-    print(f"Output: status_message='{new_state['status_message']}', documentation_length={len(new_state['documentation'])}")
+    except subprocess.CalledProcessError as e:
+        print(f"Error during Git operation: {e.stderr}")
+        update = {"documentation": "", "status_message": f"Error during Git operation: {e.stderr}"}
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+        update = {"documentation": "", "status_message": f"An unexpected error occurred: {e}"}
+    finally:
+        shutil.rmtree(workspace_dir)
 
-    return new_state
+    print(f"Output: status_message='{update['status_message']}', documentation_length={len(update['documentation'])}")
+    return update
 
 
 def store_context_node(state: GraphState) -> GraphState:
-
     """Node to store the context of the task in Neo4j."""
-
     print("--- Node: store_context_node ---")
-
     print(f"Input: task_id={state['task_id']}, task_description='{state['task_description']}', agent_outcome='{state['agent_outcome']}'")
 
-
-
     task_id = state["task_id"]
-
     task_description = state["task_description"]
-
-    
+    git_event = state.get("git_event")
+    # Writes are collected and sent in one request; the MCP server queues them behind a
+    # write-behind buffer, so this node no longer waits on Neo4j.
+    neo4j = Neo4jBatch()
 
     # Add a node for the task
-
-    add_neo4j_node("Task", {"id": task_id, "description": task_description, "status": state["status_message"]})
-
+    # updated_at (epoch seconds) is what the memory graph's retention job ages tasks out by.
+    # Outputs are referenced by artifact ID; their content stays in the artifact store.
+    artifact_refs = {f"{kind}_artifact": artifact_id for kind, artifact_id in (state.get("artifacts") or {}).items()}
+    neo4j.add_node("Task", {"id": task_id, "description": task_description, "status": state["status_message"], "updated_at": int(time.time()), **artifact_refs})
     print(f"Logged Task {task_id} to Neo4j.")
 
-
-
     # Store GitHub context if present
-
-    if state.get("github_payload"):
-
-        repo_name = state["github_payload"].get("repository", {}).get("full_name")
-
+    if git_event and git_event.repo_name:
+        repo_name = git_event.repo_name
         # Extract owner/repo from full_name
-
         repo_parts = repo_name.split('/')
-
         repo_owner = repo_parts[0] if len(repo_parts) > 1 else repo_name
-
         repo_short_name = repo_parts[1] if len(repo_parts) > 1 else repo_name
 
-        
-
         # Add Repo Node
-
-        add_neo4j_node("Repository", {"name": repo_name, "url": state["repo_url"], "owner": repo_owner, "short_name": repo_short_name})
-
-        add_neo4j_relationship(
-
+        neo4j.add_node("Repository", {"name": repo_name, "url": git_event.repo_url, "owner": repo_owner, "short_name": repo_short_name})
+        neo4j.add_relationship(
             "Task", {"id": task_id},
-
-            "Repository", {"url": state["repo_url"]},
-
+            "Repository", {"url": git_event.repo_url},
             "RELATED_TO_REPO"
-
         )
-
         print(f"Logged Repository {repo_name} to Neo4j.")
 
-
-
-        if state.get("head_commit_id"):
-
-            commit_id_short = state["head_commit_id"][:7]
-
-            add_neo4j_node("Commit", {"sha": state["head_commit_id"], "repo_url": state["repo_url"], "event_type": state["github_event_type"]})
-
-            add_neo4j_relationship(
-
+        if git_event.head_sha:
+            commit_id_short = git_event.head_sha[:7]
+            neo4j.add_node("Commit", {"sha": git_event.head_sha, "repo_url": git_event.repo_url, "event_type": git_event.event_type})
+            neo4j.add_relationship(
                 "Task", {"id": task_id},
-
-                "Commit", {"sha": state["head_commit_id"]},
-
+                "Commit", {"sha": git_event.head_sha},
                 "TRIGGERED_BY_COMMIT"
-
             )
-
             print(f"Logged Commit {commit_id_short} to Neo4j.")
 
-        
-
-        for changed_file_path in state["changed_files"]:
-
-            add_neo4j_node("File", {"path": changed_file_path, "repo_url": state["repo_url"]})
-
-            add_neo4j_relationship(
-
+        for changed_file_path in git_event.changed_files:
+            neo4j.add_node("File", {"path": changed_file_path, "repo_url": git_event.repo_url})
+            neo4j.add_relationship(
                 "Task", {"id": task_id},
-
                 "File", {"path": changed_file_path},
-
                 "AFFECTS_FILE"
-
             )
-
-        print(f"Logged {len(state['changed_files'])} changed files to Neo4j.")
-
-
+        print(f"Logged {len(git_event.changed_files)} changed files to Neo4j.")
 
     if state["agent_outcome"] == "coding" and state["code_changes"]:
-
         for change_summary in state["code_changes"]:
-
             # Example of logging generated/modified files by agent
-
-            add_neo4j_node("GeneratedFile", {"path": change_summary, "task_id": task_id}) # Use a unique ID for the file
-
-            add_neo4j_relationship(
-
+            neo4j.add_node("GeneratedFile", {"path": change_summary, "task_id": task_id}) # Use a unique ID for the file
+            neo4j.add_relationship(
                 "Task", {"id": task_id},
-
                 "GeneratedFile", {"path": change_summary},
-
                 "GENERATED_CODE"
-
             )
-
         print(f"Logged coding agent changes to Neo4j.")
 
-            
-
     elif state["agent_outcome"] == "docs" and state["documentation"]:
-
-        # Add a node for the documentation
-
-        add_neo4j_node("DocumentationOutput", {"content_preview": state["documentation"][:100], "task_id": task_id})
-
-        add_neo4j_relationship(
-
+        # Add a node for the documentation, one per task, merged on its id
+        docs_id = f"task-{task_id}"
+        docs_properties = {"id": docs_id, "content_preview": state["documentation"][:100], "task_id": task_id}
+        if "docs_artifact" in artifact_refs:
+            docs_properties["artifact"] = artifact_refs["docs_artifact"]
+        neo4j.add_node("DocumentationOutput", docs_properties)
+        neo4j.add_relationship(
             "Task", {"id": task_id},
-
-            "DocumentationOutput", {"content_preview": state["documentation"][:100]},
-
+            "DocumentationOutput", {"id": docs_id},
             "GENERATED_DOCS"
-
         )
-
         print(f"Logged documentation output to Neo4j.")
 
-        
-
-    new_state = {**state, "status_message": "Context stored in Neo4j"}
-
-    print(f"Output: status_message='{new_state['status_message']}'")
+    neo4j.send()
+    print(f"Sent {len(neo4j.nodes)} nodes and {len(neo4j.relationships)} relationships to Neo4j memory.")
 
-    return new_state
+    # Runs in parallel with loom_checklist, so only the keys this branch owns are returned.
+    update = {"status_message": "Context stored in Neo4j"}
+    print(f"Output: status_message='{update['status_message']}'")
+    return update
 
 
 def loom_checklist_node(state: GraphState) -> GraphState:
-
     """Node to generate a Loom checklist."""
-
     print("--- Node: loom_checklist_node ---")
-
     print(f"Input: task_description='{state['task_description']}', code_changes={state['code_changes']}")
-
-    checklist = generate_loom_checklist(state["task_description"], state["code_changes"])
-
-    new_state = {**state, "loom_checklist": checklist, "status_message": "Loom checklist generated"}
-
-    print(f"Output: status_message='{new_state['status_message']}', loom_checklist_length={len(new_state['loom_checklist'])}")
-
-    return new_state
+    # A checklist for the same task and changes is reused from the artifact store.
+    checklist_ref = json.dumps(["checklist", state["task_description"], state["code_changes"]])
+    checklist_artifact = artifact_store.lookup(checklist_ref)
+    if checklist_artifact:
+        checklist = artifact_store.get(checklist_artifact)
+    else:
+        checklist = generate_loom_checklist(state["task_description"], state["code_changes"])
+        checklist_artifact = artifact_store.put(checklist, ref=checklist_ref)
+    # Runs in parallel with store_context, so only the keys this branch owns are returned.
+    update = {"loom_checklist": checklist, "status_message": "Loom checklist generated", "artifacts": {"checklist": checklist_artifact}}
+    print(f"Output: status_message='{update['status_message']}', loom_checklist_length={len(checklist)}")
+    return update
 
 
 def status_update_node(state: GraphState) -> GraphState:
-
-    """Node to update the task status in the MCP."""
-
+    """Node to update the task status in the MCP. Joins the store_context and loom_checklist branches."""
     print("--- Node: status_update_node ---")
-
-    print(f"Input: task_id={state['task_id']}, current_status='{state['status_message']}'")
-
+    print(f"Input: task_id={state['task_id']}, current_status='{state['status_message']}', timed_out_nodes={state.get('timed_out_nodes', [])}")
     update_mcp_task_status(state["task_id"], "completed")
+    status_message = "Task status updated to completed in MCP"
+    # The checklist is produced in parallel with store_context, so its reference is added here.
+    checklist_artifact = (state.get("artifacts") or {}).get("checklist")
+    if checklist_artifact:
+        try:
+            neo4j = Neo4jBatch()
+            neo4j.add_node("Task", {"id": state["task_id"], "checklist_artifact": checklist_artifact})
+            neo4j.send()
+        except Exception as e:
+            print(f"Could not record the checklist artifact in Neo4j memory: {e}")
+    if state.get("timed_out_nodes"):
+        status_message += f" (timed out: {', '.join(state['timed_out_nodes'])})"
+    if state.get("failed_nodes"):
+        status_message += f" (failed: {', '.join(state['failed_nodes'])})"
+    print(f"Output: status_message='{status_message}'")
+    return {"status_message": status_message}
+
+
+# --- 4. Node Timeouts ---
+# Per-node wall-clock limits in seconds. A node that overruns its limit is abandoned:
+# branch nodes fall back to a timeout status so the join can proceed, while nodes on
+# the main path fail the run. Branch nodes that raise fall back to a failure status too.
+DEFAULT_NODE_TIMEOUT = float(os.getenv("ORCHESTRATOR_NODE_TIMEOUT", "60"))
+NODE_TIMEOUTS = {
+    "create_task": DEFAULT_NODE_TIMEOUT,
+    "planner": DEFAULT_NODE_TIMEOUT,
+    "coding_agent": float(os.getenv("ORCHESTRATOR_AGENT_TIMEOUT", "900")),
+    "docs_agent": float(os.getenv("ORCHESTRATOR_AGENT_TIMEOUT", "900")),
+    "store_context": float(os.getenv("ORCHESTRATOR_STORE_CONTEXT_TIMEOUT", "30")),
+    "loom_checklist": DEFAULT_NODE_TIMEOUT,
+    "status_update": DEFAULT_NODE_TIMEOUT,
+}
+
+# Threads cannot be cancelled, so an abandoned node keeps running, and holds its worker,
+# until it returns on its own or stops at its next check_cancelled(). Each run has at
+# most two nodes in flight (the parallel branches); the default pool leaves as many
+# workers again for abandoned nodes of every concurrent run, so they cannot starve new ones.
+_node_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv(
+        "ORCHESTRATOR_NODE_WORKERS", str(max(16, 4 * int(os.getenv("ORCHESTRATOR_MAX_CONCURRENT_RUNS", "4"))))
+    )),
+    thread_name_prefix="orchestrator-node",
+)
 
-    new_state = {**state, "status_message": "Task status updated to completed in MCP"}
-
-    print(f"Output: status_message='{new_state['status_message']}'")
-
-    return new_state
-
-
-
+def _branch_timeout_update(node_name: str, timeout: float) -> Dict[str, Any]:
+    return {
+        "status_message": f"{node_name} timed out after {timeout:.0f}s",
+        "timed_out_nodes": [node_name],
+    }
 
-# --- 4. Build the Graph ---
+def _branch_failure_update(node_name: str, error: Exception) -> Dict[str, Any]:
+    return {
+        "status_message": f"{node_name} failed: {error}",
+        "failed_nodes": [node_name],
+    }
 
+# Abandoned nodes that have not stopped yet, by task ID. A run of the task does not start
+# again until they have: they may still be pushing from their workspace.
+_abandoned_nodes: Dict[int, Dict[str, Future]] = {}
+_abandoned_lock = threading.Lock()
+
+def _abandon(task_id: int, node_name: str, future: Future) -> None:
+    with _abandoned_lock:
+        _abandoned_nodes.setdefault(task_id, {})[node_name] = future
+
+    def forget(_):
+        with _abandoned_lock:
+            nodes = _abandoned_nodes.get(task_id, {})
+            if nodes.get(node_name) is future:
+                del nodes[node_name]
+            if not nodes:
+                _abandoned_nodes.pop(task_id, None)
+    future.add_done_callback(forget)
+
+def abandoned_nodes(task_id: int) -> List[str]:
+    """The nodes of a task's run that timed out in this process and are still running."""
+    with _abandoned_lock:
+        return sorted(_abandoned_nodes.get(task_id, {}))
+
+def wait_for_abandoned_nodes(task_id: int, timeout: float = None) -> bool:
+    """Waits until the abandoned nodes of a task have stopped. Returns False on timeout."""
+    with _abandoned_lock:
+        futures = list(_abandoned_nodes.get(task_id, {}).values())
+    return not wait_futures(futures, timeout=timeout).not_done
+
+def with_timeout(node_name: str, node_fn, soft: bool = False):
+    """
+    Wraps a graph node so that it is abandoned after NODE_TIMEOUTS[node_name] seconds.
+    Soft nodes return a timeout or failure status update instead of raising, so they never
+    gate the run's completion. An abandoned node is told to stop (see check_cancelled) and
+    is tracked until it has, see abandoned_nodes().
+    """
+    def run_node(state: GraphState) -> GraphState:
+        timeout = NODE_TIMEOUTS.get(node_name, DEFAULT_NODE_TIMEOUT)
+        with tracer.span(node_name, "node", trace_id=state.get("trace_id"), task_id=state.get("task_id") or 0) as span:
+            # Copy the context inside the span so calls made by the node become its children.
+            context = contextvars.copy_context()
+            cancelled = threading.Event()
+            context.run(_node_cancelled.set, cancelled)
+            future = _node_executor.submit(context.run, node_fn, state)
+            try:
+                update = future.result(timeout=timeout)
+            except FutureTimeoutError:
+                print(f"Node '{node_name}' exceeded its {timeout:.0f}s timeout.")
+                cancelled.set()
+                _abandon(state.get("task_id") or 0, node_name, future)
+                span.outcome = "timeout"
+                if soft:
+                    return _branch_timeout_update(node_name, timeout)
+                raise TimeoutError(f"Node '{node_name}' exceeded its {timeout:.0f}s timeout.")
+            except Exception as e:
+                if not soft:
+                    raise
+                print(f"Node '{node_name}' failed: {e}")
+                span.outcome = "error"
+                span.error = f"{type(e).__name__}: {e}"
+                return _branch_failure_update(node_name, e)
+            span.set("updated_keys", len(update))
+            return update
+
+    run_node.__name__ = node_fn.__name__
+    return run_node
+
+
+# --- 5. Build the Graph ---
 workflow = StateGraph(GraphState)
 
-
-
-workflow.add_node("create_task", create_task_node)
-
-workflow.add_node("planner", planner_node)
-
-workflow.add_node("coding_agent", coding_agent_node)
-
-workflow.add_node("docs_agent", docs_agent_node)
-
-workflow.add_node("store_context", store_context_node)
-
-workflow.add_node("loom_checklist", loom_checklist_node)
-
-workflow.add_node("status_update", status_update_node)
-
-
+workflow.add_node("create_task", with_timeout("create_task", create_task_node))
+workflow.add_node("planner", with_timeout("planner", planner_node))
+workflow.add_node("coding_agent", with_timeout("coding_agent", coding_agent_node))
+workflow.add_node("docs_agent", with_timeout("docs_agent", docs_agent_node))
+workflow.add_node("store_context", with_timeout("store_context", store_context_node, soft=True))
+workflow.add_node("loom_checklist", with_timeout("loom_checklist", loom_checklist_node, soft=True))
+workflow.add_node("status_update", with_timeout("status_update", status_update_node))
 
 workflow.set_entry_point("create_task")
-
 workflow.add_edge("create_task", "planner")
 
-
-
 workflow.add_conditional_edges(
-
     "planner",
-
     lambda x: x["agent_outcome"],
-
     {
-
         "coding": "coding_agent",
-
         "docs": "docs_agent",
-
         "general": END,
-
     },
-
 )
 
-
-
-workflow.add_edge("coding_agent", "store_context")
-
-workflow.add_edge("docs_agent", "store_context")
-
-workflow.add_edge("store_context", "loom_checklist")
-
-workflow.add_edge("loom_checklist", "status_update")
-
+# Neo4j persistence and checklist generation are independent, so both agents fan out
+# to them in parallel and status_update waits for both branches (fan-in).
+for agent_node in ("coding_agent", "docs_agent"):
+    workflow.add_edge(agent_node, "store_context")
+    workflow.add_edge(agent_node, "loom_checklist")
+workflow.add_edge(["store_context", "loom_checklist"], "status_update")
 workflow.add_edge("status_update", END)
 
+# --- 6. Checkpointing and Resumable Runs ---
+# Every superstep is checkpointed to SQLite under the thread "task-<task_id>", so a run
+# interrupted by a restart or a failing downstream node resumes from the last completed
+# node instead of redoing the clone and LLM generation.
+CHECKPOINT_DB_PATH = os.getenv("ORCHESTRATOR_CHECKPOINT_DB", "orchestrator_checkpoints.sqlite")
+# Every server worker writes checkpoints to the same file: WAL and a busy timeout let them
+# commit concurrently instead of failing with "database is locked".
+_checkpoint_conn = sqlite3.connect(CHECKPOINT_DB_PATH, timeout=30, check_same_thread=False)
+_checkpoint_conn.execute("PRAGMA journal_mode=WAL")
+checkpointer = SqliteSaver(_checkpoint_conn, serde=JsonPlusSerializer(allowed_msgpack_modules=CHECKPOINT_TYPES))
+
+app = workflow.compile(checkpointer=checkpointer)
+
+def run_config(task_id: int) -> Dict[str, Any]:
+    """Returns the LangGraph config that identifies the checkpointed run of a task."""
+    return {"configurable": {"thread_id": f"task-{task_id}"}}
+
+def start_run(initial_state: GraphState) -> Dict[str, Any]:
+    """Runs the graph for a task whose ID has already been allocated in the MCP."""
+    task_id = initial_state["task_id"]
+    if not task_id:
+        raise ValueError("Checkpointed runs require a pre-allocated task_id.")
+    initial_state.setdefault("trace_id", secrets.token_hex(16))
+    return app.invoke(initial_state, run_config(task_id), durability="sync")
+
+def get_run_state(task_id: int):
+    """Returns the latest checkpoint snapshot for a task's run."""
+    snapshot = app.get_state(run_config(task_id))
+    if not snapshot.values:
+        raise ValueError(f"No orchestrator run found for task {task_id}.")
+    return snapshot
+
+def _check_not_abandoned(task_id: int) -> None:
+    running = abandoned_nodes(task_id)
+    if running:
+        raise ValueError(
+            f"Node(s) {', '.join(running)} of task {task_id} timed out and are still running; "
+            f"try again once they have stopped."
+        )
 
-
-app = workflow.compile()
\ No newline at end of file
+def resume_run(task_id: int) -> Dict[str, Any]:
+    """
+    Resumes a run from the node after the last one that completed. Raises ValueError while
+    a node of the run abandoned after its timeout is still running.
+    """
+    _check_not_abandoned(task_id)
+    snapshot = get_run_state(task_id)
+    if not snapshot.next:
+        raise ValueError(f"Orchestrator run for task {task_id} has already finished.")
+    print(f"Resuming run for task {task_id} at {list(snapshot.next)}")
+    return app.invoke(None, snapshot.config, durability="sync")
+
+def find_node_checkpoint(task_id: int, node_name: str) -> Dict[str, Any]:
+    """Returns the config of the most recent checkpoint at which node_name was about to execute."""
+    get_run_state(task_id)
+    for snapshot in app.get_state_history(run_config(task_id)):
+        if node_name in snapshot.next:
+            return snapshot.config
+    raise ValueError(f"Node '{node_name}' never ran for task {task_id}.")
+
+def retry_run_from_node(task_id: int, node_name: str) -> Dict[str, Any]:
+    """
+    Re-runs a task from node_name onwards, reusing the checkpointed output of earlier nodes.
+    Raises ValueError while a node of the run abandoned after its timeout is still running.
+    """
+    _check_not_abandoned(task_id)
+    config = find_node_checkpoint(task_id, node_name)
+    print(f"Retrying run for task {task_id} from node '{node_name}'")
+    return app.invoke(None, config, durability="sync")
+
+def incomplete_run_task_ids() -> List[int]:
+    """Returns the task IDs of runs whose latest checkpoint still has nodes left to execute."""
+    # The saver has no API for enumerating threads, so read them from its table directly.
+    with checkpointer.cursor(transaction=False) as cur:
+        cur.execute("SELECT DISTINCT thread_id FROM checkpoints WHERE thread_id LIKE 'task-%'")
+        thread_ids = [row[0] for row in cur.fetchall()]
+    task_ids = []
+    for thread_id in thread_ids:
+        task_id = int(thread_id.split("-", 1)[1])
+        if app.get_state(run_config(task_id)).next:
+            task_ids.append(task_id)
+    return task_ids
+
+def resume_incomplete_runs() -> None:
+    """Resumes every run that was interrupted, e.g. by a server restart."""
+    for task_id in incomplete_run_task_ids():
+        try:
+            resume_run(task_id)
+        except Exception as e:
+            print(f"Failed to resume run for task {task_id}: {e}")
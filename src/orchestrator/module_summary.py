@@ -0,0 +1,74 @@
+import ast
+from dataclasses import dataclass
+
+# Non-Python modules, and Python modules that do not parse, are summarized by their head.
+MAX_RAW_SUMMARY_CHARS = 4000
+
+
+@dataclass(frozen=True, slots=True)
+class ModuleSummary:
+    """
+    A module's outline: its docstring, imports, and the signatures and docstrings of its
+    classes and functions. It is a fraction of the source's size and only changes when the
+    module's interface or documentation does.
+    """
+    path: str
+    description: str
+    outline: str
+
+
+def _first_paragraph(docstring: str) -> str:
+    """The docstring's first paragraph on one line."""
+    if not docstring or not docstring.strip():
+        return ""
+    return " ".join(docstring.strip().split("\n\n")[0].split())
+
+
+def _signature(node) -> str:
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    return f"{prefix} {node.name}({ast.unparse(node.args)}){returns}"
+
+
+def _outline_body(body, indent: str, lines: list) -> None:
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            lines.append(f"{indent}{_signature(node)}")
+            doc = _first_paragraph(ast.get_docstring(node))
+            if doc:
+                lines.append(f'{indent}    """{doc}"""')
+        elif isinstance(node, ast.ClassDef):
+            bases = ", ".join(ast.unparse(base) for base in node.bases)
+            lines.append(f"{indent}class {node.name}({bases}):" if bases else f"{indent}class {node.name}:")
+            doc = _first_paragraph(ast.get_docstring(node))
+            if doc:
+                lines.append(f'{indent}    """{doc}"""')
+            _outline_body(node.body, indent + "    ", lines)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)) and not indent:
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            names = [t.id for t in targets if isinstance(t, ast.Name) and t.id.isupper()]
+            if names:
+                lines.append(f"{' = '.join(names)} = ...")
+
+
+def summarize_module(path: str, source: str) -> ModuleSummary:
+    """Outlines a module with a local AST pass; no code is run and no model is called."""
+    if not path.endswith(".py"):
+        return ModuleSummary(path, "", source[:MAX_RAW_SUMMARY_CHARS])
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return ModuleSummary(path, "", source[:MAX_RAW_SUMMARY_CHARS])
+
+    docstring = ast.get_docstring(tree)
+    lines = [f'"""{docstring.strip()}"""'] if docstring else []
+    imports = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            imports.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            imports.append("." * node.level + (node.module or ""))
+    if imports:
+        lines.append(f"# imports: {', '.join(dict.fromkeys(imports))}")
+    _outline_body(tree.body, "", lines)
+    return ModuleSummary(path, _first_paragraph(docstring), "\n".join(lines))
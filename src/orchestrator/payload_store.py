@@ -0,0 +1,48 @@
+import gzip
+import hashlib
+import json
+import os
+import uuid
+from typing import Any, Dict, Union
+
+
+class PayloadStore:
+    """
+    Stores raw GitHub event payloads once on disk, addressed by the SHA-256 of their content.
+    Graph state and task context only carry the payload ID, so multi-megabyte payloads are
+    not copied through every node or checkpoint.
+    """
+
+    def __init__(self, root_dir: str = None):
+        self.root_dir = root_dir or os.getenv("ORCHESTRATOR_PAYLOAD_DIR", "payload_store")
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def _path(self, payload_id: str) -> str:
+        return os.path.join(self.root_dir, payload_id[:2], f"{payload_id}.json.gz")
+
+    def put(self, payload: Union[Dict[str, Any], bytes]) -> str:
+        """
+        Stores a payload (a decoded dict or the raw request body) and returns its ID.
+        Storing the same payload twice is a no-op.
+        """
+        raw = payload if isinstance(payload, bytes) else json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        payload_id = hashlib.sha256(raw).hexdigest()
+        path = self._path(payload_id)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # A redelivered event can be stored by two requests at once.
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with gzip.open(tmp_path, "wb") as f:
+                f.write(raw)
+            os.replace(tmp_path, path)
+        return payload_id
+
+    def get(self, payload_id: str) -> Dict[str, Any]:
+        """
+        Loads a stored payload by ID.
+        """
+        try:
+            with gzip.open(self._path(payload_id), "rb") as f:
+                return json.loads(f.read())
+        except FileNotFoundError:
+            raise ValueError(f"Payload {payload_id} not found.")
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from orchestrator.changes import ADDED, MODIFIED, REMOVED, mirror_changes
+from orchestrator.git_mirror import GitMirror
+from orchestrator.tracing import tracer
+
+# GitHub's pull request file statuses. A rename is its new path added and its old path
+# removed, as in the mirror's --no-renames diff; anything else (changed, copied) is modified.
+_GITHUB_STATUS = {"added": ADDED, "removed": REMOVED, "renamed": ADDED}
+
+
+class GitHubPullRequestAPI:
+    """
+    The GitHub calls the resolver makes, behind one method so tests and replays can swap in
+    a stand-in. Uses PyGithub with GITHUB_TOKEN.
+    """
+
+    def __init__(self, token: str = None, per_page: int = 100):
+        self.token = token or os.getenv("GITHUB_TOKEN")
+        self.per_page = per_page
+        self._client = None
+
+    @property
+    def available(self) -> bool:
+        return bool(self.token)
+
+    def list_files(self, repo_name: str, pr_number: int) -> Dict[str, str]:
+        """
+        The change (added, modified or removed) of every file the pull request touches,
+        following pagination. A renamed file's old path is listed as removed.
+        """
+        if self._client is None:
+            # Imported here: PyGithub is only needed when pull requests are resolved.
+            from github import Auth, Github
+            self._client = Github(auth=Auth.Token(self.token), per_page=self.per_page)
+        files = {}
+        for pr_file in self._client.get_repo(repo_name).get_pull(pr_number).get_files():
+            if pr_file.previous_filename and pr_file.previous_filename != pr_file.filename:
+                files.setdefault(pr_file.previous_filename, REMOVED)
+            files[pr_file.filename] = _GITHUB_STATUS.get(pr_file.status, MODIFIED)
+        return files
+
+
+class PullRequestFileResolver:
+    """
+    Resolves the files a pull request changes. Results are cached per (repo, PR, head sha)
+    in memory and in ORCHESTRATOR_PR_FILES_CACHE, so redeliveries and repeated events for
+    the same head cost nothing. When a local mirror of the repository
+    (ORCHESTRATOR_GIT_MIRROR_DIR/<owner>/<repo>.git) holds both the base and head commits,
+    the list is computed with git instead of calling the GitHub API.
+    """
+
+    def __init__(self, api: GitHubPullRequestAPI = None, cache_dir: str = None, mirror: GitMirror = None,
+                 max_entries: int = 256):
+        self.api = api or GitHubPullRequestAPI()
+        self.cache_dir = cache_dir or os.getenv("ORCHESTRATOR_PR_FILES_CACHE", "pr_files_cache")
+        self.mirror = mirror or GitMirror()
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, repo_name: str, pr_number: int, head_sha: Optional[str], base_sha: Optional[str] = None) -> Dict[str, str]:
+        """
+        The change (added, modified or removed) of each path the pull request at head_sha
+        touches. Returns an empty mapping when neither a mirror nor API credentials are available.
+        """
+        key = self._key(repo_name, pr_number, head_sha)
+        cached = self._get(key) if head_sha else None
+        if cached is not None:
+            return cached
+        changes = self.mirror.diff(repo_name, base_sha, head_sha, merge_base=True)
+        if changes is not None:
+            files = mirror_changes(changes)
+        else:
+            if not self.api.available:
+                print(f"Cannot resolve files of {repo_name}#{pr_number}: no git mirror and no GITHUB_TOKEN.")
+                return {}
+            with tracer.span("github.list_pull_files", "github", pr_number=pr_number) as span:
+                files = self.api.list_files(repo_name, pr_number)
+                span.set("files", len(files))
+        files = dict(sorted(files.items()))
+        # Without a head sha the PR may still change, so the result is not cached.
+        if head_sha:
+            self._put(key, files)
+        return files
+
+    # --- Cache ---
+    @staticmethod
+    def _key(repo_name: str, pr_number: int, head_sha: Optional[str]) -> str:
+        return hashlib.sha256(json.dumps([repo_name, pr_number, head_sha]).encode("utf-8")).hexdigest()
+
+    def _get(self, key: str) -> Optional[Dict[str, str]]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        try:
+            with open(os.path.join(self.cache_dir, f"{key}.json")) as f:
+                files = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        # Entries written before statuses were kept are plain path lists: resolve them again.
+        if not isinstance(files, dict):
+            return None
+        self._remember(key, files)
+        return files
+
+    def _put(self, key: str, files: Dict[str, str]) -> None:
+        self._remember(key, files)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, f"{key}.json")
+        # Runs of the same pull request may resolve it concurrently, in one process or several.
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(files, f)
+        os.replace(tmp_path, path)
+
+    def _remember(self, key: str, files: Dict[str, str]) -> None:
+        with self._lock:
+            self._memory[key] = files
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
@@ -0,0 +1,382 @@
+"""
+Replays recorded GitHub events against the MCP server and reports end-to-end numbers:
+webhook ack latency, queue latency (queued until a worker picked the run up), run
+duration, throughput and mean time per graph node.
+
+Recorded events are JSON lines in the shape extract_task_from_git_context consumes:
+
+    {"event_type": "push", "payload": {...GitHub webhook payload...}}
+
+An optional "delivery_id" is replaced by a fresh one on replay unless --keep-delivery-ids
+is given (use it to exercise redelivery dedup).
+
+Usage:
+    # Record the events a server has received (from MCP_STATE_DB and the payload store)
+    PYTHONPATH=src python -m orchestrator.replay record --out events.jsonl
+    # Or generate a synthetic mix of push, pull_request and issues events
+    PYTHONPATH=src python -m orchestrator.replay generate --count 200 --out events.jsonl
+    # Replay them at 5 events/s against a throwaway server
+    PYTHONPATH=src python -m orchestrator.replay replay events.jsonl --rate 5 --start-server
+
+--start-server runs the MCP server in a temporary directory with the Gemini agents in
+their simulated mode (no GEMINI_API_KEY) and MEMORY_BACKEND=sqlite standing in for Neo4j.
+Each sent event's clone_url points at its own local bare git repository, so coding runs
+clone and push without touching GitHub, and concurrent runs never reject each other's
+pushes as non-fast-forward. Without it, events are sent to --url and the server's own
+configuration applies.
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import random
+import secrets
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import requests
+
+REPLAY_REPO = "replay/demo"
+
+
+# --- Recorded events ---
+def load_events(path: str) -> list:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def write_events(events: list, path: str) -> None:
+    with open(path, "w") as f:
+        for event in events:
+            f.write(json.dumps(event) + "\n")
+
+
+def record_events(state_db: str, payload_dir: str) -> list:
+    """Events received by /github-webhook, oldest first, with their stored payloads."""
+    from orchestrator.payload_store import PayloadStore
+
+    store = PayloadStore(payload_dir)
+    conn = sqlite3.connect(state_db)
+    rows = conn.execute(
+        "SELECT delivery_id, event_type, payload_id FROM webhook_deliveries "
+        "WHERE payload_id IS NOT NULL ORDER BY received_at"
+    ).fetchall()
+    conn.close()
+    return [{"event_type": event_type, "delivery_id": delivery_id, "payload": store.get(payload_id)}
+            for delivery_id, event_type, payload_id in rows]
+
+
+def generate_events(count: int, seed: int = 7) -> list:
+    """A synthetic mix of 70% push, 20% pull_request and 10% issues events."""
+    rng = random.Random(seed)
+    repository = {"full_name": REPLAY_REPO, "name": "demo", "clone_url": f"https://github.com/{REPLAY_REPO}.git"}
+    events = []
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.7:
+            commits = []
+            for _ in range(rng.randint(1, 4)):
+                commits.append({
+                    "id": f"{rng.getrandbits(160):040x}",
+                    "message": rng.choice(["Fix parser edge case", "Add retry to client", "Update docs", "Refactor models"]),
+                    "added": [f"src/module_{rng.randint(1, 200)}.py" for _ in range(rng.randint(0, 2))],
+                    "modified": [f"src/module_{rng.randint(1, 200)}.py" for _ in range(rng.randint(1, 5))],
+                    "removed": [],
+                })
+            events.append({"event_type": "push", "payload": {
+                "ref": "refs/heads/main", "repository": repository, "commits": commits, "head_commit": commits[-1],
+            }})
+        elif roll < 0.9:
+            events.append({"event_type": "pull_request", "payload": {
+                "action": "opened", "number": i + 1, "repository": repository,
+                "pull_request": {
+                    "title": f"Feature {i}",
+                    "head": {"ref": f"feature-{i}", "sha": f"{rng.getrandbits(160):040x}"},
+                    "base": {"ref": "main", "sha": f"{rng.getrandbits(160):040x}"},
+                },
+            }})
+        else:
+            events.append({"event_type": "issues", "payload": {
+                "action": "opened", "repository": repository,
+                "issue": {"title": f"Implement helper {i}", "body": "Write a function that adds two numbers."},
+            }})
+    return events
+
+
+# --- Stand-in environment ---
+def create_bare_repo(root: str) -> str:
+    """A local bare repository with one commit, the template of the repositories events push to."""
+    work, bare = os.path.join(root, "repo-work"), os.path.join(root, "remote.git")
+    git = ["git", "-c", "user.name=replay", "-c", "user.email=replay@localhost"]
+    subprocess.run(["git", "init", "-q", "-b", "main", work], check=True)
+    with open(os.path.join(work, "README.md"), "w") as f:
+        f.write("# Replay target\n")
+    subprocess.run(git + ["-C", work, "add", "README.md"], check=True)
+    subprocess.run(git + ["-C", work, "commit", "-q", "-m", "Initial commit"], check=True)
+    subprocess.run(["git", "clone", "-q", "--bare", work, bare], check=True)
+    return bare
+
+
+def create_event_repos(template: str, root: str, count: int) -> list:
+    """
+    A bare repository per event, cloned from template. Runs of different events push to
+    different repositories, so pushes only fail for reasons worth reporting.
+    """
+    repos_dir = os.path.join(root, "remotes")
+    os.makedirs(repos_dir)
+    repos = []
+    for i in range(count):
+        repo = os.path.join(repos_dir, f"{i}.git")
+        # Local clones hardlink the template's objects, so this is cheap per event.
+        subprocess.run(["git", "clone", "-q", "--bare", template, repo], check=True)
+        repos.append(repo)
+    return repos
+
+
+def start_server(root: str, port: int, workers: int, secret: str):
+    """Starts the MCP server with simulated agents and SQLite stand-ins, all state under root."""
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {
+        **os.environ,
+        "PYTHONPATH": src_dir,
+        "GEMINI_API_KEY": "",
+        "MEMORY_BACKEND": "sqlite",
+        "MEMORY_SQLITE_PATH": os.path.join(root, "memory_graph.sqlite"),
+        "MCP_STATE_DB": os.path.join(root, "mcp_state.sqlite"),
+        "MCP_SERVER_URL": f"http://localhost:{port}",
+        "MCP_WORKERS": str(workers),
+        "ORCHESTRATOR_CHECKPOINT_DB": os.path.join(root, "orchestrator_checkpoints.sqlite"),
+        "ORCHESTRATOR_PAYLOAD_DIR": os.path.join(root, "payload_store"),
+        "ORCHESTRATOR_TRACE_FILE": os.path.join(root, "orchestrator_traces.jsonl"),
+        "NEO4J_WRITE_BUFFER_SPOOL": os.path.join(root, "neo4j_write_spool.jsonl"),
+        "GITHUB_WEBHOOK_SECRET": secret,
+        # Pull request files are resolved without calling GitHub for the synthetic repository.
+        "GITHUB_TOKEN": "",
+        "GIT_AUTHOR_NAME": "replay", "GIT_AUTHOR_EMAIL": "replay@localhost",
+        "GIT_COMMITTER_NAME": "replay", "GIT_COMMITTER_EMAIL": "replay@localhost",
+    }
+    if workers > 1:
+        env["PROMETHEUS_MULTIPROC_DIR"] = os.path.join(root, "prometheus")
+        os.makedirs(env["PROMETHEUS_MULTIPROC_DIR"])
+    log = open(os.path.join(root, "server.log"), "w")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "mcp_server.main:app", "--port", str(port), "--workers", str(workers)],
+        cwd=root, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+
+
+def wait_until_ready(url: str, timeout: float) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{url}/readyz", timeout=2).status_code == 200:
+                return
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"MCP server at {url} not ready after {timeout:.0f}s")
+
+
+# --- Replay ---
+def send_event(url: str, event: dict, secret: str, keep_delivery_id: bool, clone_url: str = None) -> dict:
+    payload = event["payload"]
+    if clone_url:
+        payload = {**payload, "repository": {**payload.get("repository", {}), "clone_url": clone_url}}
+    body = json.dumps(payload).encode("utf-8")
+    headers = {
+        "Content-Type": "application/json",
+        "X-GitHub-Event": event["event_type"],
+        "X-GitHub-Delivery": event.get("delivery_id") if keep_delivery_id and event.get("delivery_id") else str(uuid.uuid4()),
+    }
+    if secret:
+        headers["X-Hub-Signature-256"] = "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    start = time.perf_counter()
+    response = requests.post(f"{url}/github-webhook", data=body, headers=headers, timeout=30)
+    ack_seconds = time.perf_counter() - start
+    result = response.json() if response.headers.get("content-type", "").startswith("application/json") else {}
+    return {"status": response.status_code, "ack_seconds": ack_seconds, "task_id": result.get("task_id"),
+            "accepted": response.status_code == 202}
+
+
+def replay(url: str, events: list, rate: float, secret: str, keep_delivery_ids: bool, clone_urls: list = None) -> list:
+    """
+    Sends events at a fixed rate. Sends are scheduled from the start time, so slow acks do
+    not lower the rate. With clone_urls, the i-th event's clone_url is replaced by the i-th URL.
+    """
+    results = []
+    start = time.perf_counter()
+    for i, event in enumerate(events):
+        delay = start + i / rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        results.append(send_event(url, event, secret, keep_delivery_ids, clone_urls[i] if clone_urls else None))
+    return results
+
+
+def wait_for_runs(url: str, task_ids: list, timeout: float) -> dict:
+    """Polls the run endpoint until every job has finished. Returns the last job per task ID."""
+    jobs = {}
+    pending = set(task_ids)
+    deadline = time.time() + timeout
+    while pending and time.time() < deadline:
+        for task_id in list(pending):
+            response = requests.get(f"{url}/orchestrator/runs/{task_id}", timeout=10)
+            job = response.json().get("job") if response.status_code == 200 else None
+            if job and job["status"] in ("done", "failed"):
+                jobs[task_id] = job
+                pending.discard(task_id)
+        if pending:
+            time.sleep(0.5)
+    for task_id in pending:
+        print(f"Run for task {task_id} did not finish within {timeout:.0f}s")
+    return jobs
+
+
+def span_totals(url: str) -> dict:
+    """(sum, count) of orchestrator_span_duration_seconds per (kind, name), from /metrics."""
+    from prometheus_client.parser import text_string_to_metric_families
+
+    totals = {}
+    for family in text_string_to_metric_families(requests.get(f"{url}/metrics", timeout=10).text):
+        if family.name != "orchestrator_span_duration_seconds":
+            continue
+        for sample in family.samples:
+            key = (sample.labels.get("kind"), sample.labels.get("name"))
+            total, count = totals.get(key, (0.0, 0.0))
+            if sample.name.endswith("_sum"):
+                totals[key] = (total + sample.value, count)
+            elif sample.name.endswith("_count"):
+                totals[key] = (total, count + sample.value)
+    return totals
+
+
+# --- Report ---
+def _percentiles(values: list) -> dict:
+    if not values:
+        return {}
+    ordered = sorted(values)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {"p50": statistics.median(ordered), "p95": pick(0.95), "max": ordered[-1]}
+
+
+def build_report(sent: list, jobs: dict, spans_before: dict, spans_after: dict, wall_seconds: float) -> dict:
+    finished = [job for job in jobs.values() if job["finished_at"]]
+    first_queued = min((job["queued_at"] for job in finished), default=0)
+    last_finished = max((job["finished_at"] for job in finished), default=0)
+    spans = {}
+    for key, (total, count) in spans_after.items():
+        before_total, before_count = spans_before.get(key, (0.0, 0.0))
+        if count > before_count:
+            spans[f"{key[0]}:{key[1]}"] = {
+                "count": int(count - before_count),
+                "mean_seconds": (total - before_total) / (count - before_count),
+            }
+    return {
+        "events_sent": len(sent),
+        "events_accepted": sum(1 for r in sent if r["accepted"]),
+        "runs_done": sum(1 for job in finished if job["status"] == "done"),
+        "runs_failed": sum(1 for job in finished if job["status"] == "failed"),
+        "wall_seconds": wall_seconds,
+        "throughput_runs_per_second": len(finished) / (last_finished - first_queued) if last_finished > first_queued else 0.0,
+        "ack_seconds": _percentiles([r["ack_seconds"] for r in sent]),
+        "queue_seconds": _percentiles([job["started_at"] - job["queued_at"] for job in finished if job["started_at"]]),
+        "run_seconds": _percentiles([job["finished_at"] - job["started_at"] for job in finished if job["started_at"]]),
+        "spans": dict(sorted(spans.items(), key=lambda item: -item[1]["mean_seconds"] * item[1]["count"])),
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"events: {report['events_sent']} sent, {report['events_accepted']} accepted")
+    print(f"runs: {report['runs_done']} done, {report['runs_failed']} failed in {report['wall_seconds']:.1f}s "
+          f"({report['throughput_runs_per_second']:.2f} runs/s)")
+    for name in ("ack_seconds", "queue_seconds", "run_seconds"):
+        p = report[name]
+        if p:
+            print(f"{name:>14}: p50 {p['p50'] * 1000:.1f} ms, p95 {p['p95'] * 1000:.1f} ms, max {p['max'] * 1000:.1f} ms")
+    print("spans (kind:name, count, mean):")
+    for name, span in report["spans"].items():
+        print(f"  {name:<48} {span['count']:>6} {span['mean_seconds'] * 1000:>10.1f} ms")
+
+
+def run_replay(args) -> None:
+    events = load_events(args.events) * args.repeat
+    secret = os.getenv("GITHUB_WEBHOOK_SECRET", "")
+    url, server, clone_urls = args.url, None, None
+    root = tempfile.mkdtemp(prefix="mcp-replay-")
+    try:
+        if args.start_server:
+            secret = secrets.token_hex(20)
+            url = f"http://localhost:{args.port}"
+            clone_urls = create_event_repos(create_bare_repo(root), root, len(events))
+            server = start_server(root, args.port, args.workers, secret)
+            print(f"Started MCP server in {root}")
+        wait_until_ready(url, args.ready_timeout)
+        spans_before = span_totals(url)
+        start = time.perf_counter()
+        sent = replay(url, events, args.rate, secret, args.keep_delivery_ids, clone_urls)
+        task_ids = sorted({r["task_id"] for r in sent if r["accepted"] and r["task_id"]})
+        jobs = wait_for_runs(url, task_ids, args.run_timeout)
+        report = build_report(sent, jobs, spans_before, span_totals(url), time.perf_counter() - start)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+    print_report(report)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    if server and args.keep:
+        print(f"Server state and log kept in {root}")
+    else:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="export events received by /github-webhook")
+    record.add_argument("--out", required=True)
+    record.add_argument("--state-db", default=os.getenv("MCP_STATE_DB", "mcp_state.sqlite"))
+    record.add_argument("--payload-dir", default=os.getenv("ORCHESTRATOR_PAYLOAD_DIR", "payload_store"))
+
+    generate = commands.add_parser("generate", help="write a synthetic event mix")
+    generate.add_argument("--out", required=True)
+    generate.add_argument("--count", type=int, default=100)
+    generate.add_argument("--seed", type=int, default=7)
+
+    run = commands.add_parser("replay", help="send events to the MCP server and report")
+    run.add_argument("events")
+    run.add_argument("--rate", type=float, default=1.0, help="events per second")
+    run.add_argument("--repeat", type=int, default=1, help="send the event file this many times")
+    run.add_argument("--url", default=os.getenv("MCP_SERVER_URL", "http://localhost:8000"))
+    run.add_argument("--start-server", action="store_true", help="run a throwaway server with simulated agents")
+    run.add_argument("--port", type=int, default=8765)
+    run.add_argument("--workers", type=int, default=1)
+    run.add_argument("--keep-delivery-ids", action="store_true")
+    run.add_argument("--keep", action="store_true", help="keep the throwaway server's state and log")
+    run.add_argument("--ready-timeout", type=float, default=120)
+    run.add_argument("--run-timeout", type=float, default=600)
+    run.add_argument("--report", help="also write the report as JSON to this file")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        events = record_events(args.state_db, args.payload_dir)
+        write_events(events, args.out)
+        print(f"Recorded {len(events)} events to {args.out}")
+    elif args.command == "generate":
+        write_events(generate_events(args.count, args.seed), args.out)
+        print(f"Wrote {args.count} events to {args.out}")
+    else:
+        run_replay(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+
+@dataclass(frozen=True, slots=True)
+class GitEventSummary:
+    """
+    The fields of a GitHub event that the orchestrator actually uses.
+    The raw payload lives in the PayloadStore and is referenced by payload_id.
+    """
+    event_type: str
+    repo_name: Optional[str] = None
+    repo_url: Optional[str] = None
+    head_sha: Optional[str] = None
+    changed_files: Tuple[str, ...] = ()
+    pr_number: Optional[int] = None
+    payload_id: Optional[str] = None
+    # The net change of the event split by kind (see orchestrator.changes). The kind
+    # lists leave out removed files, which are listed in removed_files.
+    base_sha: Optional[str] = None
+    code_files: Tuple[str, ...] = ()
+    docs_files: Tuple[str, ...] = ()
+    config_files: Tuple[str, ...] = ()
+    removed_files: Tuple[str, ...] = ()
+
+    def __post_init__(self):
+        # Checkpoint deserialization turns tuples into lists.
+        for field in ("changed_files", "code_files", "docs_files", "config_files", "removed_files"):
+            object.__setattr__(self, field, tuple(getattr(self, field)))
+
+    def to_task_context(self) -> Dict[str, Any]:
+        """Returns the compact context stored on the MCP task."""
+        return {
+            "event_type": self.event_type,
+            "repo_name": self.repo_name,
+            "repo_url": self.repo_url,
+            "head_sha": self.head_sha,
+            "changed_files": list(self.changed_files),
+            "pr_number": self.pr_number,
+            "payload_id": self.payload_id,
+            "base_sha": self.base_sha,
+            "change_counts": {
+                "code": len(self.code_files),
+                "docs": len(self.docs_files),
+                "config": len(self.config_files),
+                "removed": len(self.removed_files),
+            },
+        }
+
+
+# Types that may appear in checkpointed graph state.
+CHECKPOINT_TYPES = [("orchestrator.state", "GitEventSummary")]
@@ -0,0 +1,178 @@
+import contextvars
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import requests
+from prometheus_client import Histogram
+
+# Aggregated span latencies, exposed on the MCP server's /metrics endpoint.
+SPAN_DURATION_SECONDS = Histogram(
+    "orchestrator_span_duration_seconds",
+    "Duration of orchestrator graph nodes and the MCP, LLM, Neo4j and git calls they make.",
+    ["kind", "name", "outcome"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+
+# OTLP span kinds
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+
+
+class Span:
+    """
+    A single timed operation. Attributes describe payload sizes, retries and the like;
+    outcome is one of "ok", "error" or "timeout".
+    """
+    __slots__ = ("trace_id", "span_id", "parent_span_id", "name", "kind", "start_ns", "end_ns", "attributes", "outcome", "error")
+
+    def __init__(self, name: str, kind: str, trace_id: str, parent_span_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.outcome = "ok"
+        self.error = None
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration_seconds(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Returns the span in OTLP/JSON form."""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": SPAN_KIND_INTERNAL if self.kind == "node" else SPAN_KIND_CLIENT,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in {"span.kind": self.kind, "outcome": self.outcome, **self.attributes}.items()],
+            "status": {"code": 1} if self.outcome == "ok" else {"code": 2, "message": self.error or self.outcome},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class SpanExporter:
+    """
+    Exports finished spans in batches from a background thread, as one OTLP/JSON
+    ExportTraceServiceRequest per line of a local file and, if an OTLP/HTTP endpoint
+    is configured, to that collector as well.
+    """
+
+    def __init__(self, service_name: str, file_path: Optional[str] = None, endpoint: Optional[str] = None,
+                 batch_size: int = 128, flush_interval: float = 2.0):
+        self.service_name = service_name
+        self.file_path = file_path
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Span]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, span: Span) -> None:
+        self._queue.put(span)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.export(batch)
+
+    def export(self, spans: List[Span]) -> None:
+        request = {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{"scope": {"name": "orchestrator.tracing"}, "spans": [span.to_otlp() for span in spans]}],
+            }]
+        }
+        body = json.dumps(request, separators=(",", ":"))
+        try:
+            if self.file_path:
+                with open(self.file_path, "a") as f:
+                    f.write(body + "\n")
+            if self.endpoint:
+                requests.post(self.endpoint, data=body, headers={"Content-Type": "application/json"}, timeout=5)
+        except Exception as e:
+            print(f"Failed to export {len(spans)} spans: {e}")
+
+
+class Tracer:
+    """
+    Records spans around orchestrator work. The current span is tracked in a context
+    variable, so spans opened inside a node become its children.
+    """
+
+    def __init__(self, exporter: Optional[SpanExporter] = None):
+        self.exporter = exporter
+        self._current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+    @contextmanager
+    def span(self, name: str, kind: str, trace_id: Optional[str] = None, **attributes):
+        parent = self._current.get()
+        trace_id = trace_id or (parent.trace_id if parent else secrets.token_hex(16))
+        span = Span(name, kind, trace_id, parent.span_id if parent else None, attributes)
+        token = self._current.set(span)
+        try:
+            yield span
+        except Exception as e:
+            # An outcome set by the caller (e.g. "timeout") is kept.
+            if span.outcome == "ok":
+                span.outcome = "error"
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self._current.reset(token)
+            self._finish(span)
+
+    def _finish(self, span: Span) -> None:
+        span.end_ns = time.time_ns()
+        SPAN_DURATION_SECONDS.labels(span.kind, span.name, span.outcome).observe(span.duration_seconds)
+        if self.exporter:
+            self.exporter.submit(span)
+
+
+def _build_tracer() -> Tracer:
+    if os.getenv("ORCHESTRATOR_TRACING", "1") == "0":
+        return Tracer()
+    return Tracer(SpanExporter(
+        service_name=os.getenv("OTEL_SERVICE_NAME", "mcp-orchestrator"),
+        file_path=os.getenv("ORCHESTRATOR_TRACE_FILE", "orchestrator_traces.jsonl"),
+        endpoint=os.getenv("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT"),
+    ))
+
+
+tracer = _build_tracer()
@@ -0,0 +1,86 @@
+"""
+Shared setup for the test suite. Run from the repository root with:
+
+    python -m pytest -q
+
+Every store the server and orchestrator write to is pointed at a temporary directory
+before any module is imported, and the memory graph uses the embedded SQLite backend,
+so no Neo4j, MCP server, GitHub or Gemini access is needed.
+"""
+import itertools
+import os
+import sys
+import tempfile
+
+import pytest
+
+_STATE_DIR = tempfile.mkdtemp(prefix="mcp-tests-")
+os.environ.update({
+    "MEMORY_BACKEND": "sqlite",
+    "MEMORY_SQLITE_PATH": os.path.join(_STATE_DIR, "memory_graph.sqlite"),
+    "MCP_STATE_DB": os.path.join(_STATE_DIR, "mcp_state.sqlite"),
+    "MCP_SYMBOL_INDEX_DB": os.path.join(_STATE_DIR, "symbol_index.sqlite"),
+    "ORCHESTRATOR_CHECKPOINT_DB": os.path.join(_STATE_DIR, "orchestrator_checkpoints.sqlite"),
+    "ORCHESTRATOR_PAYLOAD_DIR": os.path.join(_STATE_DIR, "payload_store"),
+    "ORCHESTRATOR_ARTIFACT_DIR": os.path.join(_STATE_DIR, "artifact_store"),
+    "ORCHESTRATOR_PR_FILES_CACHE": os.path.join(_STATE_DIR, "pr_files_cache"),
+    "NEO4J_WRITE_BUFFER_SPOOL": os.path.join(_STATE_DIR, "neo4j_write_spool.jsonl"),
+    "ORCHESTRATOR_TRACING": "0",
+    "MCP_WORKERS": "1",
+})
+os.environ.pop("GITHUB_WEBHOOK_SECRET", None)
+os.environ.pop("GITHUB_WEBHOOK_ALLOW_UNSIGNED", None)
+os.environ.pop("GITHUB_TOKEN", None)
+os.environ.pop("ORCHESTRATOR_GIT_MIRROR_DIR", None)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+_task_ids = itertools.count(1000)
+
+
+@pytest.fixture
+def task_id() -> int:
+    """A task ID not used by any other test, so checkpointed runs do not collide."""
+    return next(_task_ids)
+
+
+class FakeMCP:
+    """
+    Stands in for the MCP server behind orchestrator.graph._mcp_request. Calls are recorded
+    as (method, route) pairs; handlers map a route to a function of the request kwargs.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.handlers = {
+            "/tools/loom_helper/generate_demo_checklist": lambda **kwargs: f"- [ ] {kwargs['json']['task_description']}",
+            "/tools/neo4j_memory/write_batch": lambda **kwargs: {"queued": len(kwargs["json"]["nodes"])},
+            "/tasks/{task_id}": lambda **kwargs: {"status": kwargs["params"]["status"]},
+        }
+
+    def __call__(self, method: str, path: str, route: str = None, **kwargs):
+        route = route or path
+        self.calls.append((method, route))
+        return self.handlers[route](**kwargs)
+
+    def routes(self) -> list:
+        return [route for _, route in self.calls]
+
+
+@pytest.fixture
+def fake_mcp(monkeypatch):
+    from orchestrator import graph
+    mcp = FakeMCP()
+    monkeypatch.setattr(graph, "_mcp_request", mcp)
+    return mcp
+
+
+@pytest.fixture
+def client():
+    """
+    A client of the MCP server app. The lifespan is not run, so no orchestrator runs are
+    claimed and the memory graph backend is not built.
+    """
+    from fastapi.testclient import TestClient
+    from mcp_server.main import app
+    return TestClient(app)
@@ -0,0 +1,77 @@
+"""In-memory stand-ins for the neo4j async driver, for testing AsyncNeo4jMemoryTool."""
+
+
+class FakeRecord(dict):
+    """A record, indexable by key or position like neo4j.Record."""
+
+    def __getitem__(self, key):
+        return list(self.values())[key] if isinstance(key, int) else super().__getitem__(key)
+
+
+class FakeResult:
+    def __init__(self, records):
+        self._records = records
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for record in self._records:
+            yield record
+
+    async def single(self):
+        return self._records[0] if self._records else None
+
+    async def consume(self):
+        pass
+
+
+class FakeSession:
+    """Stands in for both the session and its transactions."""
+
+    def __init__(self, driver, kwargs):
+        self.driver = driver
+        self.kwargs = kwargs
+
+    async def __aenter__(self):
+        self.driver.open_sessions += 1
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.driver.open_sessions -= 1
+
+    async def run(self, statement, parameters=None, **kwargs):
+        parameters = {**(parameters or {}), **kwargs}
+        self.driver.statements.append((statement, parameters))
+        records = self.driver.responses.get(statement, self.driver.records)
+        if "_mcp_skip" in parameters:
+            # Applies the appended SKIP/LIMIT like the database would.
+            records = records[parameters["_mcp_skip"]:parameters["_mcp_skip"] + parameters["_mcp_limit"]]
+        return FakeResult(records)
+
+    async def execute_read(self, work, *args):
+        self.driver.transactions.append("read")
+        return await work(self, *args)
+
+    async def execute_write(self, work, *args):
+        self.driver.transactions.append("write")
+        return await work(self, *args)
+
+
+class FakeDriver:
+    def __init__(self, records=None):
+        # Records returned for any statement, unless responses has some for that statement.
+        self.records = records or []
+        self.responses = {}
+        self.statements = []
+        self.transactions = []
+        self.session_kwargs = []
+        self.open_sessions = 0
+        self.closed = False
+
+    def session(self, **kwargs):
+        self.session_kwargs.append(kwargs)
+        return FakeSession(self, kwargs)
+
+    async def close(self):
+        self.closed = True
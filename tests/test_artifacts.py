@@ -0,0 +1,96 @@
+import pytest
+
+from mcp_server import main
+from mcp_server.main import new_run_state, parse_byte_range
+from orchestrator import graph
+from orchestrator.artifact_store import ArtifactStore
+
+CONTENT = "# Generated docs\n\n" + "Line of documentation.\n" * 50
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(str(tmp_path))
+
+
+def test_identical_content_is_stored_once(store, tmp_path):
+    artifact_id = store.put(CONTENT)
+
+    assert store.put(CONTENT.encode("utf-8")) == artifact_id
+    assert len(list((tmp_path / artifact_id[:2]).iterdir())) == 1
+    assert store.get(artifact_id) == CONTENT
+    assert store.size(artifact_id) == len(CONTENT)
+    assert store.read(artifact_id, 2, 11) == b"Generated "
+
+
+def test_refs_point_at_stored_artifacts(store):
+    assert store.lookup("checklist:1") is None
+    artifact_id = store.put("- [ ] Record the demo", ref="checklist:1")
+    assert store.lookup("checklist:1") == artifact_id
+
+
+def test_invalid_and_unknown_ids(store):
+    with pytest.raises(ValueError, match="Invalid artifact ID"):
+        store.get("../../etc/passwd")
+    with pytest.raises(ValueError, match="not found"):
+        store.size("0" * 64)
+    assert not store.exists("not-an-id")
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("bytes=0-9", (0, 9)),
+    ("bytes=10-", (10, 99)),
+    ("bytes=90-500", (90, 99)),
+    ("bytes=-5", (95, 99)),
+    ("bytes=0-1,5-6", None),
+    ("bytes=a-b", None),
+    ("items=0-9", None),
+])
+def test_byte_ranges(header, expected):
+    assert parse_byte_range(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=9-3"])
+def test_unsatisfiable_byte_ranges(header):
+    with pytest.raises(ValueError):
+        parse_byte_range(header, 100)
+
+
+def test_download(client):
+    artifact_id = main.artifact_store.put(CONTENT)
+
+    whole = client.get(f"/artifacts/{artifact_id}", headers={"Accept-Encoding": "gzip"})
+    assert whole.headers["content-encoding"] == "gzip"
+    assert whole.text == CONTENT
+    assert whole.headers["etag"] == f'"{artifact_id}"'
+
+    part = client.get(f"/artifacts/{artifact_id}", headers={"Range": "bytes=2-10"})
+    assert part.status_code == 206
+    assert part.content == CONTENT.encode()[2:11]
+    assert part.headers["content-range"] == f"bytes 2-10/{len(CONTENT)}"
+
+    outside = client.get(f"/artifacts/{artifact_id}", headers={"Range": f"bytes={len(CONTENT)}-"})
+    assert outside.status_code == 416
+    assert outside.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+    assert client.get(f"/artifacts/{'0' * 64}").status_code == 404
+    assert client.get("/artifacts/not-an-id").status_code == 404
+
+
+def test_artifacts_reducer_merges_node_outputs():
+    assert graph._merge_artifacts(None, {"docs": "a"}) == {"docs": "a"}
+    assert graph._merge_artifacts({"docs": "a"}, {"checklist": "b"}) == {"docs": "a", "checklist": "b"}
+    assert graph._merge_artifacts({"docs": "a"}, None) == {"docs": "a"}
+
+
+def test_runs_reference_their_checklist(fake_mcp, task_id):
+    state = new_run_state("Update the documentation: artifacts", task_id)
+
+    result = graph.start_run(state)
+
+    assert graph.artifact_store.get(result["artifacts"]["checklist"]) == result["loom_checklist"]
+    fake_mcp.calls.clear()
+    graph.start_run(new_run_state("Update the documentation: artifacts", task_id + 200_000))
+    # The same task and changes reuse the stored checklist.
+    assert "/tools/loom_helper/generate_demo_checklist" not in fake_mcp.routes()
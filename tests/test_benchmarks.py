@@ -0,0 +1,58 @@
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+
+BENCHMARK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "tool_hot_paths.py")
+CASE = "loom_helper.checklist[changes=100]"
+
+spec = importlib.util.spec_from_file_location("tool_hot_paths", BENCHMARK)
+tool_hot_paths = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(tool_hot_paths)
+
+
+def run_benchmark(baseline, *args):
+    return subprocess.run(
+        [sys.executable, BENCHMARK, "--filter", CASE, "--baseline", str(baseline), *args],
+        capture_output=True, text=True, env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+
+
+def test_measure_lengthens_short_rounds():
+    calls = [0]
+
+    def op():
+        calls[0] += 1
+
+    seconds = tool_hot_paths.measure(op, 1, repeat=1)
+
+    assert 0 < seconds < tool_hot_paths.MIN_ROUND_SECONDS
+    # One round of at least MIN_ROUND_SECONDS, then the timed repeat of the same length.
+    assert calls[0] > 2
+
+
+def test_compare_flags_cases_over_the_threshold(capsys):
+    results = {"fast": 1.0, "slow": 3.0, "unseen": 1.0}
+
+    regressions = tool_hot_paths.compare(results, {"fast": 1.0, "slow": 1.0}, threshold=2.0)
+
+    assert regressions == ["slow"]
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[1].endswith("3.00x  REGRESSION") and lines[2].endswith("new")
+
+
+def test_baselines_are_recorded_then_compared(tmp_path):
+    baseline = tmp_path / "baselines.json"
+
+    first = run_benchmark(baseline)
+    recorded = json.loads(baseline.read_text())
+    # Pretend this machine used to be much faster.
+    baseline.write_text(json.dumps({CASE: recorded[CASE] / 100}))
+    regressed = run_benchmark(baseline)
+    resaved = run_benchmark(baseline, "--save-baseline")
+
+    assert first.returncode == 0 and list(recorded) == [CASE]
+    assert regressed.returncode == 1 and "REGRESSION" in regressed.stdout
+    assert resaved.returncode == 0
+    assert json.loads(baseline.read_text())[CASE] > recorded[CASE] / 100
@@ -0,0 +1,89 @@
+import subprocess
+
+import pytest
+
+from orchestrator import graph
+from orchestrator.changes import (
+    ADDED, MODIFIED, REMOVED, CODE, DOCS, CONFIG,
+    aggregate_commit_changes, classify_path, files_of_kind, push_changes,
+)
+from orchestrator.git_mirror import GitMirror
+
+
+def git(cwd, *args) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.name=tests", "-c", "user.email=tests@example.com", *args],
+        cwd=cwd, check=True, capture_output=True, text=True,
+    ).stdout.strip()
+
+
+@pytest.mark.parametrize("path, kind", [
+    ("src/app.py", CODE),
+    ("docs/guide.py", DOCS),
+    ("README", DOCS),
+    ("notes/usage.md", DOCS),
+    ("pyproject.toml", CONFIG),
+    ("requirements-dev.txt", CONFIG),
+    (".github/workflows/ci.yml", CONFIG),
+    ("Dockerfile", CONFIG),
+])
+def test_classify_path(path, kind):
+    assert classify_path(path) == kind
+
+
+def test_changes_are_netted_across_commits():
+    changes = aggregate_commit_changes([
+        {"added": ["new.py", "tmp.py"], "modified": ["app.py"], "removed": ["old.py"]},
+        {"added": ["old.py"], "modified": ["new.py"], "removed": ["tmp.py", "app.py"]},
+    ])
+
+    assert changes == {"new.py": ADDED, "old.py": MODIFIED, "app.py": REMOVED}
+
+
+def test_files_of_kind_leaves_out_removed_files():
+    changes = {"app.py": MODIFIED, "gone.py": REMOVED, "README.md": ADDED, "setup.cfg": MODIFIED}
+
+    assert files_of_kind(changes, CODE) == ["app.py"]
+    assert files_of_kind(changes, CODE, include_removed=True) == ["app.py", "gone.py"]
+    assert files_of_kind(changes, DOCS, CONFIG) == ["README.md", "setup.cfg"]
+
+
+def test_push_changes_prefer_the_mirror_diff(tmp_path):
+    work = tmp_path / "work"
+    work.mkdir()
+    git(work, "init", "-q", "-b", "main")
+    (work / "app.py").write_text("x = 1\n")
+    (work / "old.md").write_text("# Old\n")
+    git(work, "add", ".")
+    git(work, "commit", "-qm", "base")
+    before = git(work, "rev-parse", "HEAD")
+    (work / "app.py").write_text("x = 2\n")
+    (work / "lib.py").write_text("y = 1\n")
+    git(work, "rm", "-q", "old.md")
+    git(work, "add", ".")
+    git(work, "commit", "-qm", "change")
+    after = git(work, "rev-parse", "HEAD")
+    git(tmp_path, "clone", "-q", "--mirror", str(work), str(tmp_path / "mirrors" / "octo" / "repo.git"))
+    mirror = GitMirror(str(tmp_path / "mirrors"))
+    # The payload only lists some of the commits, e.g. after a force push.
+    payload = {"before": before, "after": after, "commits": [{"modified": ["app.py"]}]}
+
+    assert push_changes(payload, "octo/repo", mirror) == {"app.py": MODIFIED, "lib.py": ADDED, "old.md": REMOVED}
+    assert push_changes({**payload, "after": "f" * 40}, "octo/repo", mirror) == {"app.py": MODIFIED}
+    assert push_changes({**payload, "before": "0" * 40}, "octo/repo", mirror) == {"app.py": MODIFIED}
+
+
+@pytest.mark.parametrize("commits, route", [
+    ([{"modified": ["src/app.py", "README.md"]}], "coding"),
+    ([{"modified": ["setup.cfg"]}], "coding"),
+    ([{"added": ["docs/guide.md"], "modified": ["README.md"]}], "docs"),
+    ([{"removed": ["src/app.py"]}], "general"),
+    ([], "general"),
+])
+def test_pushes_are_routed_by_what_they_changed(commits, route):
+    payload = {"before": "a" * 40, "after": "b" * 40, "repository": {"full_name": "octo/repo"}, "commits": commits}
+    git_event = graph.summarize_git_context({"event_type": "push", "payload": payload})
+
+    state = graph.planner_node({"task_description": "Analyze recent push to octo/repo", "git_event": git_event})
+
+    assert state == {"agent_outcome": route}
@@ -0,0 +1,84 @@
+import pytest
+
+from mcp_server.main import new_run_state
+from orchestrator import graph
+from orchestrator.payload_store import PayloadStore
+
+WRITE_BATCH = "/tools/neo4j_memory/write_batch"
+TASK_STATUS = "/tasks/{task_id}"
+
+
+def fail_status_update_once(fake_mcp):
+    ok = fake_mcp.handlers[TASK_STATUS]
+    def flaky(**kwargs):
+        fake_mcp.handlers[TASK_STATUS] = ok
+        raise RuntimeError("MCP unavailable")
+    fake_mcp.handlers[TASK_STATUS] = flaky
+
+
+def start_docs_run(task_id: int, description: str) -> dict:
+    return graph.start_run(new_run_state(f"Update the documentation: {description}", task_id))
+
+
+def test_resume_continues_after_the_last_completed_node(fake_mcp, task_id):
+    fail_status_update_once(fake_mcp)
+    with pytest.raises(RuntimeError):
+        start_docs_run(task_id, "resume")
+    assert task_id in graph.incomplete_run_task_ids()
+
+    fake_mcp.calls.clear()
+    result = graph.resume_run(task_id)
+
+    # Only status_update (and its checklist reference write) runs again.
+    assert fake_mcp.routes() == [TASK_STATUS, WRITE_BATCH]
+    assert result["status_message"] == "Task status updated to completed in MCP"
+    assert task_id not in graph.incomplete_run_task_ids()
+
+
+def test_finished_and_unknown_runs_cannot_be_resumed(fake_mcp, task_id):
+    start_docs_run(task_id, "finished")
+
+    with pytest.raises(ValueError, match="already finished"):
+        graph.resume_run(task_id)
+    with pytest.raises(ValueError, match="No orchestrator run"):
+        graph.resume_run(task_id + 100_000)
+
+
+def test_retry_from_node_reuses_earlier_outputs(fake_mcp, task_id):
+    first = start_docs_run(task_id, "retry")
+    fake_mcp.calls.clear()
+
+    result = graph.retry_run_from_node(task_id, "status_update")
+
+    assert fake_mcp.routes() == [TASK_STATUS, WRITE_BATCH]
+    assert result["loom_checklist"] == first["loom_checklist"]
+
+
+def test_retry_from_a_node_that_never_ran(fake_mcp, task_id):
+    start_docs_run(task_id, "never ran")
+
+    with pytest.raises(ValueError, match="never ran"):
+        graph.find_node_checkpoint(task_id, "coding_agent")
+
+
+def test_payload_store_round_trip(tmp_path):
+    store = PayloadStore(str(tmp_path))
+    payload = {"ref": "refs/heads/main", "commits": [{"id": "a" * 40}]}
+
+    payload_id = store.put(payload)
+
+    assert store.put(b'{"ref":"refs/heads/main","commits":[{"id":"' + b"a" * 40 + b'"}]}') == payload_id
+    assert store.get(payload_id) == payload
+    with pytest.raises(ValueError):
+        store.get("0" * 64)
+
+
+def test_run_endpoints(client, fake_mcp, task_id):
+    start_docs_run(task_id, "endpoints")
+
+    run = client.get(f"/orchestrator/runs/{task_id}").json()
+    assert run["next_nodes"] == [] and run["status_message"] == "Task status updated to completed in MCP"
+    assert client.post(f"/orchestrator/runs/{task_id}/resume").status_code == 409
+    assert client.post(f"/orchestrator/runs/{task_id}/retry", params={"node": "coding_agent"}).status_code == 404
+    assert client.post(f"/orchestrator/runs/{task_id}/retry", params={"node": "status_update"}).status_code == 200
+    assert client.get(f"/orchestrator/runs/{task_id}").json()["job"]["kind"] == "retry"
@@ -0,0 +1,195 @@
+import threading
+import time
+
+import pytest
+
+from orchestrator.docs_pipeline import IncrementalDocsPipeline, ModuleDocSetPipeline
+
+
+class FakeDocsAgent:
+    def __init__(self, delay=0):
+        self.calls = []
+        self.failing = set()
+        self.delay = delay
+        self.running = self.peak = 0
+        self._lock = threading.Lock()
+
+    def generate_module_section(self, module, source, task_description):
+        with self._lock:
+            self.calls.append(module)
+        if module in self.failing:
+            raise RuntimeError("model overloaded")
+        return f"## {module}\n\n{source.splitlines()[0]}"
+
+    def generate_module_docs(self, module, outline, task_description):
+        with self._lock:
+            self.calls.append(module)
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            time.sleep(self.delay)
+            if module in self.failing:
+                raise RuntimeError("model overloaded")
+            return f"# {module}\n\n```\n{outline}\n```"
+        finally:
+            with self._lock:
+                self.running -= 1
+
+
+@pytest.fixture
+def repo(tmp_path):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "a.py").write_text("# alpha\n")
+    (tmp_path / "pkg" / "b.py").write_text("# beta\n")
+    (tmp_path / "main.py").write_text("# main\n")
+    (tmp_path / "notes.txt").write_text("not a module\n")
+    return tmp_path
+
+
+@pytest.fixture
+def agent():
+    return FakeDocsAgent()
+
+
+def read_doc(repo):
+    return (repo / "docs" / "architecture.md").read_text()
+
+
+def test_first_run_documents_every_module(repo, agent):
+    result = IncrementalDocsPipeline(agent).run(str(repo))
+
+    assert sorted(agent.calls) == ["main.py", "pkg/a.py", "pkg/b.py"]
+    assert result["written"] and result["sections"] == 3
+    doc = read_doc(repo)
+    assert doc.startswith("# Architecture\n")
+    assert "<!-- section: pkg/a.py -->\n## pkg/a.py\n\n# alpha\n" in doc
+
+
+def test_unchanged_repository_makes_no_calls(repo, agent):
+    IncrementalDocsPipeline(agent).run(str(repo))
+    agent.calls.clear()
+
+    result = IncrementalDocsPipeline(agent).run(str(repo))
+
+    assert agent.calls == []
+    assert result == {"regenerated": [], "removed": [], "failed": [], "sections": 3, "written": False}
+
+
+def test_only_changed_modules_are_regenerated(repo, agent):
+    pipeline = IncrementalDocsPipeline(agent)
+    pipeline.run(str(repo))
+    agent.calls.clear()
+    (repo / "pkg" / "a.py").write_text("# alpha, revised\n")
+    (repo / "main.py").unlink()
+
+    result = pipeline.run(str(repo))
+
+    assert agent.calls == ["pkg/a.py"]
+    assert (result["regenerated"], result["removed"]) == (["pkg/a.py"], ["main.py"])
+    sections = pipeline.writer.read_sections(str(repo / "docs" / "architecture.md"))
+    assert sections == {"pkg/a.py": "## pkg/a.py\n\n# alpha, revised", "pkg/b.py": "## pkg/b.py\n\n# beta"}
+
+
+def test_failed_sections_are_retried_on_the_next_run(repo, agent):
+    pipeline = IncrementalDocsPipeline(agent)
+    pipeline.run(str(repo))
+    (repo / "pkg" / "a.py").write_text("# alpha, revised\n")
+    (repo / "pkg" / "b.py").write_text("# beta, revised\n")
+    agent.failing = {"pkg/b.py"}
+
+    failed_run = pipeline.run(str(repo))
+    # The old section stays until it can be replaced.
+    assert "# beta\n" in read_doc(repo)
+    agent.calls.clear()
+    agent.failing = set()
+    retry = pipeline.run(str(repo))
+
+    assert (failed_run["regenerated"], failed_run["failed"], failed_run["written"]) == (["pkg/a.py"], ["pkg/b.py"], True)
+    assert agent.calls == ["pkg/b.py"] and retry["regenerated"] == ["pkg/b.py"]
+    assert "# beta, revised" in read_doc(repo)
+
+
+def test_nothing_is_written_when_every_call_fails(repo, agent):
+    agent.failing = {"main.py", "pkg/a.py", "pkg/b.py"}
+
+    result = IncrementalDocsPipeline(agent).run(str(repo))
+
+    assert result["failed"] == ["main.py", "pkg/a.py", "pkg/b.py"] and not result["written"]
+    assert not (repo / "docs" / "architecture.md").exists()
+
+
+@pytest.fixture
+def package(tmp_path):
+    (tmp_path / "app" / "db").mkdir(parents=True)
+    (tmp_path / "app" / "api.py").write_text('"""HTTP handlers."""\n\ndef get(path):\n    return path\n')
+    (tmp_path / "app" / "db" / "models.py").write_text('"""Table models."""\n\nclass Task:\n    pass\n')
+    (tmp_path / "cli.py").write_text("def main():\n    pass\n")
+    return tmp_path
+
+
+def test_doc_set_has_a_page_per_module_and_an_index_per_directory(package, agent):
+    result = ModuleDocSetPipeline(agent).run(str(package))
+
+    pages = package / "docs" / "modules"
+    assert result["regenerated"] == ["app/api.py", "app/db/models.py", "cli.py"]
+    assert (pages / "index.md").read_text() == "# Modules\n\n- [app/](app/index.md)\n- [cli.py](cli.py.md)\n"
+    assert (pages / "app" / "index.md").read_text() == (
+        "# `app/`\n\n- [db/](db/index.md)\n- [api.py](api.py.md): HTTP handlers.\n"
+    )
+    # Pages are generated from the outline, not the source.
+    assert "def get(path)" in (pages / "app" / "api.py.md").read_text()
+    assert "return path" not in (pages / "app" / "api.py.md").read_text()
+
+
+def test_changes_that_keep_the_outline_are_not_regenerated(package, agent):
+    pipeline = ModuleDocSetPipeline(agent)
+    pipeline.run(str(package))
+    agent.calls.clear()
+    (package / "app" / "api.py").write_text('"""HTTP handlers."""\n\ndef get(path):\n    return path.strip()\n')
+    (package / "cli.py").write_text("def main(argv=None):\n    pass\n")
+
+    result = pipeline.run(str(package))
+
+    assert agent.calls == ["cli.py"] and result["regenerated"] == ["cli.py"]
+
+
+def test_new_module_that_failed_is_left_out_of_the_index(package, agent):
+    pipeline = ModuleDocSetPipeline(agent)
+    pipeline.run(str(package))
+    (package / "app" / "jobs.py").write_text('"""Background jobs."""\n')
+    agent.failing = {"app/jobs.py"}
+
+    failed_run = pipeline.run(str(package))
+    app_index = (package / "docs" / "modules" / "app" / "index.md").read_text()
+    agent.failing = set()
+    retry = pipeline.run(str(package))
+
+    assert failed_run["failed"] == ["app/jobs.py"]
+    assert "jobs.py" not in app_index
+    assert retry["regenerated"] == ["app/jobs.py"]
+    assert "- [jobs.py](jobs.py.md): Background jobs." in (package / "docs" / "modules" / "app" / "index.md").read_text()
+
+
+def test_removed_modules_lose_their_page_and_empty_directories_their_index(package, agent):
+    pipeline = ModuleDocSetPipeline(agent)
+    pipeline.run(str(package))
+    (package / "app" / "db" / "models.py").unlink()
+
+    result = pipeline.run(str(package))
+
+    pages = package / "docs" / "modules"
+    assert result["removed"] == ["app/db/models.py"] and result["written"]
+    assert not (pages / "app" / "db" / "models.py.md").exists()
+    assert not (pages / "app" / "db" / "index.md").exists()
+    assert "db/" not in (pages / "app" / "index.md").read_text()
+
+
+def test_module_pages_are_generated_with_bounded_concurrency(tmp_path):
+    for n in range(8):
+        (tmp_path / f"module_{n}.py").write_text(f"def f{n}():\n    pass\n")
+    agent = FakeDocsAgent(delay=0.05)
+
+    result = ModuleDocSetPipeline(agent, concurrency=3).run(str(tmp_path))
+
+    assert len(result["regenerated"]) == 8
+    assert 1 < agent.peak <= 3
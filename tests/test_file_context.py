@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from mcp_server.models import CommitSummary, CoChangedFile, RelatedTask
+from mcp_server.tools import neo4j_memory
+from mcp_server.tools.neo4j_memory import AsyncNeo4jMemoryTool
+
+from fake_neo4j import FakeDriver, FakeRecord
+
+
+@pytest.fixture
+def driver():
+    driver = FakeDriver()
+    driver.responses = {
+        neo4j_memory.RELATED_TASKS_QUERY: [
+            {"id": 7, "description": "Fix parser", "status": "completed", "files": ["a.py", "b.py"]},
+            {"id": 3, "description": None, "status": "failed", "files": ["a.py"]},
+        ],
+        neo4j_memory.RECENT_COMMITS_QUERY: [
+            {"path": "a.py", "commits": [{"sha": "f" * 40, "repo_url": None, "event_type": "push", "task_id": 7}]},
+            {"path": "b.py", "commits": []},
+        ],
+        neo4j_memory.CO_CHANGED_FILES_QUERY: [
+            {"path": "a.py", "files": [{"path": "c.py", "co_changes": 2}]},
+            {"path": "b.py", "files": []},
+        ],
+    }
+    return driver
+
+
+@pytest.fixture
+def tool(driver):
+    memory = AsyncNeo4jMemoryTool()
+    memory._driver = driver
+    yield memory
+    asyncio.run(memory.close())
+
+
+def test_context_parameters_dedupe_paths_and_clamp_the_limit():
+    parameters = neo4j_memory._context_parameters(["a.py", "", "b.py", "a.py"], 10_000)
+
+    assert parameters["paths"] == ["a.py", "b.py"]
+    assert parameters["limit"] == neo4j_memory.CONTEXT_MAX_LIMIT
+    with pytest.raises(ValueError, match="At least one file path"):
+        neo4j_memory._context_parameters([""], 10)
+    with pytest.raises(ValueError, match="At most"):
+        neo4j_memory._context_parameters([f"{n}.py" for n in range(neo4j_memory.CONTEXT_MAX_PATHS + 1)], 10)
+
+
+def test_file_context_reads_the_three_lookups(tool, driver):
+    context = asyncio.run(tool.file_context(["a.py", "b.py"], limit=5))
+
+    assert context.related_tasks == [
+        RelatedTask(id=7, description="Fix parser", status="completed", files=["a.py", "b.py"]),
+        RelatedTask(id=3, status="failed", files=["a.py"]),
+    ]
+    assert context.recent_commits == {"a.py": [CommitSummary(sha="f" * 40, event_type="push", task_id=7)], "b.py": []}
+    assert context.co_changed_files == {"a.py": [CoChangedFile(path="c.py", co_changes=2)], "b.py": []}
+    assert driver.transactions == ["read", "read", "read"]
+    assert all(parameters["paths"] == ["a.py", "b.py"] and parameters["limit"] == 5 for _, parameters in driver.statements)
+
+
+def test_file_context_is_cached_until_a_task_is_written(tool, driver):
+    async def scenario():
+        await tool.file_context(["a.py"])
+        await tool.file_context(["a.py"])
+        reads = len(driver.statements)
+        await tool.add_relationship("Task", {"id": 8}, "File", {"path": "a.py"}, "AFFECTS_FILE")
+        await tool.file_context(["a.py"])
+        return reads
+
+    driver.records = [FakeRecord(type="AFFECTS_FILE")]
+    reads = asyncio.run(scenario())
+
+    assert reads == 3
+    assert len(driver.statements) == 3 + 1 + 3
+
+
+def test_context_endpoint(client, tool, monkeypatch):
+    monkeypatch.setattr("mcp_server.main.neo4j_memory", tool)
+
+    response = client.post("/tools/neo4j_memory/context", json={"paths": ["a.py", "b.py"]})
+    rejected = client.post("/tools/neo4j_memory/context", json={"paths": []})
+
+    assert response.status_code == 200
+    assert [task["id"] for task in response.json()["related_tasks"]] == [7, 3]
+    assert response.json()["co_changed_files"]["a.py"] == [{"path": "c.py", "co_changes": 2}]
+    assert rejected.status_code == 400
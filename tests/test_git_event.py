@@ -0,0 +1,47 @@
+from mcp_server.main import new_run_state
+from orchestrator import graph
+from orchestrator.state import GitEventSummary
+
+PUSH = {
+    "ref": "refs/heads/main",
+    "before": "a" * 40,
+    "after": "b" * 40,
+    "repository": {"full_name": "octo/repo"},
+    "head_commit": {"id": "b" * 40, "message": "Update the guide"},
+    "commits": [
+        {"id": "c" * 40, "added": ["docs/guide.md"], "modified": ["README.md"], "removed": ["docs/old.md"]},
+        {"id": "b" * 40, "added": [], "modified": ["docs/guide.md"], "removed": []},
+    ],
+}
+
+
+def test_summary_fields_are_tuples_after_a_checkpoint_round_trip():
+    # Checkpoint deserialization hands lists back.
+    summary = GitEventSummary(event_type="push", changed_files=["a.py"], code_files=["a.py"], removed_files=["b.py"])
+
+    assert summary.changed_files == ("a.py",) and summary.removed_files == ("b.py",)
+    assert summary.to_task_context()["change_counts"] == {"code": 1, "docs": 0, "config": 0, "removed": 1}
+
+
+def test_push_summary():
+    summary = graph.summarize_git_context({"event_type": "push", "repo_url": "https://github.com/octo/repo.git", "payload": PUSH})
+
+    assert (summary.repo_name, summary.head_sha, summary.base_sha) == ("octo/repo", "b" * 40, "a" * 40)
+    assert summary.changed_files == ("README.md", "docs/guide.md", "docs/old.md")
+    assert summary.docs_files == ("README.md", "docs/guide.md")
+    assert summary.removed_files == ("docs/old.md",)
+    assert summary.code_files == summary.config_files == ()
+    # The payload is stored once and referenced by ID.
+    assert graph.payload_store.get(summary.payload_id) == PUSH
+
+
+def test_runs_carry_the_summary_instead_of_the_payload(fake_mcp, task_id):
+    git_context = {"event_type": "push", "repo_name": "octo/repo", "payload_id": graph.payload_store.put(PUSH)}
+
+    graph.start_run(new_run_state("Push to octo/repo", task_id, git_context))
+
+    values = graph.get_run_state(task_id).values
+    assert values["git_context"] is None
+    assert isinstance(values["git_event"], GitEventSummary)
+    assert values["git_event"].docs_files == ("README.md", "docs/guide.md")
+    assert values["agent_outcome"] == "docs"
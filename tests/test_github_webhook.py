@@ -0,0 +1,107 @@
+import hashlib
+import hmac
+import json
+import uuid
+
+import pytest
+
+from mcp_server import main
+from mcp_server.github_webhook import extract_task_from_git_context, verify_signature
+
+SECRET = "webhook-secret"
+PUSH = {
+    "ref": "refs/heads/main",
+    "repository": {"full_name": "octo/repo", "clone_url": "https://github.com/octo/repo.git"},
+    "head_commit": {"message": "Fix the parser"},
+}
+
+
+def signature(body: bytes, secret: str = SECRET) -> str:
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def deliver(client, payload=PUSH, event="push", delivery_id=None, secret=SECRET, body=None):
+    body = body if body is not None else json.dumps(payload).encode()
+    headers = {
+        "X-GitHub-Event": event,
+        "X-GitHub-Delivery": delivery_id or uuid.uuid4().hex,
+        "content-type": "application/json",
+    }
+    if secret:
+        headers["X-Hub-Signature-256"] = signature(body, secret)
+    return client.post("/github-webhook", content=body, headers=headers)
+
+
+@pytest.fixture
+def signed(monkeypatch):
+    monkeypatch.setenv("GITHUB_WEBHOOK_SECRET", SECRET)
+
+
+def test_signatures_are_checked_against_the_raw_body():
+    body = b'{"zen": "Keep it logically awesome."}'
+    assert verify_signature(SECRET, body, signature(body))
+    assert not verify_signature(SECRET, body + b" ", signature(body))
+    assert not verify_signature(SECRET, body, signature(body)[len("sha256="):])
+    assert not verify_signature(SECRET, body, None)
+
+
+def test_a_signed_push_is_queued(client, signed):
+    delivery_id = uuid.uuid4().hex
+
+    response = deliver(client, delivery_id=delivery_id)
+
+    assert response.status_code == 202
+    task_id = response.json()["task_id"]
+    task = client.get(f"/tasks/{task_id}").json()
+    assert task["description"] == "Analyze recent push to octo/repo: Fix the parser"
+    assert main.job_queue.latest_job(task_id)["status"] == "queued"
+
+
+def test_a_bad_signature_is_rejected(client, signed):
+    response = deliver(client, secret="another-secret")
+    assert response.status_code == 401
+
+
+def test_deliveries_are_refused_without_a_secret(client):
+    assert deliver(client, secret=None).status_code == 503
+
+
+def test_unsigned_deliveries_can_be_allowed(client, monkeypatch):
+    monkeypatch.setenv("GITHUB_WEBHOOK_ALLOW_UNSIGNED", "1")
+    assert deliver(client, secret=None).status_code == 202
+
+
+def test_redeliveries_do_not_start_another_run(client, signed):
+    delivery_id = uuid.uuid4().hex
+    first = deliver(client, delivery_id=delivery_id).json()
+
+    again = deliver(client, delivery_id=delivery_id)
+
+    assert again.status_code == 200
+    assert again.json() == {"message": "Delivery already received.", "task_id": first["task_id"]}
+
+
+def test_other_events_are_ignored(client, signed):
+    response = deliver(client, event="star")
+    assert response.status_code == 200
+    assert response.json() == {"message": "Event 'star' ignored."}
+
+
+def test_a_body_that_is_not_a_json_object_is_rejected(client, signed):
+    assert deliver(client, body=b"not json").status_code == 400
+    assert deliver(client, body=b"[1, 2]").status_code == 400
+
+
+def test_task_descriptions_per_event():
+    context = {"repo_name": "octo/repo"}
+    assert extract_task_from_git_context({
+        **context, "event_type": "pull_request",
+        "payload": {"action": "opened", "pull_request": {"title": "Add caching"}},
+    }) == "Process pull request 'Add caching' (opened) in octo/repo"
+    assert extract_task_from_git_context({
+        **context, "event_type": "issues",
+        "payload": {"action": "opened", "issue": {"title": "Crash", "body": "On start"}},
+    }) == "Task from new issue 'Crash': On start"
+    assert extract_task_from_git_context({**context, "event_type": "release", "payload": {}}) == (
+        "Handle GitHub event 'release' for octo/repo"
+    )
@@ -0,0 +1,127 @@
+import subprocess
+import sys
+import threading
+import types
+
+import pytest
+
+from mcp_server.main import new_run_state
+from orchestrator import graph
+from orchestrator.state import GitEventSummary
+
+CHECKLIST = "/tools/loom_helper/generate_demo_checklist"
+WRITE_BATCH = "/tools/neo4j_memory/write_batch"
+TASK_STATUS = "/tasks/{task_id}"
+
+
+def run_docs_task(task_id: int, description: str) -> dict:
+    # "documentation" routes to the docs agent, which returns at once without a repository.
+    return graph.start_run(new_run_state(f"Update the documentation: {description}", task_id))
+
+
+def test_latest_status_reducer_keeps_the_last_update():
+    assert graph._latest_status("Context stored in Neo4j", "Loom checklist generated") == "Loom checklist generated"
+
+
+def test_status_update_waits_for_both_branches(fake_mcp, task_id):
+    result = run_docs_task(task_id, "fan-in")
+
+    routes = fake_mcp.routes()
+    assert routes.index(TASK_STATUS) > routes.index(CHECKLIST)
+    assert routes.index(TASK_STATUS) > routes.index(WRITE_BATCH)
+    assert result["status_message"] == "Task status updated to completed in MCP"
+    assert result["loom_checklist"].startswith("- [ ] Update the documentation")
+    assert not result["timed_out_nodes"] and not result["failed_nodes"]
+
+
+def test_failing_soft_branch_does_not_fail_the_run(fake_mcp, task_id):
+    def unreachable(**kwargs):
+        raise ConnectionError("Neo4j is down")
+    fake_mcp.handlers[WRITE_BATCH] = unreachable
+
+    result = run_docs_task(task_id, "soft failure")
+
+    assert result["failed_nodes"] == ["store_context"]
+    assert result["status_message"].endswith("(failed: store_context)")
+    assert result["loom_checklist"]
+    assert TASK_STATUS in fake_mcp.routes()
+    assert not graph.get_run_state(task_id).next
+
+
+def test_slow_soft_branch_is_abandoned(fake_mcp, monkeypatch, task_id):
+    release = threading.Event()
+    def slow_checklist(**kwargs):
+        release.wait(5)
+        return "late"
+    fake_mcp.handlers[CHECKLIST] = slow_checklist
+    monkeypatch.setitem(graph.NODE_TIMEOUTS, "loom_checklist", 0.2)
+
+    try:
+        result = run_docs_task(task_id, "soft timeout")
+    finally:
+        release.set()
+
+    assert result["timed_out_nodes"] == ["loom_checklist"]
+    assert "(timed out: loom_checklist)" in result["status_message"]
+    assert "checklist" not in (result.get("artifacts") or {})
+
+
+def test_failing_hard_node_fails_the_run(fake_mcp, task_id):
+    def rejected(**kwargs):
+        raise RuntimeError("MCP rejected the update")
+    fake_mcp.handlers[TASK_STATUS] = rejected
+
+    with pytest.raises(RuntimeError, match="MCP rejected the update"):
+        run_docs_task(task_id, "hard failure")
+    assert graph.get_run_state(task_id).next == ("status_update",)
+
+
+def git(cwd, *args) -> str:
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+@pytest.fixture
+def remote(tmp_path, monkeypatch):
+    """A bare repository with one commit, for the coding agent to clone and push to."""
+    for variable in ("GIT_AUTHOR_NAME", "GIT_COMMITTER_NAME"):
+        monkeypatch.setenv(variable, "tests")
+    for variable in ("GIT_AUTHOR_EMAIL", "GIT_COMMITTER_EMAIL"):
+        monkeypatch.setenv(variable, "tests@example.com")
+    bare = tmp_path / "remote.git"
+    git(tmp_path, "init", "-q", "--bare", "-b", "main", str(bare))
+    seed = tmp_path / "seed"
+    git(tmp_path, "clone", "-q", str(bare), str(seed))
+    (seed / "README.md").write_text("# Remote\n")
+    git(seed, "add", "README.md")
+    git(seed, "commit", "-qm", "Initial commit")
+    git(seed, "push", "-q", "origin", "HEAD:main")
+    return bare
+
+
+def test_timed_out_coding_node_stops_before_pushing(fake_mcp, monkeypatch, remote, task_id):
+    release = threading.Event()
+    class SlowCoder:
+        def generate_code(self, task, file_path, history=None):
+            release.wait(5)
+            return "def fibonacci(n):\n    return n\n"
+    monkeypatch.setitem(sys.modules, "agents.gemini_coder", types.SimpleNamespace(GeminiCodingAgent=SlowCoder))
+    monkeypatch.setitem(graph.NODE_TIMEOUTS, "coding_agent", 0.2)
+    state = new_run_state("Implement fibonacci", task_id)
+    state["git_event"] = GitEventSummary(event_type="issues", repo_name="octo/repo", repo_url=str(remote))
+
+    with pytest.raises(TimeoutError):
+        graph.start_run(state)
+    assert graph.abandoned_nodes(task_id) == ["coding_agent"]
+    with pytest.raises(ValueError, match="still running"):
+        graph.retry_run_from_node(task_id, "coding_agent")
+
+    release.set()
+    assert graph.wait_for_abandoned_nodes(task_id, timeout=10)
+    # The abandoned attempt stopped at its cancellation check instead of pushing.
+    assert git(remote, "rev-list", "--count", "main") == "1"
+
+    result = graph.retry_run_from_node(task_id, "coding_agent")
+
+    assert result["status_message"] == "Task status updated to completed in MCP"
+    assert git(remote, "rev-list", "--count", "main") == "2"
+    assert git(remote, "log", "-1", "--format=%s", "main") == "MCP: Implement Fibonacci script"
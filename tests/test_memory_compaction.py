@@ -0,0 +1,89 @@
+import asyncio
+import time
+
+from mcp_server.tools import neo4j_compaction
+from mcp_server.tools.memory_compaction import MemoryCompactionJob
+from mcp_server.tools.neo4j_compaction import compact_neo4j
+
+
+class RecordingBackend:
+    def __init__(self):
+        self.passes = []
+
+    async def compact(self, now, cutoff, batch_size):
+        self.passes.append((now, cutoff, batch_size))
+        return {"aged_out_tasks": 0}
+
+
+class ScriptedMemoryTool:
+    """run_write answers each statement with the next of its scripted batch counts, then 0."""
+
+    def __init__(self, counts):
+        self.counts = {statement: list(batches) for statement, batches in counts.items()}
+        self.writes = []
+
+    async def run_write(self, statement, parameters, labels, operation="write"):
+        self.writes.append((operation, parameters, list(labels)))
+        batches = self.counts.get(statement)
+        return [{"count": batches.pop(0) if batches else 0}]
+
+
+def test_pass_deletes_tasks_older_than_the_retention():
+    backend = RecordingBackend()
+    job = MemoryCompactionJob(backend, retention_days=2, batch_size=50, interval=0)
+
+    before = int(time.time())
+    asyncio.run(job.run())
+
+    (now, cutoff, batch_size), = backend.passes
+    assert now >= before and now - cutoff == 2 * 86400
+    assert batch_size == 50
+
+
+def test_zero_retention_keeps_every_task():
+    backend = RecordingBackend()
+    job = MemoryCompactionJob(backend, retention_days=0, batch_size=50, interval=0)
+
+    asyncio.run(job.run())
+
+    assert backend.passes[0][1] is None
+
+
+def test_steps_repeat_in_batches_until_nothing_is_left():
+    tool = ScriptedMemoryTool({
+        neo4j_compaction.AGE_OUT_TASKS: [100, 100, 30],
+        neo4j_compaction.DELETE_ORPHANS["Commit"]: [5],
+        neo4j_compaction.DELETE_ORPHANS["File"]: [2],
+    })
+
+    counts = asyncio.run(compact_neo4j(tool, now=2_000_000, cutoff=1_000_000, batch_size=100))
+
+    assert counts["aged_out_tasks"] == 230
+    assert counts["deleted_orphans"] == 7
+    assert counts["backfilled_tasks"] == counts["rolled_up_files"] == 0
+    age_out = [(parameters, labels) for operation, parameters, labels in tool.writes if operation == "compaction_age_out_tasks"]
+    assert age_out == [({"cutoff": 1_000_000, "batch_size": 100}, ["Task", "File"])] * 4
+    assert all(parameters["batch_size"] == 100 for _, parameters, _ in tool.writes)
+
+
+def test_no_tasks_are_aged_out_without_a_cutoff():
+    tool = ScriptedMemoryTool({neo4j_compaction.AGE_OUT_TASKS: [100]})
+
+    counts = asyncio.run(compact_neo4j(tool, now=2_000_000, cutoff=None, batch_size=100))
+
+    assert counts["aged_out_tasks"] == 0
+    assert "compaction_age_out_tasks" not in {operation for operation, _, _ in tool.writes}
+
+
+def test_compact_endpoint(client, monkeypatch):
+    class FailingBackend:
+        async def compact(self, now, cutoff, batch_size):
+            raise ConnectionError("Neo4j is down")
+
+    monkeypatch.setattr("mcp_server.main.compaction_job", MemoryCompactionJob(RecordingBackend(), interval=0))
+    assert client.post("/tools/neo4j_memory/compact").json() == {"aged_out_tasks": 0}
+
+    monkeypatch.setattr("mcp_server.main.compaction_job", MemoryCompactionJob(FailingBackend(), interval=0))
+    response = client.post("/tools/neo4j_memory/compact")
+    assert response.status_code == 503
+    assert response.json()["detail"] == "Compaction failed: Neo4j is down"
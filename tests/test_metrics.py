@@ -0,0 +1,55 @@
+from prometheus_client import REGISTRY
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_requests_are_labelled_with_the_route_template(client):
+    task_id = client.post("/tasks/", params={"task_description": "metrics"}).json()["id"]
+    before = sample("mcp_http_requests_total", method="GET", route="/tasks/{task_id}", status="200")
+    missing_before = sample("mcp_http_requests_total", method="GET", route="/tasks/{task_id}", status="404")
+
+    client.get(f"/tasks/{task_id}")
+    client.get("/tasks/999999999")
+
+    assert sample("mcp_http_requests_total", method="GET", route="/tasks/{task_id}", status="200") == before + 1
+    assert sample("mcp_http_requests_total", method="GET", route="/tasks/{task_id}", status="404") == missing_before + 1
+    assert sample("mcp_http_request_duration_seconds_count", method="GET", route="/tasks/{task_id}") >= 2
+
+
+def test_unmatched_paths_share_one_label(client):
+    before = sample("mcp_http_requests_total", method="GET", route="unmatched", status="404")
+
+    client.get("/no/such/path/1")
+    client.get("/no/such/path/2")
+
+    assert sample("mcp_http_requests_total", method="GET", route="unmatched", status="404") == before + 2
+
+
+def test_tool_and_task_store_metrics(client, tmp_path):
+    path = tmp_path / "module.py"
+    path.write_text("x = 1\n")
+    before = sample("mcp_file_bytes_read_total", tool="read_repo")
+
+    assert client.get("/tools/read_repo/read_file", params={"file_path": str(path)}).json() == "x = 1\n"
+
+    assert sample("mcp_file_bytes_read_total", tool="read_repo") == before + 6
+    assert sample("mcp_tool_io_in_progress", tool="read_repo") == 0
+    tasks = len(client.get("/tasks/").json())
+    body = client.get("/metrics").text
+    assert f"mcp_task_store_size {float(tasks)}" in body
+
+
+def test_counting_bytes_keeps_text_mode_io(tmp_path):
+    from mcp_server.tools.generate_code import CodeGenerationTool
+    from mcp_server.tools.read_repo import RepoReadTool
+    path = tmp_path / "windows.py"
+    path.write_bytes(b"def f():\r\n    return 1\r\n")
+    before = sample("mcp_file_bytes_written_total", tool="generate_code")
+
+    assert RepoReadTool().read_file(str(path)) == "def f():\n    return 1\n"
+    assert CodeGenerationTool().update_file(str(path), "    return 2\n", "    return 1\n").startswith("Successfully")
+
+    assert RepoReadTool().read_file(str(path)) == "def f():\n    return 2\n"
+    assert sample("mcp_file_bytes_written_total", tool="generate_code") == before + len("def f():\n    return 2\n")
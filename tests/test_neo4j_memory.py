@@ -0,0 +1,171 @@
+import asyncio
+import json
+
+import pytest
+from prometheus_client import REGISTRY
+
+from mcp_server.tools import neo4j_memory
+from mcp_server.tools.neo4j_memory import AsyncNeo4jMemoryTool
+
+from fake_neo4j import FakeDriver, FakeRecord
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+@pytest.fixture
+def driver():
+    return FakeDriver()
+
+
+@pytest.fixture
+def tool(driver):
+    memory = AsyncNeo4jMemoryTool()
+    memory._driver = driver
+    yield memory
+    run(memory.close())
+
+
+def test_pool_settings_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv("NEO4J_URI", "bolt://graph:7687")
+    monkeypatch.setenv("NEO4J_MAX_CONNECTION_POOL_SIZE", "7")
+    monkeypatch.setenv("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", "2.5")
+
+    uri, auth, pool_config = neo4j_memory._connection_settings()
+    run(AsyncNeo4jMemoryTool().close())
+
+    assert uri == "bolt://graph:7687" and auth == ("neo4j", "password")
+    assert pool_config["max_connection_pool_size"] == 7
+    assert pool_config["connection_acquisition_timeout"] == 2.5
+    assert REGISTRY.get_sample_value("mcp_neo4j_pool_max_size", {"driver": "async"}) == 7
+
+
+def test_sessions_name_the_database_and_are_released(tool, driver, monkeypatch):
+    monkeypatch.setenv("NEO4J_DATABASE", "memory")
+    driver.records = [FakeRecord(n=1)]
+
+    run(tool.query("MATCH (t:Task) RETURN t.id AS n"))
+    run(tool.add_node("Task", {"id": 1}))
+
+    assert [kwargs["database"] for kwargs in driver.session_kwargs] == ["memory", "memory"]
+    assert [kwargs["default_access_mode"] for kwargs in driver.session_kwargs] == ["READ", "WRITE"]
+    assert driver.transactions == ["read", "write"]
+    assert driver.open_sessions == 0
+
+
+def test_close_closes_the_driver(driver):
+    memory = AsyncNeo4jMemoryTool()
+    memory._driver = driver
+
+    run(memory.close())
+
+    assert driver.closed
+
+
+def test_statement_text_does_not_depend_on_property_order():
+    first = neo4j_memory._node_statement("Task", {"status": "queued", "id": 1})
+    hits = neo4j_memory.statement_cache_info()["node"]["hits"]
+    second = neo4j_memory._node_statement("Task", {"id": 2, "description": "docs", "status": "done"})
+
+    assert first == second == "MERGE (n:Task {id: $props.id}) ON CREATE SET n += $props ON MATCH SET n += $props RETURN n"
+    assert neo4j_memory.statement_cache_info()["node"]["hits"] == hits + 1
+
+
+@pytest.mark.parametrize("label", ["Secret", "Task) DETACH DELETE (n", ""])
+def test_unknown_labels_are_rejected(tool, driver, label):
+    with pytest.raises(ValueError, match="not allowed"):
+        run(tool.add_node(label, {"id": 1}))
+
+    assert driver.statements == []
+
+
+def test_unknown_relationship_types_are_rejected(tool, driver):
+    with pytest.raises(ValueError, match="Relationship type 'OWNS' is not allowed"):
+        run(tool.add_relationship("Task", {"id": 1}, "File", {"path": "a.py"}, "OWNS"))
+
+    assert driver.statements == []
+
+
+def test_write_batch_runs_one_statement_per_group(tool, driver):
+    written = run(tool.write_batch(
+        [("Task", {"id": 1, "status": "done"}), ("Task", {"status": "queued", "id": 2}), ("File", {"path": "a.py"})],
+        [("Task", {"id": 1}, "File", {"path": "a.py"}, "AFFECTS_FILE"),
+         ("Task", {"id": 2}, "File", {"path": "a.py"}, "AFFECTS_FILE")],
+    ))
+
+    assert written == 5
+    assert driver.transactions == ["write"]
+    assert [len(parameters["rows"]) for _, parameters in driver.statements] == [2, 1, 2]
+
+
+@pytest.mark.parametrize("query", [
+    "MATCH (t:Task) RETURN t.id",
+    "MATCH (t:Task) RETURN t.id;",
+    "MATCH (t:Task) WITH t RETURN t.id // newest first",
+    "MATCH (t:Task) WHERE t.description = 'LIMIT 5' RETURN [x IN t.tags WHERE x <> 'WITH'] AS tags",
+])
+def test_queries_ending_in_return_are_bounded_in_the_database(query):
+    statement = neo4j_memory._bounded_statement(query)
+
+    assert statement.endswith("\nSKIP $_mcp_skip LIMIT $_mcp_limit")
+    assert ";" not in statement
+
+
+@pytest.mark.parametrize("query", [
+    "MATCH (t:Task) RETURN t.id LIMIT 5",
+    "MATCH (t:Task) RETURN t.id AS id UNION MATCH (c:Commit) RETURN c.sha AS id",
+    "MATCH (t:Task) RETURN t.id AS id ORDER BY id SKIP 10",
+    "CALL db.labels()",
+    "SHOW INDEXES",
+])
+def test_other_queries_are_paged_on_the_client(query):
+    assert neo4j_memory._bounded_statement(query) is None
+
+
+def test_query_pages_follow_the_cursor(tool, driver):
+    driver.records = [{"id": n} for n in range(5)]
+    query = "MATCH (t:Task) RETURN t.id AS id"
+
+    pages = [run(tool.query(query, limit=2))]
+    while pages[-1]["next_cursor"]:
+        pages.append(run(tool.query(query, limit=2, cursor=pages[-1]["next_cursor"])))
+
+    assert [[r["id"] for r in page["records"]] for page in pages] == [[0, 1], [2, 3], [4]]
+    # The database is asked for one record more than the page, to see whether another follows.
+    assert [(p["_mcp_skip"], p["_mcp_limit"]) for _, p in driver.statements] == [(0, 3), (2, 3), (4, 3)]
+
+
+def test_unbounded_queries_are_sliced_on_the_client(tool, driver):
+    driver.records = [{"id": n} for n in range(5)]
+    query = "MATCH (t:Task) RETURN t.id AS id UNION MATCH (c:Commit) RETURN c.id AS id"
+
+    first = run(tool.query(query, limit=3))
+    second = run(tool.query(query, limit=3, cursor=first["next_cursor"]))
+
+    assert [r["id"] for r in first["records"] + second["records"]] == [0, 1, 2, 3, 4]
+    assert second["next_cursor"] is None
+    assert all(statement == query for statement, _ in driver.statements)
+
+
+def test_query_endpoint_rejects_a_cursor_of_another_query(client, tool, driver, monkeypatch):
+    monkeypatch.setattr("mcp_server.main.neo4j_memory", tool)
+    driver.records = [{"id": n} for n in range(3)]
+    first = client.post("/tools/neo4j_memory/query", json={"query": "MATCH (t:Task) RETURN t.id AS id", "limit": 1}).json()
+
+    response = client.post("/tools/neo4j_memory/query", json={
+        "query": "MATCH (f:File) RETURN f.path AS id", "limit": 1, "cursor": first["next_cursor"],
+    })
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cursor does not belong to this query."
+
+
+def test_stream_endpoint_sends_ndjson_up_to_the_limit(client, tool, driver, monkeypatch):
+    monkeypatch.setattr("mcp_server.main.neo4j_memory", tool)
+    driver.records = [{"id": n} for n in range(10)]
+
+    response = client.post("/tools/neo4j_memory/query/stream", json={"query": "MATCH (t:Task) RETURN t.id AS id", "limit": 4})
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.text.splitlines()] == [{"id": n} for n in range(4)]
@@ -0,0 +1,128 @@
+import subprocess
+from types import SimpleNamespace
+
+import pytest
+
+from orchestrator.changes import ADDED, MODIFIED, REMOVED
+from orchestrator.git_mirror import GitMirror
+from orchestrator.pr_files import GitHubPullRequestAPI, PullRequestFileResolver
+
+
+class FakeAPI:
+    available = True
+
+    def __init__(self, files):
+        self.files = files
+        self.calls = 0
+
+    def list_files(self, repo_name, pr_number):
+        self.calls += 1
+        return dict(self.files)
+
+
+class FakeGithub:
+    """The part of PyGithub's client list_files walks."""
+
+    def __init__(self, files):
+        pull = SimpleNamespace(get_files=lambda: files)
+        self.repo = SimpleNamespace(get_pull=lambda number: pull)
+
+    def get_repo(self, name):
+        return self.repo
+
+
+def pr_file(filename, status, previous_filename=None):
+    return SimpleNamespace(filename=filename, status=status, previous_filename=previous_filename)
+
+
+def git(cwd, *args) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.name=tests", "-c", "user.email=tests@example.com", *args],
+        cwd=cwd, check=True, capture_output=True, text=True,
+    ).stdout.strip()
+
+
+@pytest.fixture
+def resolver_with(tmp_path):
+    def build(api, mirror_dir=None):
+        return PullRequestFileResolver(api=api, cache_dir=str(tmp_path / "cache"), mirror=GitMirror(mirror_dir or ""))
+    return build
+
+
+def test_github_statuses_and_renames():
+    api = GitHubPullRequestAPI(token="token")
+    api._client = FakeGithub([
+        pr_file("src/new.py", "added"),
+        pr_file("src/app.py", "modified"),
+        pr_file("docs/old.md", "removed"),
+        pr_file("docs/guide.md", "renamed", previous_filename="docs/intro.md"),
+        pr_file("setup.cfg", "copied"),
+    ])
+
+    assert api.list_files("octo/repo", 7) == {
+        "src/new.py": ADDED,
+        "src/app.py": MODIFIED,
+        "docs/old.md": REMOVED,
+        "docs/intro.md": REMOVED,
+        "docs/guide.md": ADDED,
+        "setup.cfg": MODIFIED,
+    }
+
+
+def test_resolved_files_are_cached_per_head(resolver_with):
+    api = FakeAPI({"b.py": MODIFIED, "a.py": ADDED})
+
+    files = resolver_with(api).resolve("octo/repo", 7, "1" * 40)
+
+    assert list(files.items()) == [("a.py", ADDED), ("b.py", MODIFIED)]
+    # A new resolver (another worker, or after a restart) reads the file cache.
+    assert resolver_with(api).resolve("octo/repo", 7, "1" * 40) == files
+    assert api.calls == 1
+    resolver_with(api).resolve("octo/repo", 7, "2" * 40)
+    assert api.calls == 2
+
+
+def test_without_a_head_sha_nothing_is_cached(resolver_with):
+    api = FakeAPI({"a.py": MODIFIED})
+    resolver = resolver_with(api)
+
+    resolver.resolve("octo/repo", 7, None)
+    resolver.resolve("octo/repo", 7, None)
+
+    assert api.calls == 2
+
+
+def test_nothing_is_resolved_without_credentials(resolver_with):
+    assert resolver_with(GitHubPullRequestAPI(token="")).resolve("octo/repo", 7, "1" * 40) == {}
+
+
+def test_a_mirror_holding_both_commits_is_used(resolver_with, tmp_path):
+    work = tmp_path / "work"
+    work.mkdir()
+    git(work, "init", "-q", "-b", "main")
+    (work / "app.py").write_text("x = 1\n")
+    (work / "intro.md").write_text("# Intro\n")
+    git(work, "add", ".")
+    git(work, "commit", "-qm", "base")
+    git(work, "checkout", "-qb", "feature")
+    (work / "app.py").write_text("x = 2\n")
+    git(work, "mv", "intro.md", "guide.md")
+    git(work, "commit", "-qam", "feature")
+    head = git(work, "rev-parse", "HEAD")
+    # A commit on main after the branch point is not part of the pull request.
+    git(work, "checkout", "-q", "main")
+    (work / "later.py").write_text("y = 1\n")
+    git(work, "add", ".")
+    git(work, "commit", "-qm", "later")
+    main_head = git(work, "rev-parse", "HEAD")
+    mirrors = tmp_path / "mirrors"
+    git(tmp_path, "clone", "-q", "--mirror", str(work), str(mirrors / "octo" / "repo.git"))
+    api = FakeAPI({})
+
+    files = resolver_with(api, str(mirrors)).resolve("octo/repo", 7, head, main_head)
+
+    assert files == {"app.py": MODIFIED, "guide.md": ADDED, "intro.md": REMOVED}
+    assert api.calls == 0
+    # A head the mirror has not fetched yet falls back to the API.
+    resolver_with(api, str(mirrors)).resolve("octo/repo", 7, "f" * 40, main_head)
+    assert api.calls == 1
@@ -0,0 +1,95 @@
+import asyncio
+import types
+
+import pytest
+
+from mcp_server.tools import neo4j_query_cache
+from mcp_server.tools.neo4j_memory import ALLOWED_LABELS, AsyncNeo4jMemoryTool
+from mcp_server.tools.neo4j_query_cache import ALL_LABELS, QueryCache, query_labels
+
+from fake_neo4j import FakeDriver, FakeRecord
+
+TASKS = frozenset(["Task"])
+FILES = frozenset(["File"])
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(neo4j_query_cache, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def cached(cache, key, labels, value):
+    cache.set(key, labels, value, cache.label_versions(labels))
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = QueryCache("test", max_entries=8, ttl=30)
+    cached(cache, "tasks", TASKS, [1])
+
+    clock[0] += 29
+    assert cache.get("tasks") == [1]
+    clock[0] += 2
+    assert cache.get("tasks") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryCache("test", max_entries=2, ttl=60)
+    cached(cache, "a", TASKS, "a")
+    cached(cache, "b", TASKS, "b")
+    cache.get("a")
+    cached(cache, "c", TASKS, "c")
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == ("a", None, "c")
+
+
+def test_writes_only_drop_entries_of_their_labels():
+    cache = QueryCache("test", max_entries=8, ttl=60)
+    cached(cache, "tasks", TASKS, "tasks")
+    cached(cache, "files", FILES, "files")
+    cached(cache, "anything", frozenset([ALL_LABELS]), "anything")
+
+    cache.invalidate(["File"])
+
+    assert (cache.get("tasks"), cache.get("files"), cache.get("anything")) == ("tasks", None, None)
+
+
+def test_a_result_read_before_a_write_is_not_stored():
+    cache = QueryCache("test", max_entries=8, ttl=60)
+    versions = cache.label_versions(TASKS)
+    cache.invalidate(["Task"])
+
+    cache.set("tasks", TASKS, "stale", versions)
+
+    assert cache.get("tasks") is None
+
+
+def test_query_labels():
+    assert query_labels("MATCH (t:Task)-[:AFFECTS_FILE]->(f:File) RETURN f", ALLOWED_LABELS) == {"Task", "File"}
+    assert query_labels("MATCH (t:Task)--(n) RETURN n", ALLOWED_LABELS) == {ALL_LABELS}
+    assert query_labels("MATCH (s:Secret) RETURN s", ALLOWED_LABELS) == {ALL_LABELS}
+    assert query_labels("MATCH (t:Task) RETURN count(t)", ALLOWED_LABELS) == {"Task"}
+
+
+def test_tool_serves_repeated_queries_from_the_cache_until_a_write():
+    driver = FakeDriver([FakeRecord(id=1)])
+    tool = AsyncNeo4jMemoryTool()
+    tool._driver = driver
+    query = "MATCH (t:Task) RETURN t.id AS id"
+
+    async def scenario():
+        first = await tool.query(query)
+        # Formatting differences share the entry.
+        second = await tool.query("MATCH (t:Task)\n  RETURN t.id AS id;")
+        await tool.add_node("File", {"path": "a.py"})
+        third = await tool.query(query)
+        await tool.add_node("Task", {"id": 2})
+        await tool.query(query)
+        await tool.close()
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+
+    assert first == second == third
+    assert driver.transactions == ["read", "write", "write", "read"]
@@ -0,0 +1,63 @@
+import subprocess
+
+from mcp_server.github_webhook import WebhookDeliveries
+from orchestrator.payload_store import PayloadStore
+from orchestrator.replay import build_report, create_bare_repo, create_event_repos, generate_events, record_events
+
+
+def test_generated_events_are_reproducible():
+    events = generate_events(50, seed=3)
+
+    assert events == generate_events(50, seed=3)
+    assert {event["event_type"] for event in events} == {"push", "pull_request", "issues"}
+    for event in events:
+        if event["event_type"] == "pull_request":
+            pr = event["payload"]["pull_request"]
+            assert len(pr["head"]["sha"]) == len(pr["base"]["sha"]) == 40
+
+
+def test_every_event_pushes_to_its_own_repository(tmp_path):
+    repos = create_event_repos(create_bare_repo(str(tmp_path)), str(tmp_path), 3)
+
+    assert len(set(repos)) == 3
+    for repo in repos:
+        log = subprocess.run(["git", "-C", repo, "log", "--format=%s", "main"], capture_output=True, text=True, check=True)
+        assert log.stdout.strip() == "Initial commit"
+
+
+def test_received_events_are_recorded_with_their_payloads(tmp_path):
+    state_db, payload_dir = str(tmp_path / "state.sqlite"), str(tmp_path / "payloads")
+    deliveries, store = WebhookDeliveries(state_db), PayloadStore(payload_dir)
+    payload = {"action": "opened", "issue": {"title": "Crash"}}
+    deliveries.claim("delivery-1", "issues")
+    deliveries.record("delivery-1", store.put(payload), 1)
+    # Claimed but never stored, e.g. a delivery that failed: not replayable.
+    deliveries.claim("delivery-2", "push")
+    deliveries.close()
+
+    assert record_events(state_db, payload_dir) == [
+        {"event_type": "issues", "delivery_id": "delivery-1", "payload": payload},
+    ]
+
+
+def test_report():
+    sent = [{"accepted": True, "ack_seconds": 0.01}, {"accepted": True, "ack_seconds": 0.03}, {"accepted": False, "ack_seconds": 0.02}]
+    jobs = {
+        1: {"status": "done", "queued_at": 100.0, "started_at": 101.0, "finished_at": 105.0},
+        2: {"status": "failed", "queued_at": 102.0, "started_at": 102.5, "finished_at": 104.0},
+    }
+    before = {("node", "planner"): (1.0, 2.0), ("git", "git push"): (3.0, 5.0)}
+    after = {("node", "planner"): (2.0, 4.0), ("node", "status_update"): (0.5, 1.0), ("git", "git push"): (3.0, 5.0)}
+
+    report = build_report(sent, jobs, before, after, wall_seconds=6.0)
+
+    assert (report["events_sent"], report["events_accepted"]) == (3, 2)
+    assert (report["runs_done"], report["runs_failed"]) == (1, 1)
+    assert report["throughput_runs_per_second"] == 2 / 5
+    assert report["queue_seconds"]["max"] == 1.0
+    assert report["run_seconds"]["p50"] == 2.75
+    # Only spans recorded during the replay are reported.
+    assert report["spans"] == {
+        "node:planner": {"count": 2, "mean_seconds": 0.5},
+        "node:status_update": {"count": 1, "mean_seconds": 0.5},
+    }
@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+
+from mcp_server.models import CommitSummary, CoChangedFile
+from mcp_server.tools.memory_backend import create_memory_backend
+from mcp_server.tools.sqlite_memory import SqliteMemoryGraph
+
+TASK_QUERY = "MATCH (t:Task {id: $id}) RETURN t"
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+@pytest.fixture
+def graph():
+    memory = SqliteMemoryGraph(":memory:")
+    yield memory
+    run(memory.close())
+
+
+def properties(graph, query, parameters=None):
+    page = run(graph.query(query, parameters or {}))
+    return [next(iter(record.values()))["properties"] for record in page["records"]]
+
+
+def store_task(graph, task_id, paths, sha=None, updated_at=None):
+    task = {"id": task_id, "description": f"task {task_id}", "status": "completed"}
+    if updated_at is not None:
+        task["updated_at"] = updated_at
+    nodes = [("Task", task)] + [("File", {"path": path}) for path in paths]
+    relationships = [("Task", {"id": task_id}, "File", {"path": path}, "AFFECTS_FILE") for path in paths]
+    if sha:
+        nodes.append(("Commit", {"sha": sha, "event_type": "push"}))
+        relationships.append(("Task", {"id": task_id}, "Commit", {"sha": sha}, "TRIGGERED_BY_COMMIT"))
+    run(graph.write_batch(nodes, relationships))
+
+
+def test_nodes_are_merged_on_their_keys(graph):
+    run(graph.add_node("Task", {"id": 1, "status": "queued", "description": "docs"}))
+    run(graph.add_node("Task", {"id": 1, "status": "completed"}))
+    run(graph.add_node("Task", {"id": 2, "status": "queued"}))
+
+    assert properties(graph, TASK_QUERY, {"id": 1}) == [{"id": 1, "status": "completed", "description": "docs"}]
+    assert len(properties(graph, "MATCH (t:Task) RETURN t")) == 2
+
+
+def test_nodes_without_keys_are_always_created(graph):
+    run(graph.add_node("DocumentationOutput", {"task_id": 1}))
+    run(graph.add_node("DocumentationOutput", {"task_id": 1}))
+
+    assert len(properties(graph, "MATCH (d:DocumentationOutput) RETURN d")) == 2
+
+
+def test_relationships_merge_their_end_nodes(graph):
+    run(graph.add_relationship("Task", {"id": 1}, "File", {"path": "a.py"}, "AFFECTS_FILE"))
+    run(graph.add_relationship("Task", {"id": 1}, "File", {"path": "a.py"}, "AFFECTS_FILE"))
+
+    assert properties(graph, "MATCH (f:File) RETURN f") == [{"path": "a.py"}]
+    assert [task.id for task in run(graph.related_tasks(["a.py"]))] == [1]
+
+
+def test_queries_are_paged(graph):
+    run(graph.write_batch([("Task", {"id": n}) for n in range(5)], []))
+
+    first = run(graph.query("MATCH (t:Task) RETURN t", limit=3))
+    second = run(graph.query("MATCH (t:Task) RETURN t", limit=3, cursor=first["next_cursor"]))
+
+    assert [r["t"]["properties"]["id"] for r in first["records"] + second["records"]] == [0, 1, 2, 3, 4]
+    assert second["next_cursor"] is None
+
+
+@pytest.mark.parametrize("query, message", [
+    ("MATCH (t:Task)-[:AFFECTS_FILE]->(f:File) RETURN f", "only supports queries of the form"),
+    ("MATCH (t:Task) RETURN t.id", "only supports queries of the form"),
+    ("MATCH (t:Task {id: 1}) RETURN t", "Unsupported property filter"),
+    ("MATCH (t:Task {id: $missing}) RETURN t", "Missing query parameters"),
+])
+def test_unsupported_queries_are_rejected(graph, query, message):
+    with pytest.raises(ValueError, match=message):
+        run(graph.query(query))
+
+
+def test_unknown_labels_are_rejected(graph):
+    with pytest.raises(ValueError, match="not allowed"):
+        run(graph.write_batch([("Task", {"id": 1}), ("Secret", {"id": 2})], []))
+
+    assert properties(graph, "MATCH (t:Task) RETURN t") == []
+
+
+def test_file_context(graph):
+    store_task(graph, 1, ["a.py", "b.py"], sha="1" * 40)
+    store_task(graph, 2, ["a.py", "c.py"], sha="2" * 40)
+    store_task(graph, 3, ["a.py", "b.py", "c.py"])
+
+    context = run(graph.file_context(["a.py", "b.py"], limit=2))
+
+    assert [(task.id, task.files) for task in context.related_tasks] == [(3, ["a.py", "b.py"]), (1, ["a.py", "b.py"])]
+    assert context.recent_commits["a.py"] == [
+        CommitSummary(sha="2" * 40, event_type="push", task_id=2),
+        CommitSummary(sha="1" * 40, event_type="push", task_id=1),
+    ]
+    assert context.co_changed_files["a.py"] == [CoChangedFile(path="b.py", co_changes=2), CoChangedFile(path="c.py", co_changes=2)]
+    assert context.co_changed_files["b.py"] == [CoChangedFile(path="a.py", co_changes=2), CoChangedFile(path="c.py", co_changes=1)]
+
+
+def test_compaction_ages_out_tasks_into_file_stats(graph):
+    store_task(graph, 1, ["a.py"], sha="1" * 40, updated_at=100)
+    store_task(graph, 2, ["a.py"], updated_at=5000)
+    # Duplicates written before GeneratedFile nodes were merged on their path.
+    with graph._conn:
+        graph._conn.executemany("INSERT INTO nodes (label, properties) VALUES ('GeneratedFile', ?)",
+                                [('{"path": "out.py"}',), ('{"path": "out.py"}',)])
+
+    counts = run(graph.compact(now=10_000, cutoff=1000, batch_size=1))
+
+    assert counts["aged_out_tasks"] == 1
+    assert counts["merged_generated_files"] == 1
+    # The commit of task 1 and the remaining GeneratedFile have no relationships left.
+    assert counts["deleted_orphans"] == 2
+    assert [task["id"] for task in properties(graph, "MATCH (t:Task) RETURN t")] == [2]
+    file, = properties(graph, "MATCH (f:File) RETURN f")
+    assert (file["archived_task_count"], file["task_count"], file["last_changed_at"]) == (1, 2, 5000)
+
+
+def test_backend_is_chosen_by_memory_backend(monkeypatch, tmp_path):
+    monkeypatch.setenv("MEMORY_BACKEND", "sqlite")
+    monkeypatch.setenv("MEMORY_SQLITE_PATH", str(tmp_path / "memory.sqlite"))
+    backend = create_memory_backend()
+    run(backend.close())
+
+    assert isinstance(backend, SqliteMemoryGraph)
+    monkeypatch.setenv("MEMORY_BACKEND", "redis")
+    with pytest.raises(ValueError, match="Unknown MEMORY_BACKEND 'redis'"):
+        create_memory_backend()
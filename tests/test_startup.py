@@ -0,0 +1,71 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+from mcp_server import main
+
+
+def test_importing_the_server_does_not_load_the_orchestrator():
+    # A fresh interpreter, since other tests have imported the graph already.
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, mcp_server.main; print('orchestrator.graph' in sys.modules)"],
+        capture_output=True, text=True, env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}, check=True,
+    )
+
+    assert result.stdout.strip() == "False"
+
+
+def test_orchestrator_graph_is_loaded_on_first_use(monkeypatch):
+    monkeypatch.setattr(main, "_orchestrator_graph_loading", None)
+
+    async def load_twice():
+        return await asyncio.gather(main.orchestrator_graph(), main.orchestrator_graph())
+
+    first, second = asyncio.run(load_twice())
+
+    assert first is second is sys.modules["orchestrator.graph"]
+
+
+def test_healthz_answers_before_the_server_is_ready(client, monkeypatch):
+    monkeypatch.setattr(main, "readiness", {"orchestrator": False, "memory_graph": False})
+
+    assert client.get("/healthz").json() == {"status": "ok"}
+    assert client.get("/readyz").status_code == 503
+
+
+def test_readyz_waits_for_every_check(client, monkeypatch):
+    monkeypatch.setattr(main, "readiness", {"orchestrator": True, "memory_graph": False})
+    waiting = client.get("/readyz")
+    main.readiness["memory_graph"] = True
+    ready = client.get("/readyz")
+
+    assert waiting.json() == {"ready": False, "checks": {"orchestrator": True, "memory_graph": False}}
+    assert ready.status_code == 200 and ready.json()["ready"] is True
+
+
+def test_memory_graph_becomes_ready_once_reachable(monkeypatch):
+    class FlakyMemory:
+        attempts = 0
+
+        async def ensure_indexes(self):
+            self.attempts += 1
+            if self.attempts < 3:
+                raise ConnectionError("Neo4j is starting")
+
+    real_sleep = asyncio.sleep
+    delays = []
+
+    async def no_wait(delay):
+        delays.append(delay)
+        await real_sleep(0)
+
+    memory = FlakyMemory()
+    monkeypatch.setattr(main, "neo4j_memory", memory)
+    monkeypatch.setattr(main, "readiness", {"orchestrator": False, "memory_graph": False})
+    monkeypatch.setattr(main.asyncio, "sleep", no_wait)
+
+    asyncio.run(main.connect_memory_graph())
+
+    assert memory.attempts == 3 and delays == [1, 2]
+    assert main.readiness["memory_graph"] is True
@@ -0,0 +1,103 @@
+import pytest
+
+from mcp_server.tools.symbol_index import SymbolIndexTool, module_name
+
+MAILER = '''
+class Mailer:
+    def send(self, to: str) -> bool:
+        return deliver(to)
+
+
+def deliver(to):
+    return True
+'''
+
+APP = '''
+from pkg.mail import deliver as post
+import pkg.mail as mail
+
+
+def notify(user):
+    post(user)
+    mail.Mailer().send(user)
+'''
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SymbolIndexTool(str(tmp_path / "symbols.sqlite"))
+    yield index
+    index.close()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / "repo"
+    (root / "pkg").mkdir(parents=True)
+    (root / "pkg" / "__init__.py").write_text("")
+    (root / "pkg" / "mail.py").write_text(MAILER)
+    (root / "app.py").write_text(APP)
+    (root / ".venv").mkdir()
+    (root / ".venv" / "skipped.py").write_text("def vendored(): pass\n")
+    return root
+
+
+def test_module_names():
+    assert module_name("pkg/mail.py") == "pkg.mail"
+    assert module_name("pkg/__init__.py") == "pkg"
+
+
+def test_definitions_and_callers(index, repo):
+    assert index.index_repository("octo/repo", str(repo)) == {"indexed": 3, "unchanged": 0, "removed": 0}
+
+    (send,) = index.find_definitions("Mailer.send", repo="octo/repo")
+    assert (send["path"], send["kind"], send["line"]) == ("pkg/mail.py", "method", 3)
+    assert send["signature"] == "Mailer.send(self, to: str) -> bool"
+    assert index.find_definitions("pkg.mail")[0]["kind"] == "module"
+    assert index.find_definitions("vendored") == []
+    # The aliased call is indexed under the imported name.
+    assert [(c["path"], c["caller"], c["expression"]) for c in index.find_callers("deliver")] == [
+        ("app.py", "notify", "post"),
+        ("pkg/mail.py", "Mailer.send", "deliver"),
+    ]
+    assert [c["caller"] for c in index.find_callers("Mailer.send")] == ["notify"]
+
+
+def test_updates_only_reparse_changed_files(index, repo):
+    index.index_repository("octo/repo", str(repo))
+    (repo / "app.py").write_text(APP.replace("post(user)", "post(user, retry=True)"))
+    (repo / "pkg" / "mail.py").unlink()
+
+    stats = index.index_repository("octo/repo", str(repo), changed_files=["app.py", "pkg/mail.py", "README.md"])
+
+    assert stats == {"indexed": 1, "unchanged": 0, "removed": 1}
+    assert index.find_definitions("Mailer") == []
+    assert index.find_callers("deliver")[0]["line"] == 7
+    assert index.index_repository("octo/repo", str(repo)) == {"indexed": 0, "unchanged": 2, "removed": 0}
+
+
+def test_a_full_walk_drops_files_that_are_gone(index, repo):
+    index.index_repository("octo/repo", str(repo))
+    (repo / "app.py").unlink()
+
+    assert index.index_repository("octo/repo", str(repo))["removed"] == 1
+    assert index.file_symbols("octo/repo", ["app.py", "pkg/mail.py"]) == {
+        "pkg/mail.py": [
+            {"qualname": "Mailer", "kind": "class", "line": 2, "signature": None},
+            {"qualname": "Mailer.send", "kind": "method", "line": 3, "signature": "Mailer.send(self, to: str) -> bool"},
+            {"qualname": "deliver", "kind": "function", "line": 7, "signature": "deliver(to)"},
+        ],
+    }
+
+
+def test_unparsable_files_are_recorded_without_symbols(index, repo):
+    (repo / "broken.py").write_text("def broken(:\n")
+
+    assert index.index_repository("octo/repo", str(repo))["indexed"] == 4
+    assert index.find_definitions("broken") == []
+    assert index.index_repository("octo/repo", str(repo))["unchanged"] == 4
+
+
+def test_a_missing_root_is_rejected(index, tmp_path):
+    with pytest.raises(ValueError, match="is not a directory"):
+        index.index_repository("octo/repo", str(tmp_path / "missing"))
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+import time
+
+from mcp_server import main
+
+
+def test_each_tool_is_limited_to_its_slots(monkeypatch):
+    monkeypatch.setitem(main.tool_limits, "read_repo", asyncio.Semaphore(2))
+    lock = threading.Lock()
+    running, peak = [0], [0]
+
+    def read(n):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return n
+
+    async def scenario():
+        return await asyncio.gather(*(main.run_tool_io("read_repo", read, n) for n in range(6)))
+
+    assert asyncio.run(scenario()) == list(range(6))
+    assert peak[0] == 2
+
+
+def test_blocking_tool_calls_leave_the_event_loop_free(monkeypatch):
+    monkeypatch.setitem(main.tool_limits, "list_files", asyncio.Semaphore(1))
+    finished = []
+
+    def walk():
+        time.sleep(0.2)
+        finished.append("walk")
+
+    async def heartbeat():
+        await asyncio.sleep(0.01)
+        finished.append("heartbeat")
+
+    async def scenario():
+        await asyncio.gather(main.run_tool_io("list_files", walk), heartbeat())
+
+    asyncio.run(scenario())
+
+    assert finished == ["heartbeat", "walk"]
+
+
+def test_file_endpoints(client, tmp_path):
+    path = str(tmp_path / "pkg" / "module.py")
+
+    written = client.post("/tools/generate_code/write_file", json={"file_path": path, "content": "x = 1\n"})
+    updated = client.put("/tools/generate_code/update_file", json={"file_path": path, "new_content": "x = 2", "old_content": "x = 1"})
+    content = client.get("/tools/read_repo/read_file", params={"file_path": path})
+    listed = client.request("GET", "/tools/read_repo/list_files", json={"directory": str(tmp_path)})
+
+    assert written.status_code == 201 and written.json() == f"Successfully wrote to {path}"
+    assert updated.json() == f"Successfully updated {path}"
+    assert content.json() == "x = 2\n"
+    assert listed.json() == [path]
@@ -0,0 +1,115 @@
+import contextvars
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from mcp_server.main import new_run_state
+from orchestrator import graph
+from orchestrator.tracing import SpanExporter, Tracer, tracer as orchestrator_tracer
+
+
+class RecordingExporter:
+    def __init__(self):
+        self.spans = []
+
+    def submit(self, span):
+        self.spans.append(span)
+
+
+@pytest.fixture
+def recorded():
+    exporter = RecordingExporter()
+    return Tracer(exporter), exporter.spans
+
+
+def test_child_spans_join_the_parent_trace(recorded):
+    tracer, spans = recorded
+    with tracer.span("planner", "node", trace_id="ab" * 16) as parent:
+        with tracer.span("POST /tasks/", "mcp"):
+            pass
+
+    child, root = spans
+    assert root is parent and root.parent_span_id is None
+    assert child.trace_id == root.trace_id == "ab" * 16
+    assert child.parent_span_id == root.span_id
+
+
+def test_spans_in_worker_threads_keep_their_parent(recorded):
+    tracer, spans = recorded
+    with tracer.span("docs_agent", "node") as parent:
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pool.submit(contextvars.copy_context().run, _child_span, tracer).result()
+
+    child, _ = spans
+    assert child.name == "git clone" and child.parent_span_id == parent.span_id
+
+
+def _child_span(tracer):
+    with tracer.span("git clone", "git"):
+        pass
+
+
+def test_failed_spans_record_the_error(recorded):
+    tracer, spans = recorded
+    with pytest.raises(KeyError):
+        with tracer.span("store_context", "node"):
+            raise KeyError("task_id")
+
+    assert spans[0].outcome == "error"
+    assert spans[0].error == "KeyError: 'task_id'"
+    assert spans[0].to_otlp()["status"] == {"code": 2, "message": "KeyError: 'task_id'"}
+
+
+def test_an_explicit_outcome_survives_the_exception(recorded):
+    tracer, spans = recorded
+    with pytest.raises(TimeoutError):
+        with tracer.span("coding_agent", "node") as span:
+            span.outcome = "timeout"
+            raise TimeoutError("Node 'coding_agent' exceeded its 900s timeout.")
+
+    assert spans[0].outcome == "timeout"
+
+
+def test_otlp_form(recorded):
+    tracer, spans = recorded
+    with tracer.span("GET /tasks/", "mcp", retries=0, cached=False, ratio=0.5, route="/tasks/"):
+        pass
+
+    otlp = spans[0].to_otlp()
+    attributes = {a["key"]: a["value"] for a in otlp["attributes"]}
+    assert otlp["kind"] == 3 and otlp["status"] == {"code": 1}
+    assert int(otlp["endTimeUnixNano"]) >= int(otlp["startTimeUnixNano"])
+    assert attributes["retries"] == {"intValue": "0"}
+    assert attributes["cached"] == {"boolValue": False}
+    assert attributes["ratio"] == {"doubleValue": 0.5}
+    assert attributes["route"] == {"stringValue": "/tasks/"}
+
+
+def test_exporter_writes_one_request_per_batch(recorded, tmp_path):
+    tracer, spans = recorded
+    for name in ("create_task", "planner"):
+        with tracer.span(name, "node"):
+            pass
+    path = tmp_path / "traces.jsonl"
+
+    SpanExporter("tests", file_path=str(path)).export(spans)
+
+    (line,) = path.read_text().splitlines()
+    request = json.loads(line)
+    assert [s["name"] for s in request["resourceSpans"][0]["scopeSpans"][0]["spans"]] == ["create_task", "planner"]
+
+
+def test_graph_nodes_share_the_run_trace(fake_mcp, monkeypatch, task_id):
+    exporter = RecordingExporter()
+    monkeypatch.setattr(orchestrator_tracer, "exporter", exporter)
+    state = new_run_state("Update the documentation: traced", task_id)
+    state["trace_id"] = "cd" * 16
+
+    graph.start_run(state)
+
+    nodes = [span for span in exporter.spans if span.kind == "node"]
+    assert {span.name for span in nodes} == {
+        "create_task", "planner", "docs_agent", "store_context", "loom_checklist", "status_update",
+    }
+    assert {span.trace_id for span in nodes} == {"cd" * 16}
@@ -0,0 +1,103 @@
+import socket
+import time
+
+import pytest
+
+from mcp_server.job_queue import OrchestratorJobQueue
+from mcp_server.state_db import worker_id
+from mcp_server.tools.neo4j_query_cache import QueryCache, SqliteLabelVersions
+
+DEAD_WORKER = f"{socket.gethostname()}:999999999"
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "state.sqlite")
+
+
+@pytest.fixture
+def queue(db_path):
+    queue = OrchestratorJobQueue(db_path)
+    yield queue
+    queue.close()
+
+
+def test_jobs_are_claimed_once_in_order(queue):
+    first = queue.enqueue(1, "start", {"initial_state": {"task_id": 1}})
+    queue.enqueue(2, "resume")
+
+    job = queue.claim("worker-a")
+    assert job == {"id": first, "task_id": 1, "kind": "start", "payload": {"initial_state": {"task_id": 1}}}
+    assert queue.claim("worker-b")["task_id"] == 2
+    assert queue.claim("worker-c") is None
+
+    queue.finish(first, error="boom")
+    assert queue.latest_job(1)["status"] == "failed"
+
+
+def test_a_task_has_one_active_run(queue):
+    queue.enqueue(1, "start")
+    with pytest.raises(ValueError, match="already queued or running"):
+        queue.enqueue(1, "resume")
+    with pytest.raises(ValueError, match="Unknown orchestrator job kind"):
+        queue.enqueue(2, "cancel")
+
+    queue.finish(queue.claim("worker-a")["id"])
+    queue.enqueue(1, "retry", {"node": "status_update"})
+
+
+def test_jobs_of_dead_workers_are_requeued(queue):
+    queue.enqueue(1, "retry", {"node": "status_update"})
+    queue.enqueue(2, "start")
+    queue.enqueue(3, "start")
+    queue.claim(DEAD_WORKER)
+    queue.claim(worker_id())
+    queue.claim(f"{socket.gethostname()}-other:1")
+
+    assert queue.recover() == 2
+
+    # A requeued retry continues from its checkpoint instead of retrying again.
+    assert queue.claim("worker-a")["kind"] == "resume"
+    assert queue.claim("worker-a")["task_id"] == 2
+    assert queue.claim("worker-a") is None
+    assert queue.latest_job(3)["status"] == "running"
+
+
+def test_label_versions_are_shared_between_workers(db_path):
+    this_worker = SqliteLabelVersions(db_path, refresh_interval=60)
+    other_worker = SqliteLabelVersions(db_path, refresh_interval=60)
+    cache = QueryCache("test", max_entries=8, ttl=60, versions=other_worker)
+    labels = frozenset({"Task"})
+    cache.set("tasks", labels, ["cached"], cache.label_versions(labels))
+
+    this_worker.bump({"Task"})
+    # Neither side has synchronised yet.
+    assert cache.get("tasks") == ["cached"]
+
+    this_worker.flush()
+    other_worker.flush()
+    assert cache.get("tasks") is None
+    assert this_worker.snapshot({"Task"}) == other_worker.snapshot({"Task"})
+
+
+def test_label_version_bumps_are_written_without_further_calls(db_path):
+    writer = SqliteLabelVersions(db_path, refresh_interval=0.05)
+    reader = SqliteLabelVersions(db_path, refresh_interval=0)
+    before = reader.snapshot({"File"})
+
+    writer.bump({"File"})
+    writer.bump({"File"})
+    time.sleep(0.3)
+
+    assert reader.snapshot({"File"}) > before
+    assert reader.snapshot({"File"}) == writer.snapshot({"File"})
+
+
+def test_triggered_runs_are_queued_for_any_worker(client):
+    from mcp_server import main
+
+    response = client.post("/trigger-orchestrator", json={"task_description": "Update the documentation"})
+
+    task_id = response.json()["task_id"]
+    assert main.job_queue.latest_job(task_id)["kind"] == "start"
+    assert client.post(f"/orchestrator/runs/{task_id}/retry", params={"node": "planner"}).status_code == 404
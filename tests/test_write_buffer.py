@@ -0,0 +1,129 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from mcp_server.tools.neo4j_write_buffer import Neo4jWriteBuffer
+
+
+class FakeMemoryTool:
+    def __init__(self):
+        self.batches = []
+        self.failures = 0
+
+    async def write_batch(self, nodes, relationships):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("Neo4j is down")
+        self.batches.append((nodes, relationships))
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+@pytest.fixture
+def spool(tmp_path):
+    return str(tmp_path / "spool.jsonl")
+
+
+def test_writes_to_the_same_key_are_coalesced(spool):
+    tool = FakeMemoryTool()
+
+    async def scenario():
+        buffer = Neo4jWriteBuffer(tool, spool_path=spool, flush_interval=60)
+        await buffer.start()
+        buffer.add_node("Task", {"id": 1, "status": "queued", "description": "docs"})
+        buffer.add_node("Task", {"id": 1, "status": "completed"})
+        buffer.add_node("Task", {"id": 2, "status": "queued"})
+        assert buffer.pending_count() == 2
+        written = await buffer.flush()
+        await buffer.stop()
+        return written
+
+    assert run(scenario()) == 2
+    (nodes, relationships), = tool.batches
+    assert nodes == [
+        ("Task", {"id": 1, "status": "completed", "description": "docs"}),
+        ("Task", {"id": 2, "status": "queued"}),
+    ]
+    assert relationships == []
+
+
+def test_invalid_batches_are_rejected_whole(spool):
+    async def scenario():
+        buffer = Neo4jWriteBuffer(FakeMemoryTool(), spool_path=spool, flush_interval=60)
+        await buffer.start()
+        with pytest.raises(ValueError):
+            buffer.add_batch([("Task", {"id": 1})], [("Task", {"id": 1}, "Task", {"id": 2}, "DEPENDS ON")])
+        pending = buffer.pending_count()
+        await buffer.stop()
+        return pending
+
+    assert run(scenario()) == 0
+
+
+def test_failed_flush_keeps_writes_ahead_of_newer_ones(spool):
+    tool = FakeMemoryTool()
+    tool.failures = 1
+
+    async def scenario():
+        buffer = Neo4jWriteBuffer(tool, spool_path=spool, flush_interval=60)
+        await buffer.start()
+        buffer.add_node("Task", {"id": 1, "status": "queued"})
+        with pytest.raises(ConnectionError):
+            await buffer.flush()
+        buffer.add_node("Task", {"id": 2})
+        buffer.add_node("Task", {"id": 1, "status": "completed"})
+        await buffer.flush()
+        await buffer.stop()
+
+    run(scenario())
+    (nodes, _), = tool.batches
+    assert nodes == [("Task", {"id": 1, "status": "completed"}), ("Task", {"id": 2})]
+
+
+def test_unflushed_writes_are_recovered_from_the_spool(spool):
+    tool = FakeMemoryTool()
+    tool.failures = 1
+
+    async def first_worker():
+        buffer = Neo4jWriteBuffer(tool, spool_path=spool, flush_interval=60)
+        await buffer.start()
+        buffer.add_relationship("Task", {"id": 1}, "File", {"path": "README.md"}, "AFFECTS_FILE")
+        await buffer.stop()
+
+    async def second_worker():
+        buffer = Neo4jWriteBuffer(tool, spool_path=spool, flush_interval=60)
+        await buffer.start()
+        recovered = buffer.pending_count()
+        await buffer.flush()
+        await buffer.stop()
+        return recovered
+
+    run(first_worker())
+    assert not tool.batches
+    with open(f"{spool}.{os.getpid()}") as f:
+        assert [json.loads(line)["type"] for line in f] == ["AFFECTS_FILE"]
+
+    assert run(second_worker()) == 1
+    (_, relationships), = tool.batches
+    assert relationships == [("Task", {"id": 1}, "File", {"path": "README.md"}, "AFFECTS_FILE")]
+
+
+def test_spools_of_stopped_workers_are_adopted(spool):
+    orphan = f"{spool}.999999999"
+    with open(orphan, "w") as f:
+        f.write(json.dumps({"op": "node", "label": "Task", "properties": {"id": 7}, "enqueued_at": 0}) + "\n")
+    tool = FakeMemoryTool()
+
+    async def scenario():
+        buffer = Neo4jWriteBuffer(tool, spool_path=spool, flush_interval=60)
+        await buffer.start()
+        await buffer.flush()
+        await buffer.stop()
+
+    run(scenario())
+    assert tool.batches == [([("Task", {"id": 7})], [])]
+    assert not os.path.exists(orphan)